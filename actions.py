@@ -0,0 +1,150 @@
+# actions.py
+# Staffing action optimizer: turns staffing gaps (queues × intervals) plus the available levers into a
+# concrete plan of VTO pauses, cross-skill moves, OT blocks and VTO offers. Greedy, numpy-only:
+# cheapest levers first, and each OT block goes where it removes the most SL-weighted shortfall.
+
+import numpy as np
+import pandas as pd
+
+ACTION_ORDER = ["Pause VTO", "Skill move", "OT", "Offer VTO"]
+
+
+class Levers:
+    """What the planner may use. Per-queue values can be scalars or (Q,) arrays.
+
+    ot_agents    agents willing to take one OT block each (per queue)
+    ot_block     OT block length in intervals
+    vto_planned  (Q, P) heads already granted VTO that can be called back
+    cross_skill  (Q, Q) bool; cross_skill[a, b] = agents of queue a can take queue b's contacts
+    vto_buffer   surplus heads kept before offering VTO (None = never offer VTO)
+    """
+
+    def __init__(self, ot_agents=0, ot_block: int = 2, vto_planned=None, cross_skill=None, vto_buffer=None):
+        self.ot_agents = ot_agents
+        self.ot_block = max(1, int(ot_block))
+        self.vto_planned = vto_planned
+        self.cross_skill = cross_skill
+        self.vto_buffer = vto_buffer
+
+
+class ActionPlan:
+    """Plan rows (one per action block) + the staffing gap after applying them."""
+
+    def __init__(self, actions: pd.DataFrame, gap_before, gap_after, weight):
+        self.actions = actions
+        self.gap_before = gap_before
+        self.gap_after = gap_after
+        self.weight = weight
+
+    @property
+    def summary(self):
+        short_b, short_a = np.minimum(self.gap_before, 0), np.minimum(self.gap_after, 0)
+        a = self.actions
+        heads = (a["heads"] * a["intervals"]).groupby(a["action"], observed=True).sum() if len(a) else pd.Series(dtype=int)
+        return {
+            "short_intervals_before": int((self.gap_before < 0).sum()),
+            "short_intervals_after": int((self.gap_after < 0).sum()),
+            "weighted_shortfall_before": float(-(short_b * self.weight).sum()),
+            "weighted_shortfall_after": float(-(short_a * self.weight).sum()),
+            **{f"{k.lower().replace(' ', '_')}_head_intervals": int(heads.get(k, 0)) for k in ACTION_ORDER},
+        }
+
+    def for_interval(self, queue, pos: int):
+        """Action rows for one queue that cover interval position `pos`."""
+        a = self.actions
+        return a[(a["queue"] == queue) & (a["start_pos"] <= pos) & (a["end_pos"] >= pos)]
+
+
+def _runs(values):
+    """Run-length encode a 1-D int array -> (start, end_inclusive, value) for non-zero runs."""
+    values = np.asarray(values)
+    if not len(values):
+        return []
+    edges = np.flatnonzero(np.diff(values)) + 1
+    starts = np.r_[0, edges]
+    ends = np.r_[edges - 1, len(values) - 1]
+    keep = values[starts] != 0
+    return list(zip(starts[keep], ends[keep], values[starts][keep]))
+
+
+def plan_actions(gap, levers: Levers, weight=None, queues=None, labels=None):
+    """Greedy plan over a (Q, P) staffing gap (negative = short).
+
+    `weight` (Q, P) is the SL impact of one missing head (e.g. contacts per needed head); the planner
+    minimizes sum(weight * shortfall). Order: pause planned VTO, move cross-skilled surplus, add OT
+    blocks where they cover the most weighted shortfall, then offer VTO on what is still spare.
+    """
+    gap = np.atleast_2d(np.asarray(gap, dtype=np.int64)).copy()
+    before = gap.copy()
+    n_q, n_p = gap.shape
+    weight = np.ones(gap.shape) if weight is None else np.broadcast_to(np.atleast_2d(np.asarray(weight, dtype=float)), gap.shape)
+    queues = list(queues) if queues is not None else [f"Q{i + 1}" for i in range(n_q)]
+    labels = list(labels) if labels is not None else [str(i) for i in range(n_p)]
+    rows = []
+
+    def emit(action, q, heads_by_pos, source=None):
+        for s, e, h in _runs(heads_by_pos):
+            rows.append((action, queues[q], source, labels[s], labels[e], int(s), int(e), int(e - s + 1), int(h)))
+
+    # 1) call back VTO already granted in short intervals
+    if levers.vto_planned is not None:
+        planned = np.broadcast_to(np.atleast_2d(np.asarray(levers.vto_planned, dtype=np.int64)), gap.shape)
+        paused = np.minimum(np.maximum(-gap, 0), planned)
+        gap += paused
+        for q in np.flatnonzero(paused.any(axis=1)):
+            emit("Pause VTO", q, paused[q])
+
+    # 2) cross-skill moves: donor surplus -> short queue, all intervals at once per (donor, target) pair
+    if levers.cross_skill is not None:
+        allowed = np.asarray(levers.cross_skill, dtype=bool)
+        need = (np.maximum(-gap, 0) * weight).sum(axis=1)
+        for b in np.argsort(-need, kind="stable"):
+            if need[b] <= 0:
+                break
+            for a in np.flatnonzero(allowed[:, b]):
+                if a == b:
+                    continue
+                moved = np.minimum(np.maximum(-gap[b], 0), np.maximum(gap[a], 0))
+                if moved.any():
+                    gap[b] += moved
+                    gap[a] -= moved
+                    emit("Skill move", b, moved, source=queues[a])
+
+    # 3) OT blocks: repeatedly take the (queue, start) whose block covers the most weighted shortfall
+    ot_left = np.broadcast_to(np.asarray(levers.ot_agents, dtype=np.int64), (n_q,)).copy()
+    block = min(levers.ot_block, n_p)
+    if ot_left.any():
+        ot_starts = np.zeros((n_q, n_p - block + 1), dtype=np.int64)
+
+        def benefit(q):
+            w = np.where(gap[q] < 0, weight[q], 0.0)
+            c = np.r_[0.0, np.cumsum(w)]
+            return c[block:] - c[:-block]
+
+        gain = np.vstack([benefit(q) for q in range(n_q)])
+        gain[ot_left == 0] = 0
+        while True:
+            q, s = np.unravel_index(np.argmax(gain), gain.shape)
+            if gain[q, s] <= 0:
+                break
+            gap[q, s:s + block] += 1
+            ot_starts[q, s] += 1
+            ot_left[q] -= 1
+            gain[q] = benefit(q) if ot_left[q] else 0
+        for q, s in zip(*np.nonzero(ot_starts)):      # one row per block start (all agents on it)
+            rows.append(("OT", queues[q], None, labels[s], labels[s + block - 1], int(s), int(s + block - 1),
+                         int(block), int(ot_starts[q, s])))
+
+    # 4) offer VTO on remaining surplus beyond the buffer
+    if levers.vto_buffer is not None:
+        offer = np.maximum(gap - int(levers.vto_buffer), 0)
+        gap -= offer
+        for q in np.flatnonzero(offer.any(axis=1)):
+            emit("Offer VTO", q, offer[q])
+
+    actions = pd.DataFrame(rows, columns=["action", "queue", "from_queue", "start", "end",
+                                          "start_pos", "end_pos", "intervals", "heads"])
+    if len(actions):
+        actions["action"] = pd.Categorical(actions["action"], categories=ACTION_ORDER, ordered=True)
+        actions = actions.sort_values(["action", "queue", "start_pos"], kind="stable", ignore_index=True)
+    return ActionPlan(actions, before, gap, np.asarray(weight))
@@ -0,0 +1,325 @@
+# alerts.py
+# Alert dispatcher for bot exceptions: queue -> batch per (channel, recipient) -> send on a worker pool
+# through one pooled requests.Session, with a shared rate limit and retry/backoff.
+# Channels without an endpoint are dry-run ("simulated"), which is what the Streamlit app uses.
+# FingerprintStore suppresses exceptions that were already sent in an earlier run; only alerts the
+# dispatcher confirms (job.delivered()) are recorded as sent.
+
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from schema import widen
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+SCOPE_COLS = ("queue", "site")     # always part of an alert fingerprint when the result has them
+
+
+class RateLimiter:
+    """Token bucket shared by all workers (`rate_per_sec` sends, bursts up to `burst`)."""
+
+    def __init__(self, rate_per_sec: float, burst: int = None):
+        self.rate = float(rate_per_sec)
+        self.capacity = float(burst or max(1, int(rate_per_sec)))
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.tokens -= 1          # reserve a token; a negative balance is the queue ahead of us
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if delay:
+            time.sleep(delay)
+
+
+class DispatchJob:
+    """Handle for a running dispatch; `wait()` blocks and returns the summary."""
+
+    def __init__(self, futures, started):
+        self.futures = futures
+        self.started = started
+
+    def done(self):
+        return all(f.done() for f in self.futures)
+
+    def wait(self, timeout: float = None):
+        wait_futures(self.futures, timeout=timeout)
+        summary = {"batches": 0, "items": 0, "sent": 0, "failed": 0, "simulated": 0, "retries": 0}
+        for f in self.futures:
+            if not f.done():
+                continue
+            r = f.result()
+            summary["batches"] += 1
+            summary["items"] += r["items"]
+            summary[r["status"]] += r["items"]
+            summary["retries"] += r["retries"]
+        summary["seconds"] = round(time.monotonic() - self.started, 3)
+        return summary
+
+    def delivered(self, field: str = "fingerprint"):
+        """`field` of every item in a batch that was sent (or simulated); failed batches are left out."""
+        out = []
+        for f in self.futures:
+            if f.done() and f.result()["status"] != "failed":
+                out.extend(item[field] for item in f.result()["sent_items"] if field in item)
+        return out
+
+
+class AlertDispatcher:
+    """Queue alerts, then `dispatch()` them in batches without blocking the bot pipeline."""
+
+    def __init__(self, endpoints: dict = None, batch_size: int = 100, rate_per_sec: float = 50.0,
+                 max_retries: int = 3, backoff_sec: float = 0.25, workers: int = 8, timeout: float = 5.0):
+        self.endpoints = endpoints or {}       # channel -> URL; missing channel = simulated send
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff_sec = backoff_sec
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate_per_sec)
+        self.pending = {}                      # (channel, recipient) -> [items]
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="alert-dispatch")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max(1, len(self.endpoints)), pool_maxsize=workers, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def add(self, channel: str, recipient: str, item: dict):
+        with self.lock:
+            self.pending.setdefault((channel, recipient), []).append(item)
+        return self
+
+    def add_result(self, bot: str, result, channel: str = "teams", recipient: str = "intraday-team",
+                   recipient_col: str = None, columns=None):
+        """Queue every exception of a BotResult; `recipient_col` routes rows to one recipient each."""
+        if not result.n_exceptions:
+            return self
+        exc = result.exceptions(columns)
+        records = json.loads(widen(exc).to_json(orient="records", date_format="iso"))
+        targets = exc[recipient_col].astype(str).tolist() if recipient_col else [recipient] * len(records)
+        with self.lock:
+            for to, rec in zip(targets, records):
+                rec["bot"] = bot
+                self.pending.setdefault((channel, to), []).append(rec)
+        return self
+
+    def batches(self):
+        """Drain the queue into (channel, recipient, items) batches of at most `batch_size`."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        out = []
+        for (channel, recipient), items in pending.items():
+            for i in range(0, len(items), self.batch_size):
+                out.append((channel, recipient, items[i:i + self.batch_size]))
+        return out
+
+    def dispatch(self):
+        """Submit all queued batches to the worker pool and return immediately."""
+        started = time.monotonic()
+        futures = [self.pool.submit(self._send, *b) for b in self.batches()]
+        return DispatchJob(futures, started)
+
+    def _send(self, channel, recipient, items):
+        url = self.endpoints.get(channel)
+        if not url:
+            return {"items": len(items), "status": "simulated", "retries": 0, "sent_items": items}
+        body = {"channel": channel, "recipient": recipient, "count": len(items), "alerts": items}
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            retry_after = None
+            try:
+                resp = self.session.post(url, json=body, timeout=self.timeout)
+                if resp.status_code < 300:
+                    return {"items": len(items), "status": "sent", "retries": attempt, "sent_items": items}
+                if resp.status_code not in RETRY_STATUS:
+                    break
+                retry_after = resp.headers.get("Retry-After")
+            except requests.RequestException:
+                pass
+            if attempt < self.max_retries:
+                delay = self.backoff_sec * (2 ** attempt) * (1 + random.random() * 0.25)
+                if retry_after:
+                    try:
+                        delay = max(delay, float(retry_after))
+                    except ValueError:
+                        pass
+                time.sleep(delay)
+        return {"items": len(items), "status": "failed", "retries": attempt, "sent_items": []}
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LocalAlertSink:
+    """Local HTTP stand-in for Teams/Email webhooks; records every POSTed JSON body.
+
+    `fail_first` answers the first N requests with 503 to exercise the retry path.
+    """
+
+    def __init__(self, fail_first: int = 0):
+        self.received = []
+        self.requests = 0
+        self.fail_first = fail_first
+        self.lock = threading.Lock()
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length)
+                with sink.lock:
+                    sink.requests += 1
+                    fail = sink.requests <= sink.fail_first
+                    if not fail:
+                        sink.received.append(json.loads(raw or b"{}"))
+                code = 503 if fail else 200
+                self.send_response(code)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/alerts"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FingerprintStore:
+    """Cross-run alert dedup: remembers what was sent per (bot, queue, interval) and its flag set.
+
+    A repeat exception is suppressed unless it escalated since it was last sent: a new flag
+    appeared, its priority went up, or its severity metric worsened by at least `worsen_by`.
+    Entries expire `ttl_sec` after the last send, so a still-open issue is re-raised eventually.
+    Lookups are one dict access per exception; the store persists as JSON when `path` is set.
+    Checking records nothing: an alert counts as sent only once `mark_sent` (or `mark_delivered`
+    with the dispatcher's confirmed fingerprints) records it, so a failed send is retried next run.
+    One store may be shared by several runs at once (app sessions, the watcher); a lock guards it.
+    """
+
+    def __init__(self, path: str = None, ttl_sec: float = 4 * 3600, worsen_by: float = 1.0):
+        self.path = path
+        self.ttl_sec = ttl_sec
+        self.worsen_by = worsen_by
+        self.entries = {}    # key -> [flag bitmask, priority, severity, expires_at]
+        self.pending = {}    # key -> (flag bitmask, priority, severity) passed by filter_result, not yet sent
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as fh:
+                self.entries = json.load(fh)
+            self.purge()
+
+    def purge(self, now: float = None):
+        now = time.time() if now is None else now
+        self.entries = {k: v for k, v in self.entries.items() if v[3] > now}
+
+    def check(self, key: str, flags: int = 0, priority: float = 0, severity: float = None,
+              lower_is_worse: bool = True, now: float = None):
+        """True if this exception should be alerted (nothing is recorded; see mark_sent)."""
+        now = time.time() if now is None else now
+        old = self.entries.get(key)
+        alert = old is None or old[3] <= now
+        if not alert:
+            if flags & ~old[0]:
+                alert = True
+            elif priority > old[1]:
+                alert = True
+            elif severity is not None and old[2] is not None:
+                delta = (old[2] - severity) if lower_is_worse else (severity - old[2])
+                alert = delta >= self.worsen_by
+        return alert
+
+    def mark_sent(self, key: str, flags: int = 0, priority: float = 0, severity: float = None, now: float = None):
+        """Record a delivered alert; it is suppressed until it escalates or `ttl_sec` passes."""
+        now = time.time() if now is None else now
+        self.entries[key] = [flags, priority, severity, now + self.ttl_sec]
+        self.pending.pop(key, None)
+
+    def mark_delivered(self, keys, now: float = None):
+        """mark_sent for the fingerprints a dispatch confirmed (DispatchJob.delivered())."""
+        with self.lock:
+            for key in keys:
+                entry = self.pending.get(key)
+                if entry is not None:
+                    self.mark_sent(key, *entry, now=now)
+
+    def filter_result(self, bot: str, result, key_cols, flag_cols=(), priority_col: str = None,
+                      severity_col: str = None, lower_is_worse: bool = True, now: float = None):
+        """Return (new_or_escalated BotResult, suppressed count) for one bot run. Kept exceptions carry
+        their key in a `fingerprint` column; pass the delivered ones to `mark_delivered`.
+        The key is bot + `key_cols`, prefixed by the queue/site columns when the result has them, so the
+        same interval on two queues is two alerts."""
+        n = result.n_exceptions
+        if not n:
+            return result, 0
+        now = time.time() if now is None else now
+        key_cols = [c for c in SCOPE_COLS if c in result.columns and c not in key_cols] + list(key_cols)
+        keys = pd.Series([bot] * n)
+        for c in key_cols:
+            keys = keys.str.cat(pd.Series(result.column(c)).astype(str), sep="\x1f")
+        flags = np.zeros(n, dtype=np.int64)
+        for bit, c in enumerate(flag_cols):
+            flags |= result.column(c).astype(np.int64) << bit
+        prio = result.column(priority_col).astype(float) if priority_col else np.zeros(n)
+        sev = result.column(severity_col).astype(float).tolist() if severity_col else [None] * n
+
+        check = self.check
+        keys, flags, prio = keys.tolist(), flags.tolist(), prio.tolist()
+        with self.lock:
+            mask = np.fromiter(
+                (check(k, f, p, s, lower_is_worse, now) for k, f, p, s in zip(keys, flags, prio, sev)),
+                dtype=bool, count=n,
+            )
+            kept = np.flatnonzero(mask)
+            self.pending.update((keys[i], (flags[i], prio[i], sev[i])) for i in kept)
+        out = result.subset(mask)
+        out.extras["fingerprint"] = np.asarray(keys, dtype=object)[kept]
+        return out, int(n - len(kept))
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            self.purge()
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(self.entries, fh)
+            os.replace(tmp, self.path)
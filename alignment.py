@@ -0,0 +1,155 @@
+# alignment.py
+# Feed alignment: resample forecast / ACD / staffing feeds that arrive at different granularities
+# (e.g. 15 / 30 / 5 min) onto one interval grid with the right statistic per column, then join them
+# to the grid with a sorted-merge (searchsorted on one composite int64 key) instead of row loops.
+#
+# Rules per column:
+#   "sum"             volumes, handled contacts      (coarse rows are split evenly when upsampling)
+#   ("wmean", col)    AHT, occupancy                 (weighted by another column, e.g. volume)
+#   "twa"             staff on hand, shrinkage       (time-weighted average over the covered minutes)
+
+import numpy as np
+import pandas as pd
+
+from intervals import GRANULARITIES
+
+TIME_COL = "interval_start"
+NS_PER_MIN = 60 * 1_000_000_000
+
+FORECAST_RULES = {"volume_fcst": "sum", "aht_fcst": ("wmean", "volume_fcst")}
+ACD_RULES = {"volume_act": "sum", "aht_sec": ("wmean", "volume_act")}
+STAFF_RULES = {"actual_staff": "twa", "shrinkage": "twa"}
+
+
+def _bin_ns(ts, minutes: int):
+    """UTC int64 ns of the interval each timestamp falls in, floored on local wall-clock time
+    (so 30/60-min bins follow the site's clock, including half-hour offset zones)."""
+    ts = pd.DatetimeIndex(ts)
+    if ts.tz is None:
+        wall = ts.as_unit("ns").asi8
+        return (wall // (minutes * NS_PER_MIN)) * (minutes * NS_PER_MIN)
+    utc = ts.tz_convert("UTC").as_unit("ns").asi8
+    offset = ts.tz_localize(None).as_unit("ns").asi8 - utc
+    step = minutes * NS_PER_MIN
+    return ((utc + offset) // step) * step - offset
+
+
+def _to_time(ns, tz):
+    out = pd.DatetimeIndex(np.asarray(ns, dtype="datetime64[ns]"))
+    return out.tz_localize("UTC").tz_convert(tz) if tz is not None else out
+
+
+def infer_minutes(ts):
+    """Feed granularity from the most common step between consecutive timestamps."""
+    ns = np.unique(pd.DatetimeIndex(ts).as_unit("ns").asi8)
+    if len(ns) < 2:
+        return 30
+    steps = np.diff(ns) // NS_PER_MIN
+    vals, counts = np.unique(steps[steps > 0], return_counts=True)
+    return int(vals[np.argmax(counts)])
+
+
+def resample_feed(df: pd.DataFrame, minutes: int, rules: dict, src_minutes: int = None, keys=(),
+                  time_col: str = TIME_COL):
+    """Aggregate (or split) one feed onto a `minutes` grid; returns keys + time_col + rule columns."""
+    if minutes not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {minutes} min (use one of {GRANULARITIES})")
+    keys = list(keys)
+    src_minutes = src_minutes or infer_minutes(df[time_col])
+    ts = pd.DatetimeIndex(df[time_col])
+    tz = ts.tz
+    start_ns = ts.tz_convert("UTC").as_unit("ns").asi8 if tz is not None else ts.as_unit("ns").asi8
+    cols = {c: df[c].to_numpy(dtype=float) for c in _needed(rules)}
+    key_vals = {k: df[k].to_numpy() for k in keys}
+    dur = np.full(len(df), float(src_minutes))
+
+    if src_minutes > minutes:                         # upsample: one coarse row -> k fine rows
+        if src_minutes % minutes:
+            raise ValueError(f"Cannot split {src_minutes}-min rows into {minutes}-min intervals")
+        k = src_minutes // minutes
+        idx = np.repeat(np.arange(len(df)), k)
+        start_ns = start_ns[idx] + np.tile(np.arange(k), len(df)) * minutes * NS_PER_MIN
+        cols = {c: v[idx] for c, v in cols.items()}
+        for c, rule in rules.items():
+            if rule == "sum":
+                cols[c] = cols[c] / k
+        key_vals = {kc: v[idx] for kc, v in key_vals.items()}
+        dur = np.full(len(idx), float(minutes))
+
+    bins = _bin_ns(_to_time(start_ns, tz), minutes)
+    work = {**key_vals, "_bin": bins}
+    for c, rule in rules.items():
+        if rule == "sum":
+            work[c] = cols[c]
+        elif rule == "twa":
+            work[c] = cols[c] * dur
+            work[f"_dur_{c}"] = np.where(np.isnan(cols[c]), 0.0, dur)
+        else:
+            w = cols[rule[1]]
+            work[c] = cols[c] * w
+            work[f"_w_{c}"] = np.where(np.isnan(cols[c]), 0.0, w)
+    agg = pd.DataFrame(work).groupby(keys + ["_bin"], sort=True, observed=True).sum(min_count=1)
+
+    out = agg.reset_index()[keys + ["_bin"]]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for c, rule in rules.items():
+            if rule == "sum":
+                out[c] = agg[c].to_numpy()
+            elif rule == "twa":
+                out[c] = agg[c].to_numpy() / agg[f"_dur_{c}"].to_numpy()
+            else:
+                out[c] = agg[c].to_numpy() / agg[f"_w_{c}"].to_numpy()
+    out.insert(len(keys), time_col, _to_time(out.pop("_bin").to_numpy(), tz))
+    return out
+
+
+def _needed(rules):
+    names = list(rules)
+    for rule in rules.values():
+        if isinstance(rule, tuple) and rule[1] not in names:
+            names.append(rule[1])
+    return names
+
+
+def _composite(frame: pd.DataFrame, keys, time_col, minutes, origin, n_bins, categories):
+    """One sortable int64 per row: key codes (in the grid's category order) then bin number."""
+    code = np.zeros(len(frame), dtype=np.int64)
+    for k in keys:
+        c = pd.Categorical(frame[k], categories=categories[k]).codes.astype(np.int64)
+        code = code * len(categories[k]) + c
+        code[c < 0] = -1
+    step = np.int64(minutes * NS_PER_MIN)
+    pos = (_bin_ns(frame[time_col], minutes) - origin) // step
+    comp = code * n_bins + pos
+    comp[(code < 0) | (pos < 0) | (pos >= n_bins)] = -1
+    return comp
+
+
+def align_feeds(grid: pd.DataFrame, feeds: dict, minutes: int, keys=(), time_col: str = TIME_COL):
+    """Resample each feed to `minutes` and join its columns onto `grid` (left join, NaN where the
+    feed has no data). `feeds` maps name -> (frame, rules) or (frame, rules, src_minutes)."""
+    keys = list(keys)
+    grid_bins = _bin_ns(grid[time_col], minutes)
+    origin = grid_bins.min() if len(grid) else 0
+    categories = {k: pd.Index(pd.unique(grid[k])) for k in keys}
+    n_bins = int((grid_bins.max() - origin) // (minutes * NS_PER_MIN)) + 1 if len(grid) else 1
+    grid_key = _composite(grid, keys, time_col, minutes, origin, n_bins, categories)
+
+    out = grid.copy()
+    for spec in feeds.values():
+        frame, rules = spec[0], spec[1]
+        src = spec[2] if len(spec) > 2 else None
+        res = resample_feed(frame, minutes, rules, src_minutes=src, keys=keys, time_col=time_col)
+        if not len(res):
+            for c in rules:
+                out[c] = np.nan
+            continue
+        feed_key = _composite(res, keys, time_col, minutes, origin, n_bins, categories)
+        order = np.argsort(feed_key, kind="stable")
+        sorted_key = feed_key[order]
+        pos = np.searchsorted(sorted_key, grid_key).clip(0, len(sorted_key) - 1)
+        hit = (sorted_key[pos] == grid_key) & (grid_key >= 0)
+        take = order[pos]
+        for c in rules:
+            out[c] = np.where(hit, res[c].to_numpy(dtype=float)[take], np.nan)
+    return out
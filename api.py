@@ -0,0 +1,377 @@
+# api.py
+# Local HTTP API for the bots, so schedulers and dashboards can run them without a Streamlit session.
+# Stdlib server; requests become jobs on a bounded worker pool (full queue -> 503), answered inline
+# when they finish within `wait` seconds or by job ID. /metrics has latency percentiles + queue depth.
+# Run: python api.py --port 8502 --workers 4
+
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from bots import BOTS
+from datasets import make_dummy_adherence, make_dummy_intraday, make_dummy_shrinkage
+from export import iter_csv
+from schema import compact, widen
+
+FORMATS = ("json", "csv", "summary")
+MAX_QUEUE = 256            # jobs waiting for a worker before new requests get 503
+KEEP_JOBS = 2000           # finished jobs kept for GET /jobs/<id>
+LATENCY_WINDOW = 2048      # recent samples per series used for percentiles
+MAX_BODY = 64 * 1024 * 1024
+WAIT_SEC = 30.0            # default time a request waits for its job before returning 202 + job ID
+INTRADAY_PERIODS = (24, 48, 96, 288)
+
+# dummy input per bot when the request carries no rows: (generator, size argument, default size)
+DUMMY = {
+    "intraday-health": (make_dummy_intraday, "periods", 48),
+    "variance": (make_dummy_intraday, "periods", 48),
+    "adherence": (make_dummy_adherence, "n_agents", 140),
+    "shrinkage": (make_dummy_shrinkage, "days", 14),
+}
+_DUMMY_LOCK = threading.Lock()     # the generators seed numpy's global RNG
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Metrics:
+    """Counters and rolling latency windows (milliseconds) per series, safe across threads."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.lock = threading.Lock()
+        self.counts = defaultdict(int)
+        self.samples = defaultdict(lambda: deque(maxlen=window))
+
+    def count(self, name: str, n: int = 1):
+        with self.lock:
+            self.counts[name] += n
+
+    def observe(self, name: str, ms: float):
+        with self.lock:
+            self.samples[name].append(ms)
+
+    def snapshot(self):
+        with self.lock:
+            counts = dict(self.counts)
+            samples = {k: np.fromiter(v, dtype=float) for k, v in self.samples.items()}
+        latency = {}
+        for name, v in sorted(samples.items()):
+            if len(v):
+                p50, p95, p99 = np.percentile(v, [50, 95, 99])
+                latency[name] = {"n": len(v), "p50_ms": round(p50, 2), "p95_ms": round(p95, 2),
+                                 "p99_ms": round(p99, 2), "max_ms": round(float(v.max()), 2)}
+        return {"counts": counts, "latency": latency}
+
+
+class Job:
+    __slots__ = ("id", "bot", "status", "submitted", "started", "finished", "body", "content_type",
+                 "error", "done")
+
+    def __init__(self, bot: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.bot = bot
+        self.status = "queued"
+        self.submitted = time.time()
+        self.started = self.finished = None
+        self.body = None
+        self.content_type = None
+        self.error = None
+        self.done = threading.Event()
+
+    def info(self):
+        out = {"job_id": self.id, "bot": self.bot, "status": self.status, "submitted": self.submitted,
+               "started": self.started, "finished": self.finished}
+        if self.error:
+            out["error"] = self.error
+        if self.finished:
+            out["run_ms"] = round((self.finished - self.started) * 1000, 2)
+            out["queue_ms"] = round((self.started - self.submitted) * 1000, 2)
+        return out
+
+
+class JobPool:
+    """Bounded pool: at most `workers` bots run at once and `max_queue` wait; finished jobs are kept
+    (most recent `keep`) so callers can poll by ID."""
+
+    def __init__(self, workers: int = None, max_queue: int = MAX_QUEUE, keep: int = KEEP_JOBS):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self.keep = keep
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bot")
+        self.lock = threading.Lock()
+        self.jobs = OrderedDict()
+        self.queued = 0
+        self.running = 0
+        self.metrics = Metrics()
+
+    def submit(self, bot: str, task):
+        """Queue `task()` -> (body bytes, content type); raises ApiError(503) when the queue is full."""
+        job = Job(bot)
+        with self.lock:
+            if self.queued >= self.max_queue:
+                self.metrics.count("jobs_rejected")
+                raise ApiError(503, f"Queue full ({self.queued} jobs waiting)")
+            self.queued += 1
+            self.jobs[job.id] = job
+            while len(self.jobs) > self.keep:
+                old_id, old = next(iter(self.jobs.items()))
+                if not old.done.is_set():
+                    break
+                del self.jobs[old_id]
+        self.metrics.count("jobs_submitted")
+        self.executor.submit(self._run, job, task)
+        return job
+
+    def _run(self, job: Job, task):
+        with self.lock:
+            self.queued -= 1
+            self.running += 1
+        job.started = time.time()
+        job.status = "running"
+        try:
+            job.body, job.content_type = task()
+            job.status = "done"
+            self.metrics.count(f"{job.bot}.done")
+        except Exception as e:                         # surfaced to the caller via the job
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "failed"
+            self.metrics.count(f"{job.bot}.failed")
+        finally:
+            job.finished = time.time()
+            with self.lock:
+                self.running -= 1
+            self.metrics.observe(f"job.{job.bot}.queue", (job.started - job.submitted) * 1000)
+            self.metrics.observe(f"job.{job.bot}.run", (job.finished - job.started) * 1000)
+            job.done.set()
+
+    def get(self, job_id: str):
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            raise ApiError(404, f"Unknown job {job_id}")
+        return job
+
+    def snapshot(self):
+        with self.lock:
+            pool = {"workers": self.workers, "queue_depth": self.queued, "running": self.running,
+                    "max_queue": self.max_queue, "jobs_kept": len(self.jobs)}
+        return {"pool": pool, **self.metrics.snapshot()}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def load_input(slug: str, body: bytes, content_type: str, opts: dict):
+    """Input frame from the request: CSV body, JSON "rows" (records), or seeded dummy data."""
+    if body and content_type.startswith("text/csv"):
+        return compact(pd.read_csv(BytesIO(body)))
+    if opts.get("rows") is not None:
+        return compact(pd.DataFrame.from_records(opts["rows"]))
+    gen, size_arg, default = DUMMY[slug]
+    size = int(opts.get("size") or default)
+    if gen is make_dummy_intraday and size not in INTRADAY_PERIODS:
+        raise ValueError(f"size must be one of {INTRADAY_PERIODS} intervals per day")
+    with _DUMMY_LOCK:
+        return gen(**{size_arg: size, "seed": int(opts.get("seed", 42))})
+
+
+def render(spec, result, fmt: str, params: dict, columns=None, limit: int = None):
+    """Bot result -> (body, content type). json/csv carry the exception rows; summary only counts."""
+    columns = [c for c in columns if c in result.columns] if columns else None
+    if limit is not None:
+        keep = np.zeros(len(result), dtype=bool)
+        keep[:limit] = True
+        shown = result.subset(keep)
+    else:
+        shown = result
+    if fmt == "csv":
+        return b"".join(iter_csv(shown, columns)), "text/csv"
+    head = {"bot": spec.name, "rows": len(result.frame), "exceptions": result.n_exceptions,
+            "params": {**spec.params, **params}}
+    if fmt == "summary":
+        return json.dumps(head).encode(), "application/json"
+    data = widen(shown.exceptions(columns)).to_json(orient="records", date_format="iso")
+    return (json.dumps(head)[:-1] + ', "data": ' + data + "}").encode(), "application/json"
+
+
+def bot_task(slug: str, body: bytes, content_type: str, opts: dict):
+    spec = BOTS[slug]
+    params = opts.get("params") or {}
+    fmt = opts.get("format", "json")
+
+    def task():
+        df = load_input(slug, body, content_type, opts)
+        result = spec(df, **params)
+        limit = opts.get("limit")
+        return render(spec, result, fmt, params, opts.get("columns"), None if limit is None else int(limit))
+    return task
+
+
+def _options(query: dict, body: bytes, content_type: str):
+    """Request options from the query string, overridden by a JSON body. Thresholds can be given as
+    query parameters too (?sl_target=85)."""
+    opts = {k: v[-1] for k, v in query.items()}
+    if "columns" in opts:
+        opts["columns"] = [c for c in opts["columns"].split(",") if c]
+    if body and content_type.startswith("application/json"):
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            raise ApiError(400, f"Invalid JSON: {e}")
+        if not isinstance(payload, dict):
+            raise ApiError(400, "JSON body must be an object")
+        opts.update(payload)
+    return opts
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "WFMBotAPI/1.0"
+    protocol_version = "HTTP/1.1"      # keep-alive for high-frequency callers
+    pool: JobPool = None
+    quiet = True
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)   # no Nagle stall on keep-alive
+
+    def log_message(self, fmt, *args):
+        if not self.quiet:
+            super().log_message(fmt, *args)
+
+    def _send(self, status: int, body, content_type="application/json", headers=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, str(v))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method: str):
+        t0 = time.perf_counter()
+        self._status = 500
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        route = "/".join(parts[:1] + (["*"] if len(parts) > 1 else []) + parts[2:])
+        try:
+            body = self._body() if method == "POST" else b""     # always drain it (keep-alive)
+            self._route(method, parts, parse_qs(url.query), body)
+        except ApiError as e:
+            self._send(e.status, {"error": str(e)}, headers={"Retry-After": 1} if e.status == 503 else None)
+        except Exception as e:
+            self._send(500, {"error": f"{type(e).__name__}: {e}"})
+        self.pool.metrics.count(f"http.{self._status}")
+        self.pool.metrics.observe(f"http.{method} /{route}", (time.perf_counter() - t0) * 1000)
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _body(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        if n > MAX_BODY:
+            raise ApiError(413, f"Body over {MAX_BODY // (1024 * 1024)} MB")
+        return self.rfile.read(n) if n else b""
+
+    def _route(self, method, parts, query, body):
+        if method == "GET" and parts in (["health"], []):
+            self._send(200, {"ok": True})
+        elif method == "GET" and parts == ["bots"]:
+            self._send(200, [{"bot": s.name, "slug": s.slug, "thresholds": s.params, "inputs": s.inputs,
+                              "formats": list(FORMATS), "dummy_size": DUMMY[s.slug][1:]} for s in BOTS.values()])
+        elif method == "GET" and parts == ["metrics"]:
+            self._send(200, self.pool.snapshot())
+        elif method == "GET" and len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.pool.get(parts[1])
+            if len(parts) == 2:
+                self._send(200, job.info())
+            else:
+                self._send_result(job)
+        elif method == "POST" and len(parts) == 3 and parts[0] == "bots" and parts[2] == "run":
+            self._run_bot(parts[1], query, body)
+        else:
+            raise ApiError(404, f"No route for {method} {self.path}")
+
+    def _run_bot(self, slug, query, body):
+        if slug not in BOTS:
+            raise ApiError(404, f"Unknown bot {slug!r}; see GET /bots")
+        content_type = (self.headers.get("Content-Type") or "").lower()
+        opts = _options(query, body, content_type)
+        spec = BOTS[slug]
+        params = dict(opts.get("params") or {})
+        params.update({k: opts.pop(k) for k in list(opts) if k in spec.params})
+        opts["params"] = params
+        if opts.get("format", "json") not in FORMATS:
+            raise ApiError(400, f"format must be one of {', '.join(FORMATS)}")
+        wait = str(opts.get("wait", "true")).lower()
+        timeout = 0.0 if wait in ("false", "0", "no") else (WAIT_SEC if wait in ("true", "1", "yes") else float(wait))
+        job = self.pool.submit(slug, bot_task(slug, body, content_type, opts))
+        if timeout and job.done.wait(timeout):
+            self._send_result(job)
+        else:
+            self._send(202, job.info(), headers={"Location": f"/jobs/{job.id}"})
+
+    def _send_result(self, job: Job):
+        if job.status == "failed":
+            self._send(422, job.info())
+        elif job.status != "done":
+            self._send(202, job.info(), headers={"Location": f"/jobs/{job.id}"})
+        else:
+            self._send(200, job.body, job.content_type, headers={"X-Job-Id": job.id})
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8502, workers: int = None, max_queue: int = MAX_QUEUE,
+                quiet: bool = True):
+    """HTTP server bound to its own JobPool (call .serve_forever(); .pool.shutdown() when done)."""
+    pool = JobPool(workers, max_queue)
+    handler = type("BoundHandler", (Handler,), {"pool": pool, "quiet": quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.pool = pool
+    return server
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Local HTTP API for the WFM RPA bots")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8502)
+    ap.add_argument("--workers", type=int, default=None, help="bots running at once (default: min(4, CPUs))")
+    ap.add_argument("--queue", type=int, default=MAX_QUEUE, help="jobs allowed to wait before 503")
+    ap.add_argument("--verbose", action="store_true", help="log every request")
+    args = ap.parse_args(argv)
+    server = make_server(args.host, args.port, args.workers, args.queue, quiet=not args.verbose)
+    print(f"WFM bot API on http://{args.host}:{args.port} ({server.pool.workers} workers) — GET /bots")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
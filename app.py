@@ -9,8 +9,44 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 from io import BytesIO
+import os
 import time
 
+from actions import Levers, plan_actions
+from alerts import AlertDispatcher, FingerprintStore
+from alignment import ACD_RULES, FORECAST_RULES, STAFF_RULES, align_feeds, resample_feed
+from bots import BOTS, BotResult, run_adherence, run_intraday_health, run_shrinkage, run_variance
+from datasets import (make_dummy_adherence, make_dummy_intraday, make_dummy_shrinkage, make_dummy_shrinkage_detail,
+                      make_intervals, service_estimates)
+from export import csv_bytes
+from forecasting import fit as fit_forecast, make_dummy_volume_history
+from interval_cache import IntervalCache
+from intervals import slot_of
+from paging import PagedTable
+from perf import Instrumented, PerfHistory, RerunProfile, attach, breakdown, element_bytes
+from reforecast import reforecast_frame
+from report_pack import build_packs, narrative, pack_frames, site_kpis, split_by_site, zip_packs
+from run_history import RunHistory
+from scheduling import DEFAULT_TEMPLATES, build_schedule
+from schema import compact, expand_flags, widen
+from shrinkage import attribute_variance, daily_frame, next_day_frame, site_day_frame, trend_frame
+from simulation import simulate_day
+from tuning import AlertTuner
+
+# -----------------------------
+# Rerun profiling (opt-in developer panel)
+# -----------------------------
+# ?perf=1 profiles this session's reruns and shows the panel at the bottom of the page;
+# WFM_PERF=1 profiles every session into the shared history (panel still only with ?perf=1).
+PERF_PANEL = st.query_params.get("perf") == "1"
+prof = RerunProfile(st.session_state.get("page", "home")) if PERF_PANEL or os.environ.get("WFM_PERF") == "1" else None
+attach(prof)
+if prof:
+    st = Instrumented(st, prof, {"dataframe": "Table serialization", "plotly_chart": "Chart serialization",
+                                 "download_button": "Export bytes"})
+    px = Instrumented(px, prof, "Figure building")
+    go = Instrumented(go, prof, "Figure building")
+
 # -----------------------------
 # Page setup
 # -----------------------------
@@ -24,6 +60,8 @@ st.set_page_config(
 # ============================================================
 # MODERN CSS SYSTEM
 # ============================================================
+if prof:
+    prof.phase("CSS injection")
 st.markdown("""
 <style>
 /* ── Reset & Base ── */
@@ -793,6 +831,8 @@ header[data-testid="stHeader"] { background: transparent !important; }
 </style>
 """, unsafe_allow_html=True)
 
+if prof:
+    prof.phase("Helpers")
 
 # ============================================================
 # HELPERS
@@ -803,108 +843,290 @@ def _now_str():
 def log_add(logs, msg):
     logs.append(f"[{_now_str()}] {msg}")
 
-def bytes_download_excel(dfs: dict, filename: str):
+def excel_bytes(dfs: dict):
     bio = BytesIO()
     with pd.ExcelWriter(bio, engine="openpyxl") as writer:
         for sheet, df in dfs.items():
-            df.to_excel(writer, sheet_name=sheet[:31], index=False)
-    bio.seek(0)
+            df = df() if callable(df) else df
+            widen(df).to_excel(writer, sheet_name=sheet[:31], index=False)
+    return bio.getvalue()
+
+def export_columns(result, columns=None):
+    """Columns of a BotResult's exceptions for exports: the packed `flags` byte stays internal."""
+    return [c for c in (columns or result.columns) if c != "flags"]
+
+def exceptions_sheet(result, columns=None):
+    """Deferred Excel sheet of a BotResult's exceptions (built by the download, not the rerun)."""
+    return lambda: result.exceptions(export_columns(result, columns))
+
+def bytes_download_excel(dfs: dict, filename: str):
+    """Excel download built only when clicked; clicking does not rerun the page. A sheet may be a
+    zero-argument callable, so exception frames are only materialized for the download."""
     st.download_button(
         "📥  Download Excel Report",
-        data=bio.getvalue(),
+        data=lambda: excel_bytes(dfs),
         file_name=filename,
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        on_click="ignore",
         use_container_width=True,
     )
 
-def bytes_download_csv(df: pd.DataFrame, filename: str):
-    bio = BytesIO()
-    bio.write(df.to_csv(index=False).encode("utf-8"))
-    bio.seek(0)
+def bytes_download_csv(source, filename: str, columns=None):
+    """CSV download built only when clicked, encoded in chunks (gzip if the user opted in).
+    `source` is a frame or a BotResult (its exceptions)."""
+    gz = bool(st.session_state.get("csv_gzip", False))
     st.download_button(
-        "📥  Download CSV",
-        data=bio.getvalue(),
-        file_name=filename,
-        mime="text/csv",
+        "📥  Download CSV" + (" (gzip)" if gz else ""),
+        data=lambda: csv_bytes(source, columns, "gzip" if gz else None),
+        file_name=filename + (".gz" if gz else ""),
+        mime="application/gzip" if gz else "text/csv",
+        on_click="ignore",
         use_container_width=True,
     )
 
-def make_intervals(start_dt: datetime, periods: int = 48, minutes: int = 30):
-    times = [start_dt + timedelta(minutes=minutes * i) for i in range(periods)]
-    return pd.DataFrame({
-        "interval_start": times,
-        "interval_label": [t.strftime("%H:%M") for t in times]
-    })
-
-def make_dummy_intraday(periods=48, seed=42):
-    np.random.seed(seed)
-    base = make_intervals(datetime.now().replace(hour=0, minute=0, second=0, microsecond=0),
-                          periods=periods, minutes=30)
-    hour = base["interval_start"].dt.hour + base["interval_start"].dt.minute / 60
-    curve = 0.6 * np.exp(-((hour - 12) / 4.2) ** 2) + 0.5 * np.exp(-((hour - 19) / 3.5) ** 2) + 0.25
-    volume_fcst = (curve * 800 + np.random.normal(0, 35, size=periods)).clip(50).round()
-    aht_sec = (np.random.normal(420, 35, size=periods)).clip(240, 650).round()
-    workload_sec = (volume_fcst * aht_sec).astype(int)
-    shrink = (np.random.normal(0.28, 0.04, size=periods)).clip(0.15, 0.45)
-    base_needed = (workload_sec / 1800)
-    needed_staff = (base_needed / (1 - shrink)).clip(1).round().astype(int)
-    volume_act = (volume_fcst * np.random.normal(1.0, 0.06, size=periods) + np.random.normal(0, 18, size=periods)).clip(20).round()
-    staff_act = (needed_staff * np.random.normal(0.98, 0.07, size=periods) + np.random.normal(0, 2.0, size=periods)).clip(0).round().astype(int)
-    gap = staff_act - needed_staff
-    asa = (np.maximum(10, 25 + (-gap.clip(upper=0)) * 18 + np.random.normal(0, 6, size=periods))).round().astype(int)
-    sl = (np.clip(0.92 + (gap / needed_staff.replace(0, 1)) * 0.35 - (asa / 300) * 0.25 + np.random.normal(0, 0.03, size=periods), 0.05, 0.99) * 100).round(1)
-    df = pd.DataFrame({
-        "interval_start": base["interval_start"],
-        "interval_label": base["interval_label"],
-        "volume_fcst": volume_fcst.astype(int),
-        "volume_act": volume_act.astype(int),
-        "aht_sec": aht_sec.astype(int),
+def sim_result(name: str, fn, *args, **kwargs):
+    """fn(*args, **kwargs), computed once per bot run (Run click) and reused by every later rerun
+    of the results until the next run."""
+    results = st.session_state.setdefault("sim_results", {})
+    if name not in results:
+        results[name] = fn(*args, **kwargs)
+    return results[name]
+
+@st.fragment
+def toggle_section(icon: str, title: str, key: str, body, *args):
+    """A "Show / Hide" results section that reruns on its own: the toggle and any widget inside it
+    re-render only this section, from the already-computed `args` passed to `body`."""
+    st.markdown(f'<div class="toggle-section-title"><span class="toggle-icon">{icon}</span> {title}</div>', unsafe_allow_html=True)
+    if st.checkbox("Show / Hide", value=False, key=key):
+        body(*args)
+
+def paged_dataframe(source, key: str, columns=None, token=None, height: int = 350):
+    """Server-side paged table: sort/filter run on the server against cached indexes and only the
+    visible page is sent to the browser. `source` is a frame or a BotResult (its exceptions)."""
+    token = (repr(st.session_state.get("sim_params")), len(source), tuple(columns or ()), token)
+    tables = st.session_state.setdefault("paged_tables", {})
+    if key not in tables or tables[key][0] != token:
+        table = PagedTable.from_result(source, columns) if isinstance(source, BotResult) else PagedTable(source, columns=columns)
+        tables[key] = (token, table)
+    table = tables[key][1]
+    c1, c2, c3, c4, c5 = st.columns([2, 1, 2, 2, 1])
+    with c1:
+        by = st.selectbox("Sort by", ["(bot order)"] + table.columns, key=f"{key}_by")
+    with c2:
+        desc = st.selectbox("Order", ["Asc", "Desc"], key=f"{key}_dir") == "Desc"
+    with c3:
+        col = st.selectbox("Filter column", table.columns, key=f"{key}_col")
+    with c4:
+        query = st.text_input("Filter", key=f"{key}_q", placeholder="e.g. >=5, <80, =P1, text")
+    with c5:
+        size = st.selectbox("Rows", [25, 50, 100, 250, 500], index=1, key=f"{key}_size")
+    positions = table.view(None if by == "(bot order)" else by, not desc, col, query)
+    n_pages = max(1, -(-len(positions) // size))
+    if st.session_state.get(f"{key}_page", 1) > n_pages:
+        st.session_state[f"{key}_page"] = 1
+    page = st.number_input(f"Page (of {n_pages:,})", 1, n_pages, 1, key=f"{key}_page")
+    st.dataframe(table.page(positions, page - 1, size), use_container_width=True, height=height)
+    first = (page - 1) * size
+    st.caption(f"Rows {min(first + 1, len(positions)):,}–{min(first + size, len(positions)):,} of {len(positions):,}"
+               + (f" (filtered from {len(table):,})" if len(positions) != len(table) else ""))
+
+def dispatch_simulated(logs, bot: str, result, channel: str, recipient: str, dedupe: dict = None):
+    """Batch the bot's exceptions through the alert dispatcher in dry-run mode and log the summary.
+
+    `dedupe` = FingerprintStore.filter_result kwargs; already-sent, unchanged exceptions are skipped,
+    and only what the dispatcher delivered is remembered as sent.
+    """
+    store = get_alert_store()
+    if dedupe is not None:
+        result, suppressed = store.filter_result(bot, result, **dedupe)
+        log_add(logs, f"Dedup: {result.n_exceptions:,} new/escalated, {suppressed:,} already sent (suppressed)")
+    with AlertDispatcher() as dispatcher:
+        job = dispatcher.add_result(bot, result, channel=channel, recipient=recipient).dispatch()
+        summary = job.wait()
+    if dedupe is not None:
+        store.mark_delivered(job.delivered())
+        store.save()
+    log_add(logs, f"Dispatch ({channel} → {recipient}, simulated): {summary['items']:,} alerts "
+                  f"in {summary['batches']} batch(es), {summary['seconds']:.2f}s")
+
+@st.cache_resource
+def get_alert_store():
+    """Sent-alert fingerprints shared by every session and kept across restarts, so a re-run does not
+    re-send what an earlier run (any session) already delivered."""
+    return FingerprintStore(os.environ.get("WFM_ALERT_STORE", os.path.join(".wfm_cache", "alert_fingerprints.json")),
+                            ttl_sec=4 * 3600)
+
+@st.cache_resource
+def get_run_history():
+    history = RunHistory(os.environ.get("WFM_RUN_HISTORY_DB", "wfm_run_history.db"))
+    history.compact()  # retention runs once per server process
+    return history
+
+def record_bot_run(logs, bot: str, result, kpis: dict, n_rows: int):
+    """Persist params, KPI values, exception rows and step timings of a fresh run."""
+    steps = list(st.session_state.get("sim_steps", []))
+    steps.append(("Bot compute", time.perf_counter() - st.session_state.get("sim_compute_t0", time.perf_counter())))
+    run_id = get_run_history().record(
+        bot, params=st.session_state.get("sim_params"), kpis=kpis,
+        exceptions=result.exceptions(), steps=steps, n_rows=n_rows,
+    )
+    log_add(logs, f"Saved run #{run_id} to run history ({result.n_exceptions:,} exception rows)")
+
+def engine_volume_forecast(periods=48, seed=42):
+    """Fit the forecasting engine on 8 weeks of dummy history and forecast today (periods per day)."""
+    hist, first_date = make_dummy_volume_history(n_queues=1, days=56, periods=periods, seed=seed)
+    model = fit_forecast(hist, first_date, minutes=(24 * 60) // periods)
+    return model.predict(days=1)[0, :periods]
+
+@st.cache_resource
+def get_interval_cache():
+    return IntervalCache(os.environ.get("WFM_INTERVAL_CACHE", os.path.join(".wfm_cache", "intervals")))
+
+def shrinkage_state_path(partition: str):
+    """Where the Shrinkage Watch trend states of one data source persist between runs."""
+    return os.path.join(os.environ.get("WFM_SHRINKAGE_STATE", os.path.join(".wfm_cache", "shrinkage")), partition)
+
+def trailing_volume_baseline(df: pd.DataFrame, seed=42, weeks=8, minutes=30):
+    """Same weekday + interval average of actual volume over the trailing weeks, read from the
+    mmap interval cache (seeded once per data seed and granularity with dummy history)."""
+    cache = get_interval_cache()
+    periods = (24 * 60) // minutes
+    partition = f"dummy_seed{seed}_{minutes}min"
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    if not cache.days(partition) or cache.days(partition)[-1] < (today - timedelta(days=1)).strftime("%Y-%m-%d"):
+        hist, first_date = make_dummy_volume_history(n_queues=1, days=weeks * 7, periods=periods, seed=seed)
+        starts = pd.date_range(first_date, periods=hist.shape[1] * periods, freq=f"{minutes}min")
+        cache.append(pd.DataFrame({"interval_start": starts, "volume_act": hist.reshape(-1).astype(np.int32)}), partition)
+        cache.prune(partition, keep_days=weeks * 7)
+    baseline = cache.window(partition, days=weeks * 7, columns=["interval_start", "volume_act"]).slot_baseline("volume_act", minutes)
+    ts = df["interval_start"]
+    return baseline[ts.dt.weekday.to_numpy(), np.asarray(slot_of(ts, minutes))].round()
+
+def make_dummy_feeds(seed=42):
+    """Raw feeds as they arrive: forecast at 15 min, ACD at 30 min, staffing at 5 min."""
+    fine = make_dummy_intraday(periods=288, seed=seed).rename(columns={"aht_sec": "aht_fcst"})
+    fine["aht_sec"] = (fine["aht_fcst"] * np.random.normal(1.0, 0.05, size=len(fine))).round()
+    return {
+        "forecast": (resample_feed(fine, 15, FORECAST_RULES, src_minutes=5), FORECAST_RULES, 15),
+        "acd": (resample_feed(fine, 30, ACD_RULES, src_minutes=5), ACD_RULES, 30),
+        "staffing": (fine[["interval_start", "actual_staff", "shrinkage"]], STAFF_RULES, 5),
+    }
+
+def align_intraday(feeds: dict, periods=48, seed=42, volume_fcst=None):
+    """Intraday table built from mixed-granularity feeds: resample + join onto the `periods` grid
+    (volume summed, AHT volume-weighted, staff time-weighted), then derive needed staff and estimates."""
+    np.random.seed(seed + 1)
+    minutes = (24 * 60) // periods
+    grid = make_intervals(datetime.now().replace(hour=0, minute=0, second=0, microsecond=0),
+                          periods=periods, minutes=minutes)
+    df = align_feeds(grid, feeds, minutes)
+    if volume_fcst is not None:
+        df["volume_fcst"] = np.asarray(volume_fcst, dtype=float)
+    df[["volume_fcst", "volume_act"]] = df[["volume_fcst", "volume_act"]].fillna(0).round()
+    shrink = (df["shrinkage"].fillna(df["shrinkage"].mean()) / 100).clip(0.15, 0.45)
+    aht = df["aht_sec"].fillna(df["aht_fcst"]).round()
+    workload_sec = df["volume_fcst"] * df["aht_fcst"].fillna(aht)
+    needed_staff = (workload_sec / (minutes * 60) / (1 - shrink)).clip(1).round().astype(int)
+    staff_act = df["actual_staff"].fillna(0).round().astype(int)
+    asa, sl = service_estimates(needed_staff, staff_act)
+    return compact(pd.DataFrame({
+        "interval_start": df["interval_start"],
+        "interval_label": df["interval_label"],
+        "volume_fcst": df["volume_fcst"].astype(int),
+        "volume_act": df["volume_act"].astype(int),
+        "aht_sec": aht.astype(int),
         "shrinkage": (shrink * 100).round(1),
         "needed_staff": needed_staff,
         "actual_staff": staff_act,
         "staffing_gap": (staff_act - needed_staff).astype(int),
         "asa_sec_est": asa,
         "service_level_est_pct": sl,
-    })
-    return df
-
-def make_dummy_adherence(n_agents=120, seed=42):
-    np.random.seed(seed)
-    agents = [f"A{str(i).zfill(4)}" for i in range(1, n_agents + 1)]
-    tenure = np.random.choice(["New", "Mid", "Tenured"], size=n_agents, p=[0.30, 0.45, 0.25])
-    sched_min = np.random.choice([240, 300, 360, 420, 480], size=n_agents, p=[0.05, 0.10, 0.30, 0.30, 0.25])
-    base = np.where(tenure == "Tenured", 0.92, np.where(tenure == "Mid", 0.88, 0.83))
-    adher = np.clip(base + np.random.normal(0, 0.05, size=n_agents), 0.55, 0.98)
-    out = (sched_min * (1 - adher)).round().astype(int)
-    df = pd.DataFrame({
-        "agent_id": agents,
-        "tenure_band": tenure,
-        "scheduled_minutes": sched_min,
-        "adherence_pct": (adher * 100).round(1),
-        "out_of_adherence_minutes": out,
-    })
-    reasons = ["Late In", "Extended Break", "Meeting Overrun", "System Issue", "Unplanned Aux", "Training Overrun"]
-    df["top_reason"] = np.where(df["adherence_pct"] < 85, np.random.choice(reasons, size=n_agents), "OK")
-    return df.sort_values(["adherence_pct", "out_of_adherence_minutes"], ascending=[True, False])
-
-def make_dummy_shrinkage(days=14, seed=42):
-    np.random.seed(seed)
-    dates = [datetime.now().date() - timedelta(days=i) for i in range(days)][::-1]
-    planned = np.clip(np.random.normal(0.30, 0.02, size=days), 0.22, 0.38)
-    actual = np.clip(planned + np.random.normal(0.01, 0.02, size=days), 0.18, 0.45)
-    df = pd.DataFrame({
-        "date": dates,
-        "planned_shrinkage_pct": (planned * 100).round(1),
-        "actual_shrinkage_pct": (actual * 100).round(1),
-        "variance_pp": ((actual - planned) * 100).round(1),
-    })
-    return df
+    }))
+
+@st.cache_data(show_spinner=False)
+def simulated_service(volume, aht_sec, staff, minutes=30, seed=42, replications=20):
+    """Per-interval ASA / SL from the discrete-event simulator (actual_staff = agents taking contacts).
+    Runs in-process: forking a process pool from the threaded Streamlit server is unsafe."""
+    res = simulate_day(volume, aht_sec, staff, minutes=minutes, replications=replications, seed=seed, workers=1)
+    return res["asa_sec"].round().astype(int).to_numpy(), res["sl_pct"].round(1).to_numpy()
+
+def load_intraday(periods=48, seed=42, volume_fcst=None, mixed_feeds=False, sl_model="Heuristic", logs=None):
+    """Intraday input for the Health Check / Variance bots, per the Run Settings."""
+    df = (align_intraday(make_dummy_feeds(seed), periods, seed, volume_fcst) if mixed_feeds
+          else make_dummy_intraday(periods=periods, seed=seed, volume_fcst=volume_fcst))
+    minutes = (24 * 60) // periods
+    if logs is not None and mixed_feeds:
+        log_add(logs, f"Aligned forecast (15m), ACD (30m) and staffing (5m) feeds to {minutes}-min grid")
+    if sl_model == "Discrete-event sim":
+        t0 = time.perf_counter()
+        df["asa_sec_est"], df["service_level_est_pct"] = simulated_service(
+            df["volume_act"].to_numpy(), df["aht_sec"].to_numpy(), df["actual_staff"].to_numpy(), minutes, seed)
+        if logs is not None:
+            log_add(logs, f"Simulated 20 days of contacts for SL / ASA ({time.perf_counter() - t0:.2f}s)")
+    return compact(df)
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def alert_tuner(bot: str, seed=42, periods=48, fcst_source="Dummy curve", feed_mode="Aligned", sl_model="Heuristic"):
+    """AlertTuner over the input the bot will see for these Run Settings (kept across reruns, so its
+    presorted metrics make threshold previews a binary search)."""
+    if bot == "Adherence Sweep":
+        return AlertTuner(make_dummy_adherence(n_agents=140, seed=seed), "adherence")
+    volume_fcst = engine_volume_forecast(periods, seed) if fcst_source == "Forecast engine" else None
+    df = load_intraday(periods, seed, volume_fcst, feed_mode == "Mixed granularity", sl_model)
+    return AlertTuner(df, "intraday-health")
+
+def plan_intraday_actions(df: pd.DataFrame, seed=42, ot_agents=8, gap_limit=5, periods=48):
+    """Action plan for the intraday queue with dummy levers: a cross-skilled sister queue that can
+    lend its surplus, VTO already granted in quiet intervals, and `ot_agents` 2-hour OT blocks."""
+    minutes = (24 * 60) // periods
+    rng = np.random.default_rng(seed)
+    sister = make_dummy_intraday(periods=periods, seed=seed + 101)
+    quiet = df["volume_fcst"].to_numpy() < df["volume_fcst"].median()
+    vto_planned = np.where(quiet, rng.integers(0, 4, size=len(df)), 0)
+    weight = (df["volume_fcst"] / df["needed_staff"].clip(lower=1)).to_numpy()   # contacts per head
+    return plan_actions(
+        np.vstack([df["staffing_gap"].to_numpy(), sister["staffing_gap"].to_numpy()]),
+        Levers(ot_agents=[ot_agents, 0], ot_block=max(1, 120 // minutes),
+               vto_planned=np.vstack([vto_planned, np.zeros(len(df), dtype=int)]),
+               cross_skill=[[False, False], [True, False]], vto_buffer=gap_limit),
+        weight=np.vstack([weight, np.zeros(len(df))]),
+        queues=["This queue", "Sister queue"], labels=df["interval_label"].astype(str),
+    )
+
+def describe_actions(rows: pd.DataFrame, gap_after: int, minutes=30):
+    """One-line action text for an interval from its plan rows."""
+    text = {
+        "Pause VTO": lambda r: f"Pause **{r['heads']}** VTO",
+        "Skill move": lambda r: f"Move **{r['heads']}** from {r['from_queue']}",
+        "OT": lambda r: f"OT **+{r['heads']}** × {r['intervals'] * minutes / 60:g}h from {r['start']}",
+        "Offer VTO": lambda r: f"Offer **{r['heads']}** VTO",
+    }
+    parts = [text[r["action"]](r) for _, r in rows.iterrows()]
+    if gap_after < 0:
+        parts.append(f"still short **{-int(gap_after)}** — escalate")
+    return " · ".join(parts) if parts else "No lever available — escalate to RTA"
+
+def make_site_results(n_sites=6, periods=48, seed=42, sl_target=80, asa_limit=60, gap_limit=5,
+                      adh_target=85, ooa_limit=30, shrink_pp=2):
+    """Run all four bots once over every site's dummy data (one frame per bot, tagged by site)."""
+    sites = [f"Site {i:02d}" for i in range(1, n_sites + 1)]
+    intraday = pd.concat([make_dummy_intraday(periods, seed + i).assign(site=s) for i, s in enumerate(sites)], ignore_index=True)
+    adherence = pd.concat([make_dummy_adherence(140, seed + i).assign(site=s) for i, s in enumerate(sites)], ignore_index=True)
+    shrinkage = pd.concat([make_dummy_shrinkage(14, seed + i).assign(site=s) for i, s in enumerate(sites)], ignore_index=True)
+    return {
+        "Intraday Health Check": run_intraday_health(intraday, sl_target, asa_limit, gap_limit),
+        "Forecast vs Actual Variance": run_variance(intraday.copy(), sl_target, asa_limit),
+        "Adherence Sweep": run_adherence(adherence, adh_target, ooa_limit),
+        "Shrinkage Watch": run_shrinkage(shrinkage, shrink_pp),
+    }
 
 def rpa_steps_simulator(step_titles, logs, speed=0.25, container=None):
     target = container or st
     prog = target.progress(0, text="Initializing bot...")
     status_area = target.empty()
+    timings = []
     for i, title in enumerate(step_titles, start=1):
+        t0 = time.perf_counter()
         log_add(logs, f"Step {i}/{len(step_titles)}: {title}")
         pct = int(i / len(step_titles) * 100)
         prog.progress(pct, text=f"Step {i}/{len(step_titles)}: {title}")
@@ -915,12 +1137,14 @@ def rpa_steps_simulator(step_titles, logs, speed=0.25, container=None):
             step_html += f"<div class='bot-step {cls}'>{icon} <b>Step {j}</b> &mdash; {s}</div>"
         status_area.markdown(step_html, unsafe_allow_html=True)
         time.sleep(speed)
+        timings.append((title, time.perf_counter() - t0))
     prog.empty()
     # Final all-done
     done_html = ""
     for j, s in enumerate(step_titles, start=1):
         done_html += f"<div class='bot-step bot-step-done'>✅ <b>Step {j}</b> &mdash; {s}</div>"
     status_area.markdown(done_html, unsafe_allow_html=True)
+    return timings
 
 
 def render_metric_row(metrics):
@@ -967,6 +1191,55 @@ def plotly_theme(fig):
     return fig
 
 
+# app-level work each profiled rerun attributes to its own section (the rest counts as "Page body")
+PERF_SECTIONS = {
+    "Data generation": ["make_dummy_intraday", "make_dummy_adherence", "make_dummy_shrinkage",
+                        "make_dummy_shrinkage_detail", "make_dummy_feeds",
+                        "make_dummy_volume_history", "make_intervals", "engine_volume_forecast",
+                        "trailing_volume_baseline", "align_intraday", "load_intraday", "simulated_service",
+                        "fit_forecast", "reforecast_frame", "simulate_day", "build_schedule"],
+    "Rule evaluation": ["run_intraday_health", "run_variance", "run_adherence", "run_shrinkage", "make_site_results",
+                        "plan_intraday_actions", "plan_actions", "alert_tuner", "trend_frame", "next_day_frame", "site_kpis",
+                        "site_day_frame", "attribute_variance"],
+    "Figure building": ["plotly_theme"],
+    "Export bytes": ["bytes_download_excel", "pack_frames", "build_packs", "zip_packs"],
+    "Alerts & run history": ["dispatch_simulated", "record_bot_run"],
+    "Bot step animation": ["rpa_steps_simulator"],
+}
+
+@st.cache_resource
+def get_perf_history():
+    return PerfHistory()
+
+def render_perf_panel(record: dict):
+    """Developer panel: this rerun's sections and payload, plus the rolling history per page."""
+    history = get_perf_history()
+    with st.expander(f"⏱ Rerun performance — {record['total_ms']:,.0f} ms, "
+                     f"{record['payload_bytes'] / 1024:,.1f} KB sent", expanded=False):
+        c1, c2 = st.columns(2)
+        with c1:
+            st.caption("Sections (exclusive time; they add up to the rerun)")
+            st.dataframe(breakdown(record), use_container_width=True, hide_index=True)
+        with c2:
+            st.caption("Payload by element (bytes sent to the browser)")
+            st.dataframe(element_bytes(record), use_container_width=True, hide_index=True)
+        st.caption(f"Rolling history, last {history.maxlen} reruns per page, all sessions of this server")
+        st.dataframe(history.summary(), use_container_width=True, hide_index=True)
+        runs = history.runs(record["page"])
+        if len(runs) > 1:
+            trend = pd.DataFrame({"rerun": range(1, len(runs) + 1), "total_ms": [r["total_ms"] for r in runs]})
+            fig = px.line(trend, x="rerun", y="total_ms", title=f"Rerun latency — {record['page']}")
+            st.plotly_chart(plotly_theme(fig), use_container_width=True)
+        st.caption("Downloads are built on click, and Show / Hide sections rerun on their own (fragments); "
+                   "neither is a full rerun, so they do not show up here.")
+
+if prof:
+    for _section, _names in PERF_SECTIONS.items():
+        for _name in _names:
+            globals()[_name] = prof.timed(_section, globals()[_name])
+    prof.phase("Page body")
+
+
 # ============================================================
 # SESSION STATE
 # ============================================================
@@ -1352,9 +1625,9 @@ elif page == "library":
             "freq": "Daily",
             "icon": "📉",
             "goal": "Catch shrinkage risk early and protect staffing plan.",
-            "inputs": ["Planned shrinkage", "Actual shrinkage", "Time-off usage"],
-            "rules": ["If actual > planned by > 2pp → notify planners"],
-            "outputs": ["Variance trend", "Risk score", "Next-day warning"],
+            "inputs": ["Planned shrinkage", "Actual shrinkage", "Time-off usage (PTO, sick, training, meetings, aux)"],
+            "rules": ["If a site's actual > planned by > 2pp → notify planners"],
+            "outputs": ["Variance trend", "Variance by category", "Risk score", "Next-day warning"],
             "actions": ["Send planning alert", "Recommend OT/skills move"],
         },
         {
@@ -1448,6 +1721,7 @@ elif page == "simulator":
         "📊 Forecast vs Actual Variance": "Forecast vs Actual Variance",
         "👤 Adherence Sweep": "Adherence Sweep",
         "📉 Shrinkage Watch": "Shrinkage Watch",
+        "📋 WFM Report Builder": "WFM Report Builder",
     }
     bot_display = st.radio("Select Bot", list(bot_options.keys()), horizontal=True, label_visibility="collapsed")
     bot = bot_options[bot_display]
@@ -1468,6 +1742,11 @@ elif page == "simulator":
     adh_target = 85
     ooa_limit = 30
     shrink_pp = 2
+    shrink_days = 14
+    shrink_cats = 5
+    n_sites = 6
+    ot_agents = 8
+    auto_tune = False
 
     with cfg1:
         st.markdown("<div class='section-header'>🎛️ Rules & Thresholds</div>", unsafe_allow_html=True)
@@ -1480,14 +1759,38 @@ elif page == "simulator":
                 asa_limit = st.slider("ASA Limit (sec)", 20, 180, 60, 5)
             with rc3:
                 gap_limit = st.slider("Gap Alert (heads)", 1, 30, 5, 1)
+            if bot == "Intraday Health Check":
+                ot_agents = st.slider("OT Agents Available", 0, 40, 8, 1,
+                                      help="Agents willing to take one 2-hour OT block; used by the action planner")
         elif bot == "Adherence Sweep":
             rc1, rc2 = st.columns(2)
             with rc1:
                 adh_target = st.slider("Adherence Threshold (%)", 70, 95, 85, 1)
             with rc2:
                 ooa_limit = st.slider("OOA Limit (min)", 5, 120, 30, 5)
+        if bot in ["Intraday Health Check", "Adherence Sweep"]:
+            auto_tune = st.checkbox("🎯 Auto-tune to an alert budget", key="auto_tune",
+                                    help="Pick the thresholds that give at most this many alerts per run")
+            if auto_tune:
+                tc1, tc2 = st.columns(2)
+                with tc1:
+                    alert_budget = st.number_input("Alert budget (max alerts)", 0, 5000, 20, 1, key="alert_budget")
+                with tc2:
+                    tune_param = (st.selectbox("Tune", ["SL Target", "ASA Limit", "Gap Alert"], key="tune_param")
+                                  if bot == "Intraday Health Check" else "Both thresholds")
+        elif bot == "Shrinkage Watch":
+            rc1, rc2 = st.columns(2)
+            with rc1:
+                shrink_pp = st.slider("Shrinkage Variance Alert (pp)", 1, 10, 2, 1)
+                n_sites = st.slider("Sites", 1, 200, 6, 1, help="Shrinkage is tracked per site × day × category")
+            with rc2:
+                shrink_days = st.selectbox("History (days)", [14, 90, 365, 730], index=0)
+                shrink_cats = st.selectbox("Categories", [5, 10], index=0,
+                                           help="5: PTO, sick, training, meetings, unplanned aux; "
+                                                "10 adds coaching, projects, breaks overrun, system downtime, other")
         else:
-            shrink_pp = st.slider("Shrinkage Variance Alert (pp)", 1, 10, 2, 1)
+            n_sites = st.slider("Sites / LOBs in the pack", 2, 40, 6, 1,
+                                help="One workbook per site; all four bots run with default thresholds")
         st.markdown("</div>", unsafe_allow_html=True)
 
     with cfg2:
@@ -1495,14 +1798,71 @@ elif page == "simulator":
         st.markdown("<div class='glass-card'>", unsafe_allow_html=True)
         speed = st.select_slider("Simulation Speed", options=["Fast", "Normal", "Slow"], value="Normal")
         speed_map = {"Fast": 0.08, "Normal": 0.18, "Slow": 0.30}
-        intervals = st.selectbox("Intervals (Intraday)", [24, 48, 96], index=1)
+        intervals = st.selectbox("Intervals (Intraday)", [24, 48, 96, 288], index=1,
+                                 format_func=lambda p: f"{p} ({(24 * 60) // p}-min)",
+                                 help="Intervals per day — sets the granularity of the intraday table")
+        fcst_source = "Dummy curve"
+        feed_mode = "Aligned"
+        sl_model = "Heuristic"
+        if bot in ["Intraday Health Check", "Forecast vs Actual Variance"]:
+            fcst_source = st.selectbox(
+                "Forecast Source", ["Dummy curve", "Forecast engine"], index=0,
+                help="Forecast engine fits weekday × interval profiles + Holt-Winters level/trend on 8 weeks of history"
+            )
+            feed_mode = st.selectbox(
+                "Input Feeds", ["Aligned", "Mixed granularity"], index=0,
+                help="Mixed = forecast at 15 min, ACD at 30 min, staffing at 5 min, resampled onto the interval grid"
+            )
+            sl_model = st.selectbox(
+                "SL / ASA Model", ["Heuristic", "Discrete-event sim"], index=0,
+                help="Discrete-event sim: Poisson arrivals, lognormal AHT, abandonment; 20 simulated days per run"
+            )
         st.session_state.seed = st.number_input(
             "Data Seed", min_value=1, max_value=9999,
             value=int(st.session_state.seed),
             help="Change to generate a different random scenario"
         )
+        st.checkbox("Gzip CSV downloads", key="csv_gzip",
+                    help="Compress CSV exports (.csv.gz) — much smaller for long interval ranges")
         st.markdown("</div>", unsafe_allow_html=True)
 
+    # ── Alert budget preview ──
+    if bot in ["Intraday Health Check", "Adherence Sweep"]:
+        tuner = alert_tuner(bot, int(st.session_state.seed), intervals, fcst_source, feed_mode, sl_model)
+        if bot == "Adherence Sweep":
+            current = {"adh_target": adh_target, "ooa_limit": ooa_limit}
+            grids = {"adh_target": range(70, 96), "ooa_limit": range(5, 121, 5)}
+        else:
+            current = {"sl_target": sl_target, "asa_limit": asa_limit, "gap_limit": gap_limit}
+            grids = {"sl_target": range(60, 96), "asa_limit": range(20, 181, 5), "gap_limit": range(1, 31)}
+        n_alerts = tuner.count(**current)
+        if auto_tune:
+            if bot == "Adherence Sweep":
+                tuned, n_tuned, fits = tuner.solve_pair(alert_budget, grids, current)
+            else:
+                param = {"SL Target": "sl_target", "ASA Limit": "asa_limit", "Gap Alert": "gap_limit"}[tune_param]
+                others = {k: v for k, v in current.items() if k != param}
+                value, n_tuned, fits = tuner.solve(alert_budget, param, grids[param], current[param], **others)
+                tuned = {param: value}
+            tuned = {k: int(v) for k, v in tuned.items()}
+            sl_target = tuned.get("sl_target", sl_target)
+            asa_limit = tuned.get("asa_limit", asa_limit)
+            gap_limit = tuned.get("gap_limit", gap_limit)
+            adh_target = tuned.get("adh_target", adh_target)
+            ooa_limit = tuned.get("ooa_limit", ooa_limit)
+            labels = {"sl_target": "SL Target", "asa_limit": "ASA Limit", "gap_limit": "Gap Alert",
+                      "adh_target": "Adherence Threshold", "ooa_limit": "OOA Limit"}
+            setting = ", ".join(f"{labels[k]} **{v}**" for k, v in tuned.items())
+            if fits:
+                st.info(f"🎯 Auto-tuned: {setting} → **{n_tuned:,}** alerts (budget {alert_budget:,}; "
+                        f"sliders alone give {n_alerts:,})")
+            else:
+                st.warning(f"🎯 Budget {alert_budget:,} not reachable by tuning {tune_param} alone — "
+                           f"closest: {setting} → **{n_tuned:,}** alerts")
+        else:
+            st.caption(f"Preview: these thresholds flag **{n_alerts:,}** of {tuner.n:,} "
+                       f"{'agents' if bot == 'Adherence Sweep' else 'intervals'}")
+
     st.markdown("<div class='spacer'></div>", unsafe_allow_html=True)
 
     run = st.button("▶️  Run Bot Simulation", use_container_width=True)
@@ -1518,7 +1878,22 @@ elif page == "simulator":
         st.session_state.sim_adh_target = adh_target
         st.session_state.sim_ooa_limit = ooa_limit
         st.session_state.sim_shrink_pp = shrink_pp
+        st.session_state.sim_shrink_days = shrink_days
+        st.session_state.sim_shrink_cats = shrink_cats
+        st.session_state.sim_n_sites = n_sites
+        st.session_state.sim_ot_agents = ot_agents
         st.session_state.sim_intervals = intervals
+        st.session_state.sim_fcst_source = fcst_source
+        st.session_state.sim_feed_mode = feed_mode
+        st.session_state.sim_sl_model = sl_model
+        st.session_state.sim_params = {
+            "seed": int(st.session_state.seed), "sl_target": sl_target, "asa_limit": asa_limit,
+            "gap_limit": gap_limit, "adh_target": adh_target, "ooa_limit": ooa_limit,
+            "shrink_pp": shrink_pp, "shrink_days": shrink_days, "shrink_cats": shrink_cats, "intervals": intervals, "n_sites": n_sites,
+            "fcst_source": fcst_source, "feed_mode": feed_mode, "sl_model": sl_model,
+            "ot_agents": ot_agents,
+        }
+        st.session_state.sim_results = {}
         st.session_state.logs = []
 
     if run:
@@ -1538,7 +1913,7 @@ elif page == "simulator":
             "Dispatch alerts (simulated)",
         ]
         with st.container():
-            rpa_steps_simulator(steps, logs, speed=speed_map[speed])
+            st.session_state.sim_steps = rpa_steps_simulator(steps, logs, speed=speed_map[speed])
         st.markdown("<div class='spacer'></div>", unsafe_allow_html=True)
 
     if st.session_state.get("sim_ran"):
@@ -1551,29 +1926,34 @@ elif page == "simulator":
         adh_target = st.session_state.get("sim_adh_target", 85)
         ooa_limit = st.session_state.get("sim_ooa_limit", 30)
         shrink_pp = st.session_state.get("sim_shrink_pp", 2)
+        shrink_days = st.session_state.get("sim_shrink_days", 14)
+        shrink_cats = st.session_state.get("sim_shrink_cats", 5)
+        n_sites = st.session_state.get("sim_n_sites", 6)
+        ot_agents = st.session_state.get("sim_ot_agents", 8)
         intervals = st.session_state.get("sim_intervals", 48)
+        fcst_source = st.session_state.get("sim_fcst_source", "Dummy curve")
+        volume_fcst = sim_result("volume_fcst", engine_volume_forecast, intervals, seed) if fcst_source == "Forecast engine" else None
+        mixed_feeds = st.session_state.get("sim_feed_mode", "Aligned") == "Mixed granularity"
+        sl_model = st.session_state.get("sim_sl_model", "Heuristic")
         is_fresh = run  # True only on button click, False on checkbox re-runs
+        if is_fresh:
+            st.session_state.sim_compute_t0 = time.perf_counter()
 
         # ── INTRADAY HEALTH CHECK ──
         if bot == "Intraday Health Check":
-            df = make_dummy_intraday(periods=intervals, seed=seed)
+            df = sim_result("df", load_intraday, intervals, seed, volume_fcst, mixed_feeds, sl_model, logs if is_fresh else None)
             if is_fresh:
                 log_add(logs, f"Loaded intraday table: {len(df):,} intervals")
 
-            df["flag_staffing"] = df["staffing_gap"] <= -gap_limit
-            df["flag_sl"] = df["service_level_est_pct"] < sl_target
-            df["flag_asa"] = df["asa_sec_est"] > asa_limit
-            df["is_risk"] = df[["flag_staffing", "flag_sl", "flag_asa"]].any(axis=1)
-
-            risk = df[df["is_risk"]].copy()
-            risk["priority"] = (
-                (risk["flag_staffing"].astype(int) * 3) +
-                (risk["flag_sl"].astype(int) * 2) +
-                (risk["flag_asa"].astype(int) * 1)
-            )
-            risk = risk.sort_values(["priority", "service_level_est_pct", "staffing_gap"], ascending=[False, True, True])
-
-            total_risk = len(risk)
+            risk = sim_result("risk", run_intraday_health, df, sl_target, asa_limit, gap_limit)
+            total_risk = risk.n_exceptions
+            if is_fresh:
+                dispatch_simulated(logs, bot, risk, "teams", "intraday-team", dedupe=BOTS["intraday-health"].dedupe)
+                record_bot_run(logs, bot, risk, {
+                    "intervals": len(df), "risk_intervals": total_risk,
+                    "worst_sl": risk.column("service_level_est_pct").min() if total_risk else None,
+                    "worst_gap": risk.column("staffing_gap").min() if total_risk else None,
+                }, n_rows=len(df))
             if total_risk == 0:
                 st.markdown("""
                 <div class="status-banner status-ok">
@@ -1590,8 +1970,8 @@ elif page == "simulator":
             render_metric_row([
                 (f"{len(df):,}", "Intervals Checked", "info"),
                 (f"{total_risk:,}", "Risk Intervals", "bad" if total_risk else "ok"),
-                (f"{risk['service_level_est_pct'].min():.1f}%" if total_risk else "—", "Worst SL", "warn" if total_risk else ""),
-                (f"{risk['staffing_gap'].min():,}" if total_risk else "—", "Worst Gap", "bad" if total_risk else ""),
+                (f"{risk.column('service_level_est_pct').min():.1f}%" if total_risk else "—", "Worst SL", "warn" if total_risk else ""),
+                (f"{risk.column('staffing_gap').min():,}" if total_risk else "—", "Worst Gap", "bad" if total_risk else ""),
             ])
 
             # ── Charts ──
@@ -1609,6 +1989,10 @@ elif page == "simulator":
                     x=df["interval_label"], y=df["volume_act"],
                     name="Actual", line=dict(color="#e040fb", width=2, dash="dot")
                 ))
+                fig_vol.add_trace(go.Scatter(
+                    x=df["interval_label"], y=sim_result("baseline", trailing_volume_baseline, df, seed, minutes=(24 * 60) // intervals),
+                    name="8-wk avg", line=dict(color="#8b5cf6", width=1.5, dash="dash")
+                ))
                 fig_vol.update_layout(title="Volume: Forecast vs Actual", height=320)
                 plotly_theme(fig_vol)
                 st.plotly_chart(fig_vol, use_container_width=True)
@@ -1652,27 +2036,105 @@ elif page == "simulator":
                 plotly_theme(fig_asa)
                 st.plotly_chart(fig_asa, use_container_width=True)
 
+            # ── Re-forecast ──
+            def show_reforecast(df):
+                closed = st.select_slider(
+                    "Re-forecast as of", options=list(range(1, len(df))), value=len(df) // 2,
+                    format_func=lambda i: str(df["interval_label"].iloc[i]),
+                    help="Intervals before this time are closed; their actual/forecast ratio rescales the rest of the day",
+                )
+                rdf, ratio = reforecast_frame(df, closed, minutes=(24 * 60) // intervals)
+                ahead = rdf[~rdf["is_closed"]]
+                projected = ahead[ahead["staffing_gap_reforecast"] <= -gap_limit]
+                render_metric_row([
+                    (f"×{ratio:.2f}", "Smoothed Act / Fcst", "warn" if abs(ratio - 1) >= 0.05 else "ok"),
+                    (f"{len(ahead):,}", "Intervals Ahead", "info"),
+                    (f"{len(projected):,}", "Projected Risk", "bad" if len(projected) else "ok"),
+                    (f"{int(ahead['staffing_gap_reforecast'].min()):,}" if len(ahead) else "—", "Worst Projected Gap", ""),
+                ])
+                fig_rf = go.Figure()
+                fig_rf.add_trace(go.Scatter(x=rdf["interval_label"], y=rdf["volume_fcst"], name="Original forecast",
+                                            line=dict(color="#00e5ff", width=1.5, dash="dash")))
+                fig_rf.add_trace(go.Scatter(x=rdf["interval_label"][rdf["is_closed"]], y=rdf["volume_act"][rdf["is_closed"]],
+                                            name="Actual to date", line=dict(color="#e040fb", width=2)))
+                fig_rf.add_trace(go.Scatter(x=ahead["interval_label"], y=ahead["volume_reforecast"], name="Re-forecast",
+                                            line=dict(color="#ffd740", width=2)))
+                fig_rf.update_layout(title="Rest-of-Day Re-forecast", height=320)
+                plotly_theme(fig_rf)
+                st.plotly_chart(fig_rf, use_container_width=True)
+                if len(projected):
+                    st.dataframe(projected[["interval_label", "volume_fcst", "volume_reforecast", "needed_staff",
+                                            "needed_staff_reforecast", "actual_staff", "staffing_gap_reforecast"]],
+                                 use_container_width=True, height=300)
+                else:
+                    st.success("No projected risk for the rest of the day at current run rate.")
+            toggle_section("🔮", "Intraday Re-forecast (rest of day)", "chk_reforecast", show_reforecast, df)
+
+            # ── Schedule Builder ──
+            def show_schedule(df):
+                minutes = (24 * 60) // intervals
+                head_hours = df["needed_staff"].sum() * minutes / 60
+                headcount = st.slider("Headcount limit", 10, 2000, int(min(2000, max(10, round(head_hours / 6 * 1.2, -1)))), 10,
+                                      help="Most agents that can be scheduled on the day (default ≈ needed head-hours / 6h × 1.2)")
+                templates = [t for t in DEFAULT_TEMPLATES if t.length % minutes == 0 and t.break_len % minutes == 0]
+                sched = build_schedule(df["needed_staff"].to_numpy(), minutes, templates, max_agents=headcount)
+                summ = sched.summary
+                render_metric_row([
+                    (f"{summ['shifts']:,}", "Shifts", "info"),
+                    (f"{summ['intervals_met_pct']}%", "Intervals Covered", "ok" if summ["intervals_met_pct"] >= 95 else "warn"),
+                    (f"{summ['short_head_hours']:,}", "Short Head-Hours", "bad" if summ["short_head_hours"] else "ok"),
+                    (f"{summ['over_head_hours']:,}", "Over Head-Hours", ""),
+                ])
+                if summ["unassigned_shifts"]:
+                    st.warning(f"{summ['unassigned_shifts']:,} shift(s) could not be staffed within the headcount "
+                               "limit; they are left out of the schedule and count as short head-hours.")
+                fig_sched = go.Figure()
+                fig_sched.add_trace(go.Scatter(x=df["interval_label"], y=df["needed_staff"], name="Needed",
+                                               line=dict(color="#00e5ff", width=2, shape="hv")))
+                fig_sched.add_trace(go.Scatter(x=df["interval_label"], y=sched.coverage, name="Scheduled",
+                                               line=dict(color="#00e676", width=2, shape="hv"),
+                                               fill="tozeroy", fillcolor="rgba(0,230,118,0.06)"))
+                fig_sched.update_layout(title="Needed vs Scheduled Heads", height=320)
+                plotly_theme(fig_sched)
+                st.plotly_chart(fig_sched, use_container_width=True)
+                paged_dataframe(sched.shifts, "pg_shifts", columns=[c for c in sched.shifts.columns if c != "day"],
+                                token=headcount, height=300)
+            toggle_section("🗓️", "Schedule Builder (cover needed staff)", "chk_schedule", show_schedule, df)
+
             # ── Data Tables ──
-            st.markdown('<div class="toggle-section-title"><span class="toggle-icon">📋</span> Bot Inputs (full data)</div>', unsafe_allow_html=True)
-            if st.checkbox("Show / Hide", value=False, key="chk_bot_inputs"):
-                st.dataframe(df, use_container_width=True, height=350)
+            def show_bot_inputs(df):
+                paged_dataframe(df, "pg_bot_inputs", columns=[c for c in df.columns if c != "flags"])
+            toggle_section("📋", "Bot Inputs (full data)", "chk_bot_inputs", show_bot_inputs, df)
 
-            st.markdown('<div class="toggle-section-title"><span class="toggle-icon">🚨</span> Exceptions (what the bot would send)</div>', unsafe_allow_html=True)
-            if st.checkbox("Show / Hide", value=False, key="chk_exceptions"):
-                if total_risk:
+            def show_exceptions(risk):
+                if risk.n_exceptions:
                     show_cols = [
                         "interval_label", "volume_act", "needed_staff", "actual_staff", "staffing_gap",
                         "asa_sec_est", "service_level_est_pct", "flag_staffing", "flag_sl", "flag_asa", "priority"
                     ]
-                    st.dataframe(risk[show_cols], use_container_width=True, height=350)
+                    paged_dataframe(risk, "pg_exceptions", columns=show_cols)
                 else:
                     st.success("No exceptions. This is the best kind of bot run.")
+            toggle_section("🚨", "Exceptions (what the bot would send)", "chk_exceptions", show_exceptions, risk)
 
             # ── Actions ──
             if total_risk:
                 st.markdown("<div class='section-header'>💡 Suggested Actions</div>", unsafe_allow_html=True)
-                top = risk.head(6)
-                for _, r in top.iterrows():
+                plan = sim_result("plan", plan_intraday_actions, df, seed, ot_agents, gap_limit, intervals)
+                gap_before, gap_after = plan.gap_before[0], plan.gap_after[0]
+                ot_hours = plan.summary["ot_head_intervals"] * ((24 * 60) // intervals) / 60
+                if is_fresh:
+                    log_add(logs, f"Action plan: {len(plan.actions):,} actions, short intervals "
+                                  f"{(gap_before < 0).sum()} → {(gap_after < 0).sum()}")
+                render_metric_row([
+                    (f"{(gap_before < 0).sum()} → {(gap_after < 0).sum()}", "Short Intervals", "ok" if (gap_after < 0).sum() == 0 else "warn"),
+                    (f"{(gap_before <= -gap_limit).sum()} → {(gap_after <= -gap_limit).sum()}", "Gap Alerts", "info"),
+                    (f"{ot_hours:,.1f}", "OT Hours", ""),
+                    (f"{plan.summary['skill_move_head_intervals'] + plan.summary['pause_vto_head_intervals']:,}", "Moves + VTO Pauses", ""),
+                ])
+                top = risk.exceptions(["interval_label", "staffing_gap", "asa_sec_est", "service_level_est_pct",
+                                       "flag_staffing", "flag_sl", "flag_asa"], limit=6)
+                for pos, r in top.iterrows():
                     parts = []
                     if r["flag_staffing"]:
                         parts.append(f"Short by **{abs(int(r['staffing_gap']))}** heads")
@@ -1680,44 +2142,39 @@ elif page == "simulator":
                         parts.append(f"SL **{r['service_level_est_pct']}%** < {sl_target}%")
                     if r["flag_asa"]:
                         parts.append(f"ASA **{int(r['asa_sec_est'])}s** > {asa_limit}s")
-                    st.markdown(f"- **{r['interval_label']}**: {' · '.join(parts)} → Consider OT / skill move / VTO pause")
+                    st.markdown(f"- **{r['interval_label']}**: {' · '.join(parts)} → {describe_actions(plan.for_interval('This queue', pos), gap_after[pos], (24 * 60) // intervals)}")
+                def show_action_plan(plan):
+                    st.dataframe(plan.actions[plan.actions["queue"] == "This queue"].drop(columns=["start_pos", "end_pos"]),
+                                 use_container_width=True, height=300)
+                toggle_section("🧩", "Action Plan (OT / skill moves / VTO)", "chk_action_plan", show_action_plan, plan)
 
             # ── Downloads ──
             st.markdown("<div class='spacer'></div>", unsafe_allow_html=True)
             dl1, dl2 = st.columns(2)
             with dl1:
                 bytes_download_excel(
-                    {"Intraday": df, "Exceptions": risk if total_risk else df.head(0)},
+                    {"Intraday": expand_flags(df, ["flag_staffing", "flag_sl", "flag_asa"]), "Exceptions": exceptions_sheet(risk)},
                     filename="wfm_rpa_intraday_simulator.xlsx",
                 )
             with dl2:
-                bytes_download_csv(risk if total_risk else df.head(0), "wfm_rpa_intraday_exceptions.csv")
+                bytes_download_csv(risk, "wfm_rpa_intraday_exceptions.csv", export_columns(risk))
 
         # ── FORECAST VS ACTUAL VARIANCE ──
         elif bot == "Forecast vs Actual Variance":
-            df = make_dummy_intraday(periods=intervals, seed=seed)
+            df = sim_result("df", load_intraday, intervals, seed, volume_fcst, mixed_feeds, sl_model, logs if is_fresh else None)
             if is_fresh:
                 log_add(logs, f"Loaded forecast/actual table: {len(df):,} intervals")
 
-            df["vol_var_pct"] = np.where(df["volume_fcst"] > 0,
-                                         (df["volume_act"] - df["volume_fcst"]) / df["volume_fcst"] * 100, 0.0).round(1)
-            df["gap_pct"] = np.where(df["needed_staff"] > 0,
-                                     (df["actual_staff"] - df["needed_staff"]) / df["needed_staff"] * 100, 0.0).round(1)
-
-            def driver(row):
-                drivers = []
-                if abs(row["vol_var_pct"]) >= 8:
-                    drivers.append("Volume")
-                if row["aht_sec"] >= 480:
-                    drivers.append("AHT")
-                if row["staffing_gap"] <= -5:
-                    drivers.append("Staffing")
-                return ", ".join(drivers) if drivers else "Minor/Normal"
-
-            df["top_driver_hint"] = df.apply(driver, axis=1)
-            df["is_miss"] = (df["service_level_est_pct"] < sl_target) | (df["asa_sec_est"] > asa_limit)
-            miss = df[df["is_miss"]].copy()
-            miss = miss.sort_values(["service_level_est_pct", "asa_sec_est"], ascending=[True, False])
+            miss = sim_result("miss", run_variance, df, sl_target, asa_limit)
+            df["vol_8wk_avg"] = sim_result("baseline", trailing_volume_baseline, df, seed, minutes=(24 * 60) // intervals)
+            df["vol_vs_8wk_pct"] = np.where(df["vol_8wk_avg"] > 0,
+                                            (df["volume_act"] - df["vol_8wk_avg"]) / df["vol_8wk_avg"] * 100, 0.0).round(1)
+            if is_fresh:
+                dispatch_simulated(logs, bot, miss, "email", "wfm-analysts", dedupe=BOTS["variance"].dedupe)
+                record_bot_run(logs, bot, miss, {
+                    "intervals": len(df), "miss_intervals": len(miss),
+                    "avg_vol_var_pct": df["vol_var_pct"].mean(),
+                }, n_rows=len(df))
 
             st.markdown("""
             <div class="status-banner status-ok">
@@ -1729,7 +2186,7 @@ elif page == "simulator":
                 (f"{len(df):,}", "Intervals Checked", "info"),
                 (f"{len(miss):,}", "Miss Intervals", "bad" if len(miss) else "ok"),
                 (f"{df['vol_var_pct'].mean():.1f}%", "Avg Vol Variance", "warn"),
-                (miss["top_driver_hint"].mode().iloc[0] if len(miss) else "—", "Top Driver", ""),
+                (pd.Series(miss.column("top_driver_hint")).mode().iloc[0] if len(miss) else "—", "Top Driver", ""),
             ])
 
             # Charts
@@ -1751,38 +2208,43 @@ elif page == "simulator":
                 plotly_theme(fig2)
                 st.plotly_chart(fig2, use_container_width=True)
 
-            show = df[["interval_label", "volume_fcst", "volume_act", "vol_var_pct",
-                        "aht_sec", "needed_staff", "actual_staff", "staffing_gap",
-                        "asa_sec_est", "service_level_est_pct", "top_driver_hint"]]
+            show_cols = ["interval_label", "volume_fcst", "volume_act", "vol_var_pct", "vol_8wk_avg", "vol_vs_8wk_pct",
+                         "aht_sec", "needed_staff", "actual_staff", "staffing_gap",
+                         "asa_sec_est", "service_level_est_pct", "top_driver_hint"]
+            show = miss.base(show_cols)
 
-            st.markdown('<div class="toggle-section-title"><span class="toggle-icon">📋</span> Full Variance Table</div>', unsafe_allow_html=True)
-            if st.checkbox("Show / Hide", value=False, key="chk_variance_table"):
-                st.dataframe(show, use_container_width=True, height=350)
+            def show_variance_table(show):
+                paged_dataframe(show, "pg_variance")
+            toggle_section("📋", "Full Variance Table", "chk_variance_table", show_variance_table, show)
 
-            st.markdown('<div class="toggle-section-title"><span class="toggle-icon">🚨</span> Miss Intervals</div>', unsafe_allow_html=True)
-            if st.checkbox("Show / Hide", value=False, key="chk_miss_intervals"):
+            def show_miss_intervals(miss):
                 if len(miss):
-                    st.dataframe(miss[show.columns], use_container_width=True, height=350)
+                    paged_dataframe(miss, "pg_miss", columns=show_cols)
                 else:
                     st.success("No big misses based on your targets. Nice!")
+            toggle_section("🚨", "Miss Intervals", "chk_miss_intervals", show_miss_intervals, miss)
 
             st.markdown("<div class='spacer'></div>", unsafe_allow_html=True)
             dl1, dl2 = st.columns(2)
             with dl1:
-                bytes_download_excel({"Variance": show, "Misses": miss[show.columns]}, "wfm_rpa_variance_simulator.xlsx")
+                bytes_download_excel({"Variance": show, "Misses": exceptions_sheet(miss, show_cols)},
+                                     "wfm_rpa_variance_simulator.xlsx")
             with dl2:
-                bytes_download_csv(miss[show.columns], "wfm_rpa_variance_misses.csv")
+                bytes_download_csv(miss, "wfm_rpa_variance_misses.csv", show_cols)
 
         # ── ADHERENCE SWEEP ──
         elif bot == "Adherence Sweep":
-            df = make_dummy_adherence(n_agents=140, seed=seed)
+            df = sim_result("df", make_dummy_adherence, n_agents=140, seed=seed)
             if is_fresh:
                 log_add(logs, f"Loaded adherence table: {len(df):,} agents")
 
-            df["is_alert"] = (df["adherence_pct"] < adh_target) & (df["out_of_adherence_minutes"] >= ooa_limit)
-            alerts = df[df["is_alert"]].copy()
-
-            total_alerts = len(alerts)
+            alerts = sim_result("alerts", run_adherence, df, adh_target, ooa_limit)
+            total_alerts = alerts.n_exceptions
+            if is_fresh:
+                dispatch_simulated(logs, bot, alerts, "teams", "supervisors", dedupe=BOTS["adherence"].dedupe)
+                record_bot_run(logs, bot, alerts, {
+                    "agents": len(df), "alerts": total_alerts, "worst_adherence": df["adherence_pct"].min(),
+                }, n_rows=len(df))
             if total_alerts == 0:
                 st.markdown("""
                 <div class="status-banner status-ok">
@@ -1800,7 +2262,7 @@ elif page == "simulator":
                 (f"{len(df):,}", "Agents Checked", "info"),
                 (f"{total_alerts:,}", "Alerts", "bad" if total_alerts else "ok"),
                 (f"{df['adherence_pct'].min():.1f}%", "Worst Adherence", "warn"),
-                (alerts["top_reason"].mode().iloc[0] if total_alerts else "—", "Top Reason", ""),
+                (pd.Series(alerts.column("top_reason")).mode().iloc[0] if total_alerts else "—", "Top Reason", ""),
             ])
 
             # Charts
@@ -1827,7 +2289,7 @@ elif page == "simulator":
 
             if total_alerts:
                 # Reason breakdown
-                reason_counts = alerts["top_reason"].value_counts().reset_index()
+                reason_counts = pd.Series(alerts.column("top_reason")).value_counts().reset_index()
                 reason_counts.columns = ["reason", "count"]
                 fig3 = px.pie(reason_counts, values="count", names="reason",
                               title="Alert Reasons Breakdown",
@@ -1847,54 +2309,90 @@ elif page == "simulator":
                 )
                 st.plotly_chart(fig3, use_container_width=True)
 
-            st.markdown('<div class="toggle-section-title"><span class="toggle-icon">📋</span> All Agents</div>', unsafe_allow_html=True)
-            if st.checkbox("Show / Hide", value=False, key="chk_all_agents"):
-                st.dataframe(df, use_container_width=True, height=350)
+            def show_all_agents(df):
+                paged_dataframe(df, "pg_agents")
+            toggle_section("📋", "All Agents", "chk_all_agents", show_all_agents, df)
 
-            st.markdown('<div class="toggle-section-title"><span class="toggle-icon">🚨</span> Alerts (what bot sends to TLs)</div>', unsafe_allow_html=True)
-            if st.checkbox("Show / Hide", value=False, key="chk_alerts_tl"):
-                if total_alerts:
-                    st.dataframe(alerts, use_container_width=True, height=350)
+            def show_alerts_tl(alerts):
+                if alerts.n_exceptions:
+                    paged_dataframe(alerts, "pg_adh_alerts")
                 else:
                     st.success("No alerts based on your thresholds.")
+            toggle_section("🚨", "Alerts (what bot sends to TLs)", "chk_alerts_tl", show_alerts_tl, alerts)
 
             st.markdown("<div class='spacer'></div>", unsafe_allow_html=True)
             dl1, dl2 = st.columns(2)
             with dl1:
-                bytes_download_excel({"Adherence": df, "Alerts": alerts}, "wfm_rpa_adherence_simulator.xlsx")
+                bytes_download_excel({"Adherence": df, "Alerts": exceptions_sheet(alerts)},
+                                     "wfm_rpa_adherence_simulator.xlsx")
             with dl2:
-                bytes_download_csv(alerts, "wfm_rpa_adherence_alerts.csv")
+                bytes_download_csv(alerts, "wfm_rpa_adherence_alerts.csv", export_columns(alerts))
 
         # ── SHRINKAGE WATCH ──
-        else:
-            df = make_dummy_shrinkage(days=14, seed=seed)
+        elif bot == "Shrinkage Watch":
+            detail = sim_result("detail", make_dummy_shrinkage_detail, n_sites, shrink_days, seed, shrink_cats)
+            site_day = sim_result("site_day", site_day_frame, detail)
+            by_category = sim_result("by_category", attribute_variance, detail, by=())
+            by_site = sim_result("by_site", attribute_variance, detail, by=("site",))
+            by_date = sim_result("by_date", attribute_variance, detail, by=("date",))
+            # center-level daily series (site average) for the trend charts; next-day risk is tracked
+            # per site (the rows the alert rule checks) and per (site, category) for its driver
+            hist = sim_result("hist", lambda: trend_frame(daily_frame(site_day)))
+            # trend states persist per data source: a run folds in only the days added since the last one
+            outlook = sim_result("next_day", next_day_frame, site_day, detail, shrink_pp,
+                                 shrinkage_state_path(f"dummy_seed{seed}_{n_sites}x{shrink_days}x{shrink_cats}"))
+            nxt = outlook.iloc[0]
+            n_warn = int(outlook["next_day_warning"].sum())
+            df = sim_result("df", hist.drop, columns=["site", "category", "_ewm_var"])
+            top_cat = by_category.sort_values("variance_pp", ascending=False).iloc[0]
             if is_fresh:
-                log_add(logs, f"Loaded shrinkage table: {len(df):,} days")
-
-            df["is_alert"] = df["variance_pp"] >= shrink_pp
-            alerts = df[df["is_alert"]].copy()
-            total_alerts = len(alerts)
+                log_add(logs, f"Loaded shrinkage detail: {len(detail):,} rows ({n_sites} sites × {shrink_days} days "
+                              f"× {shrink_cats} categories)")
+                log_add(logs, f"Top variance driver: {top_cat['category']} ({top_cat['variance_pp']:+.2f}pp per site-day, "
+                              f"{top_cat['share_of_excess_pct']:.0f}% of over-plan shrinkage)")
+                log_add(logs, f"Next-day risk: {n_warn} of {len(outlook)} sites warned; worst {nxt['site']} "
+                              f"{nxt['risk_score']:.0f}/100 (forecast {nxt['next_day_pp']:+.1f}pp, "
+                              f"driver {nxt['driver_category']})")
+
+            alerts = sim_result("alerts", run_shrinkage, site_day, shrink_pp)
+            total_alerts = alerts.n_exceptions
+            if is_fresh:
+                dispatch_simulated(logs, bot, alerts, "email", "planners", dedupe=BOTS["shrinkage"].dedupe)
+                record_bot_run(logs, bot, alerts, {
+                    "site_days": len(site_day), "alert_site_days": total_alerts,
+                    "max_variance_pp": site_day["variance_pp"].max(), "next_day_risk": nxt["risk_score"],
+                    "next_day_warned_sites": n_warn,
+                    "top_category_share_pct": top_cat["share_of_excess_pct"],
+                }, n_rows=len(detail))
 
             if total_alerts == 0:
                 st.markdown("""
                 <div class="status-banner status-ok">
                     <span class="status-icon">✅</span>
-                    <div><div class="status-text">NO SHRINKAGE RISK</div><div class="status-detail">All days within threshold. No planner alerts needed.</div></div>
+                    <div><div class="status-text">NO SHRINKAGE RISK</div><div class="status-detail">All site-days within threshold. No planner alerts needed.</div></div>
                 </div>""", unsafe_allow_html=True)
             else:
                 st.markdown(f"""
                 <div class="status-banner status-risk">
                     <span class="status-icon">🚨</span>
-                    <div><div class="status-text">{total_alerts} Days Over Threshold</div><div class="status-detail">Bot would notify planners to validate time-off and adjust staffing.</div></div>
+                    <div><div class="status-text">{total_alerts} Site-Days Over Threshold</div><div class="status-detail">Bot would notify planners to validate time-off and adjust staffing.</div></div>
                 </div>""", unsafe_allow_html=True)
 
             render_metric_row([
-                (f"{len(df):,}", "Days Checked", "info"),
-                (f"{total_alerts:,}", "Alert Days", "bad" if total_alerts else "ok"),
-                (f"{df['variance_pp'].max():.1f}pp", "Max Variance", "warn"),
-                (f"{df.iloc[-1]['actual_shrinkage_pct']:.1f}%", "Latest Actual", ""),
+                (f"{len(site_day):,}", "Site-Days Checked", "info"),
+                (f"{total_alerts:,}", "Alert Site-Days", "bad" if total_alerts else "ok"),
+                (f"{site_day['variance_pp'].max():.1f}pp", "Max Variance", "warn"),
+                (f"{nxt['risk_score']:.0f}/100", "Next-Day Risk (worst site)", "bad" if nxt["next_day_warning"] else "ok"),
             ])
 
+            if n_warn:
+                st.warning(
+                    f"Next-day warning: {n_warn} site(s) trend toward the threshold. Worst is **{nxt['site']}**, "
+                    f"projected **{nxt['next_day_pp']:+.1f}pp** tomorrow (EWMA {nxt['ewma_pp']:+.1f}pp, "
+                    f"trend {nxt['trend_pp']:+.2f}pp/day), driven by {nxt['driver_category']} "
+                    f"({nxt['driver_next_day_pp']:+.1f}pp). Bot would alert planners before the day starts."
+                )
+
             # Chart
             fig = go.Figure()
             fig.add_trace(go.Scatter(
@@ -1906,7 +2404,7 @@ elif page == "simulator":
                 name="Actual", line=dict(color="#ff5252", width=2),
                 fill="tonexty", fillcolor="rgba(255,82,82,0.06)"
             ))
-            fig.update_layout(title="Shrinkage: Planned vs Actual (14-Day Trend)", height=360)
+            fig.update_layout(title=f"Shrinkage: Planned vs Actual ({len(df)}-Day Trend)", height=360)
             plotly_theme(fig)
             st.plotly_chart(fig, use_container_width=True)
 
@@ -1914,38 +2412,155 @@ elif page == "simulator":
             var_colors = ["#ff5252" if v >= shrink_pp else "#00e676" for v in df["variance_pp"]]
             fig2 = go.Figure(go.Bar(
                 x=df["date"].astype(str), y=df["variance_pp"],
-                marker_color=var_colors
+                marker_color=var_colors, name="Variance"
+            ))
+            fig2.add_trace(go.Scatter(
+                x=df["date"].astype(str), y=df["var_ewma"],
+                name="EWMA trend", line=dict(color="#00e5ff", width=2)
             ))
             fig2.add_hline(y=shrink_pp, line_dash="dash", line_color="#ffd740",
                            annotation_text=f"Alert threshold ({shrink_pp}pp)")
-            fig2.update_layout(title="Daily Variance (pp)", height=300)
+            fig2.update_layout(title="Daily Variance (pp, site average)", height=300)
             plotly_theme(fig2)
             st.plotly_chart(fig2, use_container_width=True)
 
-            st.markdown('<div class="toggle-section-title"><span class="toggle-icon">📋</span> Full Trend Data</div>', unsafe_allow_html=True)
-            if st.checkbox("Show / Hide", value=False, key="chk_trend_data"):
-                st.dataframe(df, use_container_width=True)
+            # ── Category attribution ──
+            st.markdown("<div class='section-header'>🧩 Variance by Category</div>", unsafe_allow_html=True)
+            ch1, ch2 = st.columns(2, gap="medium")
+            with ch1:
+                fig3 = go.Figure()
+                for cat, grp in by_date.groupby("category", observed=True, sort=False):
+                    fig3.add_trace(go.Bar(x=grp["date"].astype(str), y=grp["variance_pp"], name=str(cat)))
+                fig3.update_layout(title="Daily Variance by Category (pp, site average)", barmode="relative", height=340)
+                plotly_theme(fig3)
+                st.plotly_chart(fig3, use_container_width=True)
 
-            st.markdown('<div class="toggle-section-title"><span class="toggle-icon">🚨</span> Alert Days</div>', unsafe_allow_html=True)
-            if st.checkbox("Show / Hide", value=False, key="chk_alert_days"):
-                if total_alerts:
-                    st.dataframe(alerts, use_container_width=True)
+            with ch2:
+                ranked = by_category.sort_values("variance_pp")
+                fig4 = go.Figure(go.Bar(
+                    x=ranked["variance_pp"], y=ranked["category"].astype(str), orientation="h",
+                    marker_color=["#ff5252" if v > 0 else "#00e676" for v in ranked["variance_pp"]],
+                    text=[f"{v:.0f}%" if v else "" for v in ranked["share_of_excess_pct"]], textposition="auto",
+                ))
+                fig4.update_layout(title="Variance per Site-Day by Category (pp; % of over-plan)", height=340)
+                plotly_theme(fig4)
+                st.plotly_chart(fig4, use_container_width=True)
+
+            site_total = by_site.groupby("site", observed=True)["variance_pp"].sum().sort_values(ascending=False)
+            worst = by_site[by_site["site"].isin(site_total.index[:15])]
+            heat = worst.pivot_table(index="site", columns="category", values="variance_pp", observed=True)
+            heat = heat.loc[[s_ for s_ in site_total.index[:15] if s_ in heat.index]]
+            fig5 = go.Figure(go.Heatmap(
+                z=heat.to_numpy(), x=[str(c) for c in heat.columns], y=[str(i) for i in heat.index],
+                colorscale="RdYlGn_r", zmid=0, colorbar=dict(title="pp"),
+            ))
+            fig5.update_layout(title=f"Variance by Site × Category (worst {len(heat)} of {len(site_total)} sites)",
+                               height=max(300, 40 + 24 * len(heat)))
+            plotly_theme(fig5)
+            st.plotly_chart(fig5, use_container_width=True)
+
+            def show_trend_data(df):
+                paged_dataframe(df, "pg_trend")
+            toggle_section("📋", "Full Trend Data", "chk_trend_data", show_trend_data, df)
+
+            def show_site_categories(by_site):
+                paged_dataframe(by_site, "pg_shrink_sites")
+            toggle_section("🧩", "Category Attribution (by site)", "chk_site_categories", show_site_categories, by_site)
+
+            def show_next_day(outlook):
+                paged_dataframe(outlook, "pg_shrink_next_day")
+            toggle_section("🔮", "Next-Day Risk by Site", "chk_next_day", show_next_day, outlook)
+
+            def show_alert_days(alerts):
+                if alerts.n_exceptions:
+                    paged_dataframe(alerts, "pg_shrink_alerts")
                     st.warning("Suggested: validate time-off, check unplanned AUX, adjust staffing/OT plan.")
                 else:
                     st.success("No shrinkage risk days based on your threshold.")
+            toggle_section("🚨", "Alert Site-Days", "chk_alert_days", show_alert_days, alerts)
 
             st.markdown("<div class='spacer'></div>", unsafe_allow_html=True)
             dl1, dl2 = st.columns(2)
             with dl1:
-                bytes_download_excel({"Shrinkage": df, "Alerts": alerts}, "wfm_rpa_shrinkage_simulator.xlsx")
+                bytes_download_excel({"Shrinkage": df, "By category": by_category, "By site": by_site,
+                                      "Next-day risk": outlook, "Alerts": exceptions_sheet(alerts)},
+                                     "wfm_rpa_shrinkage_simulator.xlsx")
             with dl2:
-                bytes_download_csv(alerts, "wfm_rpa_shrinkage_alerts.csv")
+                bytes_download_csv(alerts, "wfm_rpa_shrinkage_alerts.csv", export_columns(alerts))
+
+        # ── WFM REPORT BUILDER ──
+        else:
+            results = sim_result("results", make_site_results, n_sites=n_sites, periods=intervals, seed=seed)
+            shared = sim_result("shared", lambda: split_by_site(pack_frames(results)))
+
+            def build():
+                t0 = time.perf_counter()
+                # In-process only: forking a pool from the server is for the CLI / batch path.
+                manifest = build_packs(shared, workers=1)
+                return manifest, time.perf_counter() - t0
+            manifest, build_sec = sim_result("packs", build)
+            summary = sim_result("summary", lambda: pd.DataFrame([
+                {"site": site, **dict(site_kpis(sheets))} for site, sheets in shared.items()
+            ]))
+            if is_fresh:
+                log_add(logs, f"Built {len(manifest)} report packs in {build_sec:.2f}s")
+                record_bot_run(logs, bot, results["Intraday Health Check"], {
+                    "sites": len(manifest), "build_seconds": build_sec,
+                    "risk_intervals": results["Intraday Health Check"].n_exceptions,
+                }, n_rows=len(manifest))
+
+            st.markdown(f"""
+            <div class="status-banner status-ok">
+                <span class="status-icon">📋</span>
+                <div><div class="status-text">Report Pack Ready — {len(manifest)} Workbooks</div><div class="status-detail">One leadership workbook per site: KPI summary, narrative bullets, charts and exception sheets.</div></div>
+            </div>""", unsafe_allow_html=True)
+
+            render_metric_row([
+                (f"{len(manifest):,}", "Sites Packed", "info"),
+                (f"{sum(r.n_exceptions for r in results.values()):,}", "Exceptions Included", "warn"),
+                (f"{summary['Avg service level %'].mean():.1f}%", "Avg SL (All Sites)", ""),
+                (f"{build_sec:.2f}s", "Build Time", "ok"),
+            ])
+
+            fig = px.bar(summary.sort_values("Risk intervals", ascending=False), x="site", y="Risk intervals",
+                         color_discrete_sequence=["#ff5252"], title="Risk Intervals by Site")
+            plotly_theme(fig)
+            fig.update_layout(height=320)
+            st.plotly_chart(fig, use_container_width=True)
+
+            worst_site = summary.sort_values("Risk intervals", ascending=False)["site"].iloc[0]
+            st.markdown("<div class='section-header'>📝 Narrative Preview (worst site)</div>", unsafe_allow_html=True)
+            for line in narrative(worst_site, shared[worst_site]):
+                st.markdown(f"- {line}")
+
+            def show_site_summary(summary):
+                st.dataframe(summary, use_container_width=True, height=350)
+            toggle_section("📋", "Site KPI Summary", "chk_site_summary", show_site_summary, summary)
+
+            st.markdown("<div class='spacer'></div>", unsafe_allow_html=True)
+            st.download_button(
+                "📥  Download Report Pack (zip)",
+                data=lambda: zip_packs(manifest),
+                file_name="wfm_report_pack.zip",
+                mime="application/zip",
+                on_click="ignore",
+                use_container_width=True,
+            )
 
         # ── Bot Logs (all bots) ──
         st.markdown("<div class='spacer'></div>", unsafe_allow_html=True)
-        st.markdown('<div class="toggle-section-title"><span class="toggle-icon">📜</span> Bot Run Logs</div>', unsafe_allow_html=True)
-        if st.checkbox("Show / Hide", value=False, key="chk_bot_logs"):
+        def show_bot_logs():
             st.code("\n".join(st.session_state.logs[-60:]) if st.session_state.logs else "No logs yet.")
+        toggle_section("📜", "Bot Run Logs", "chk_bot_logs", show_bot_logs)
+
+        def show_run_history(bot):
+            hist_runs = get_run_history().runs(bot=bot, limit=50)
+            if len(hist_runs):
+                hist_runs["started_at"] = pd.to_datetime(hist_runs["started_at"], unit="s").dt.strftime("%Y-%m-%d %H:%M:%S")
+                st.dataframe(hist_runs.drop(columns=["params"]), use_container_width=True, height=300)
+            else:
+                st.info("No runs saved yet.")
+        toggle_section("🗂️", "Run History (this bot)", "chk_run_history", show_run_history, bot)
 
         st.markdown("""
         <div class="glass-card-accent" style="margin-top:16px;">
@@ -2102,3 +2717,10 @@ elif page == "glossary":
 
 # ── Footer ──
 st.markdown("<div class='footer'>WFM RPA Simulator — Built for learning. No real data is used or stored.</div>", unsafe_allow_html=True)
+
+# ── Perf panel ──
+if prof:
+    perf_record = prof.finish()
+    get_perf_history().add(perf_record)
+    if PERF_PANEL:
+        render_perf_panel(perf_record)
@@ -0,0 +1,193 @@
+# batch.py
+# Command-line batch runner: one bot over a directory / glob of input files (e.g. one intraday file
+# per site per drop), fanned out over a process pool. Each worker reads, evaluates and writes its own
+# file, so only a small per-file summary row travels back. Reports files/sec and per-file timings.
+# Inputs may also be SQL tables (sqlite:///path.db?table=name): the bot's threshold rules are pushed
+# down, so only candidate rows leave the database ("rows" in the summary counts those).
+# Run: python batch.py "drops/*.csv" --bot intraday-health --set sl_target=85 --out batch_out
+#      python batch.py "sqlite:///wfm.db?table=intraday" --bot intraday-health
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from bots import BOTS
+from connectors import is_sql_source, read_source, sqlite_source
+from export import write_csv
+from schema import compact
+
+INPUT_EXTS = (".csv", ".csv.gz", ".xlsx")
+CHUNKSIZE = 4              # files per task sent to a worker (amortizes IPC for small files)
+
+_SHARED = {}
+
+
+def read_input(path: str, bot: str = None, params: dict = None):
+    """One input as a compact frame; SQL sources fetch only `bot`'s candidate rows when it is given."""
+    if is_sql_source(path):
+        if bot is None:
+            return compact(read_source(path))
+        spec = BOTS[bot]
+        return compact(read_source(path, spec.name, {**spec.params, **(params or {})}))
+    if path.lower().endswith(".xlsx"):
+        return compact(pd.read_excel(path))
+    return compact(pd.read_csv(path))       # .csv.gz is decompressed by pandas
+
+
+def collect_inputs(patterns, recursive: bool = False):
+    """Input files from directories (their INPUT_EXTS files) and glob patterns, sorted, de-duplicated.
+    SQL sources pass through as given."""
+    files = set()
+    for pattern in patterns:
+        if is_sql_source(pattern):
+            files.add(pattern)
+            continue
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*") if recursive else os.path.join(pattern, "*")
+        files.update(p for p in glob.glob(pattern, recursive=recursive)
+                     if os.path.isfile(p) and p.lower().endswith(INPUT_EXTS))
+    return sorted(files)
+
+
+def output_name(path: str, root: str):
+    """Output stem unique within the batch: the path relative to the inputs' common root
+    (<database>__<table> for a SQL source)."""
+    if is_sql_source(path):
+        database, table = sqlite_source(path)
+        rel = f"{os.path.splitext(os.path.basename(database))[0]}__{table}"
+    else:
+        rel = os.path.relpath(path, root) if root else os.path.basename(path)
+    for ext in INPUT_EXTS:
+        if rel.lower().endswith(ext):
+            rel = rel[:-len(ext)]
+            break
+    return "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in rel.replace(os.sep, "__"))
+
+
+def _init_worker(shared):
+    _SHARED.clear()
+    _SHARED.update(shared)
+
+
+def run_file(path: str):
+    """Evaluate one file with the batch's bot; never raises (failures come back as a summary row)."""
+    spec, params = BOTS[_SHARED["bot"]], _SHARED["params"]
+    row = {"file": path, "status": "ok", "rows": 0, "exceptions": 0, "read_ms": 0.0, "run_ms": 0.0,
+           "write_ms": 0.0, "output": "", "error": ""}
+    t0 = time.perf_counter()
+    try:
+        df = read_input(path, _SHARED["bot"], params)
+        t1 = time.perf_counter()
+        result = spec(df, **params)
+        t2 = time.perf_counter()
+        out = os.path.join(_SHARED["out_dir"], output_name(path, _SHARED["root"]) + ".exceptions.csv"
+                           + (".gz" if _SHARED["compress"] else ""))
+        write_csv(result, out)
+        t3 = time.perf_counter()
+        row.update(rows=len(df), exceptions=result.n_exceptions, output=out, read_ms=(t1 - t0) * 1000,
+                   run_ms=(t2 - t1) * 1000, write_ms=(t3 - t2) * 1000)
+    except Exception as e:
+        row.update(status="failed", error=f"{type(e).__name__}: {e}")
+    row["total_ms"] = (time.perf_counter() - t0) * 1000
+    return row
+
+
+def run_batch(files, bot: str, params: dict, out_dir: str, workers: int = None, compress: bool = False,
+              progress=None):
+    """Run `bot` over `files`, writing <name>.exceptions.csv[.gz] per file plus batch_summary.csv and
+    batch_run.json to `out_dir`. workers=1 runs in-process. Returns (per-file summary frame, run info)."""
+    if bot not in BOTS:
+        raise ValueError(f"Unknown bot {bot!r}; choose from {', '.join(BOTS)}")
+    os.makedirs(out_dir, exist_ok=True)
+    local = [f for f in files if not is_sql_source(f)]
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in local]) if local else ""
+    shared = {"bot": bot, "params": params, "out_dir": out_dir, "root": root, "compress": compress}
+    files = [f if is_sql_source(f) else os.path.abspath(f) for f in files]
+    workers = workers or min(len(files), os.cpu_count() or 1) or 1
+    t0 = time.perf_counter()
+    rows = []
+
+    def collect(it):
+        for row in it:
+            rows.append(row)
+            if progress:
+                progress(len(rows), len(files), time.perf_counter() - t0)
+
+    if workers == 1 or len(files) <= 1:
+        _init_worker(shared)
+        collect(map(run_file, files))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared,)) as pool:
+            collect(pool.map(run_file, files, chunksize=CHUNKSIZE))
+    seconds = time.perf_counter() - t0
+
+    summary = pd.DataFrame(rows, columns=["file", "status", "rows", "exceptions", "read_ms", "run_ms",
+                                          "write_ms", "total_ms", "output", "error"])
+    summary[["read_ms", "run_ms", "write_ms", "total_ms"]] = summary[["read_ms", "run_ms", "write_ms", "total_ms"]].round(2)
+    summary.to_csv(os.path.join(out_dir, "batch_summary.csv"), index=False)
+    info = {
+        "bot": BOTS[bot].name, "params": {**BOTS[bot].params, **params}, "workers": workers,
+        "files": len(files), "failed": int((summary["status"] != "ok").sum()),
+        "rows": int(summary["rows"].sum()), "exceptions": int(summary["exceptions"].sum()),
+        "seconds": round(seconds, 3), "files_per_sec": round(len(files) / seconds, 1) if seconds else None,
+    }
+    with open(os.path.join(out_dir, "batch_run.json"), "w", encoding="utf-8") as fh:
+        json.dump(info, fh, indent=2)
+    return summary, info
+
+
+def parse_params(pairs):
+    """['sl_target=85', ...] -> {'sl_target': 85.0}"""
+    params = {}
+    for pair in pairs or []:
+        name, sep, value = pair.partition("=")
+        if not sep:
+            raise ValueError(f"Expected name=value, got {pair!r}")
+        params[name.strip()] = float(value)
+    return params
+
+
+def _progress(done, total, seconds):
+    if done == total or done % max(1, total // 20) == 0:
+        print(f"  {done:,}/{total:,} files  {done / seconds if seconds else 0:,.1f} files/s", file=sys.stderr)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run one WFM bot over many input files in parallel")
+    ap.add_argument("inputs", nargs="+",
+                    help="files, directories, glob patterns (quote globs) or sqlite:///path.db?table=name")
+    ap.add_argument("--bot", required=True, choices=sorted(BOTS))
+    ap.add_argument("--set", dest="params", action="append", metavar="NAME=VALUE",
+                    help="threshold override, repeatable (see each bot's thresholds in bots.BOTS)")
+    ap.add_argument("--out", default="batch_out", help="output directory")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU; 1 = in-process)")
+    ap.add_argument("--gzip", action="store_true", help="write .exceptions.csv.gz")
+    ap.add_argument("--recursive", action="store_true", help="descend into sub-directories / ** globs")
+    args = ap.parse_args(argv)
+
+    files = collect_inputs(args.inputs, args.recursive)
+    if not files:
+        ap.error("no input files matched")
+    summary, info = run_batch(files, args.bot, parse_params(args.params), args.out, args.workers,
+                              args.gzip, progress=_progress)
+    print(f"{info['bot']}: {info['files']:,} files, {info['exceptions']:,} exceptions, {info['failed']} failed "
+          f"in {info['seconds']:.1f}s ({info['files_per_sec']} files/s, {info['workers']} workers)")
+    ok = summary[summary["status"] == "ok"]
+    if len(ok):
+        t = ok["total_ms"]
+        print(f"per file: median {t.median():.1f} ms, p95 {t.quantile(0.95):.1f} ms, max {t.max():.1f} ms")
+        for _, r in ok.nlargest(5, "total_ms").iterrows():
+            print(f"  {r['total_ms']:8.1f} ms  {r['file']}")
+    for _, r in summary[summary["status"] != "ok"].head(20).iterrows():
+        print(f"  FAILED {r['file']}: {r['error']}", file=sys.stderr)
+    return 1 if info["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
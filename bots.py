@@ -0,0 +1,169 @@
+# bots.py
+# Rule engines for the simulator bots. Each bot returns a BotResult: the base frame plus the
+# row positions of its exceptions, so tables/charts/exports project columns only when needed.
+
+import numpy as np
+import pandas as pd
+
+from schema import DRIVER_HINTS, FLAG_ASA, FLAG_MISS, FLAG_SL, FLAG_STAFFING, RISK_FLAGS, set_flags
+from shrinkage import is_detail, site_day_frame
+
+
+class BotResult:
+    """Base frame + ordered exception positions (+ per-exception extra columns like priority)."""
+
+    def __init__(self, frame: pd.DataFrame, index, extras=None):
+        self.frame = frame
+        self.index = np.asarray(index, dtype=np.intp)
+        self.extras = extras or {}   # name -> array aligned with self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def n_exceptions(self):
+        return len(self.index)
+
+    @property
+    def columns(self):
+        return list(self.frame.columns) + [c for c in self.extras if c not in self.frame.columns]
+
+    def column(self, name: str):
+        """Exception values of one column as a numpy array (no frame is built)."""
+        if name in self.extras:
+            return np.asarray(self.extras[name])
+        return self.frame[name].to_numpy()[self.index]
+
+    def exceptions(self, columns=None, limit: int = None):
+        """Materialize exception rows for the requested columns only."""
+        idx = self.index if limit is None else self.index[:limit]
+        labels = self.frame.index[idx]
+        out = {}
+        for c in (columns or self.columns):
+            if c in self.extras:
+                out[c] = pd.Series(np.asarray(self.extras[c])[:len(idx)], index=labels, name=c)
+            else:
+                out[c] = self.frame[c].take(idx)
+        return pd.DataFrame(out, index=labels)
+
+    def subset(self, mask):
+        """Narrow to the exceptions where `mask` (aligned with self.index) is True."""
+        mask = np.asarray(mask, dtype=bool)
+        return BotResult(self.frame, self.index[mask], {k: np.asarray(v)[mask] for k, v in self.extras.items()})
+
+    def base(self, columns=None):
+        """Base frame, optionally projected (a column selection, not a row copy)."""
+        return self.frame if columns is None else self.frame[columns]
+
+
+def _order(columns, ascending):
+    """Positions that sort rows by several keys (np.lexsort wants the primary key last)."""
+    keys = [np.asarray(c, dtype=float) if asc else -np.asarray(c, dtype=float)
+            for c, asc in zip(columns, ascending)]
+    return np.lexsort(keys[::-1])
+
+
+def run_intraday_health(df: pd.DataFrame, sl_target, asa_limit, gap_limit):
+    staffing = df["staffing_gap"].to_numpy() <= -gap_limit
+    sl = df["service_level_est_pct"].to_numpy() < sl_target
+    asa = df["asa_sec_est"].to_numpy() > asa_limit
+    set_flags(df, RISK_FLAGS, staffing * FLAG_STAFFING | sl * FLAG_SL | asa * FLAG_ASA)
+
+    idx = np.flatnonzero(staffing | sl | asa)
+    priority = (staffing[idx].astype(np.int8) * 3 + sl[idx].astype(np.int8) * 2 + asa[idx].astype(np.int8))
+    order = _order(
+        [priority, df["service_level_est_pct"].to_numpy()[idx], df["staffing_gap"].to_numpy()[idx]],
+        [False, True, True],
+    )
+    idx = idx[order]
+    # flags travel unpacked with the exceptions only (tables, alert dedupe); the frame keeps the bits
+    return BotResult(df, idx, {"priority": priority[order], "flag_staffing": staffing[idx],
+                               "flag_sl": sl[idx], "flag_asa": asa[idx]})
+
+
+def run_variance(df: pd.DataFrame, sl_target, asa_limit):
+    vol_fcst = df["volume_fcst"].to_numpy(dtype=float)
+    needed = df["needed_staff"].to_numpy(dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vol_var = np.where(vol_fcst > 0, (df["volume_act"].to_numpy() - vol_fcst) / vol_fcst * 100, 0.0)
+        gap_pct = np.where(needed > 0, (df["actual_staff"].to_numpy() - needed) / needed * 100, 0.0)
+    df["vol_var_pct"] = vol_var.round(1).astype(np.float32)
+    df["gap_pct"] = gap_pct.round(1).astype(np.float32)
+    driver = ((np.abs(df["vol_var_pct"].to_numpy()) >= 8) * 1 + (df["aht_sec"].to_numpy() >= 480) * 2 +
+              (df["staffing_gap"].to_numpy() <= -5) * 4)
+    df["top_driver_hint"] = pd.Categorical.from_codes(driver, categories=DRIVER_HINTS)
+    miss = (df["service_level_est_pct"].to_numpy() < sl_target) | (df["asa_sec_est"].to_numpy() > asa_limit)
+    set_flags(df, FLAG_MISS, miss * FLAG_MISS)
+
+    idx = np.flatnonzero(miss)
+    order = _order(
+        [df["service_level_est_pct"].to_numpy()[idx], df["asa_sec_est"].to_numpy()[idx]],
+        [True, False],
+    )
+    return BotResult(df, idx[order])
+
+
+def run_adherence(df: pd.DataFrame, adh_target, ooa_limit):
+    df["is_alert"] = (df["adherence_pct"] < adh_target) & (df["out_of_adherence_minutes"] >= ooa_limit)
+    return BotResult(df, np.flatnonzero(df["is_alert"].to_numpy()))
+
+
+def run_shrinkage(df: pd.DataFrame, shrink_pp):
+    if is_detail(df):                 # site × day × category -> site-days tagged with their top category
+        df = site_day_frame(df)
+    df["is_alert"] = df["variance_pp"] >= shrink_pp
+    return BotResult(df, np.flatnonzero(df["is_alert"].to_numpy()))
+
+
+class BotSpec:
+    """A bot as run outside the UI: its rule function, thresholds (name -> default, as in the app's
+    Run Settings), the input columns the rules read and how its alerts are fingerprinted
+    (FingerprintStore.filter_result kwargs)."""
+
+    def __init__(self, name: str, slug: str, run, params: dict, inputs, dedupe: dict = None):
+        self.name = name
+        self.slug = slug
+        self.run = run
+        self.params = params
+        self.inputs = list(inputs)
+        self.dedupe = dedupe or {}
+
+    def missing(self, columns):
+        return [c for c in self.inputs if c not in columns]
+
+    def __call__(self, df: pd.DataFrame, **params):
+        unknown = sorted(set(params) - set(self.params))
+        if unknown:
+            raise ValueError(f"{self.name}: unknown threshold(s) {', '.join(unknown)}")
+        missing = self.missing(df.columns)
+        if missing:
+            raise ValueError(f"{self.name}: input is missing column(s) {', '.join(missing)}")
+        return self.run(df, **{**self.params, **{k: float(v) for k, v in params.items()}})
+
+
+BOTS = {spec.slug: spec for spec in (
+    BotSpec("Intraday Health Check", "intraday-health", run_intraday_health,
+            {"sl_target": 80, "asa_limit": 60, "gap_limit": 5},
+            ["staffing_gap", "service_level_est_pct", "asa_sec_est"],
+            dict(key_cols=["interval_start"], flag_cols=["flag_staffing", "flag_sl", "flag_asa"],
+                 priority_col="priority", severity_col="staffing_gap")),
+    BotSpec("Forecast vs Actual Variance", "variance", run_variance,
+            {"sl_target": 80, "asa_limit": 60},
+            ["volume_fcst", "volume_act", "aht_sec", "needed_staff", "actual_staff", "staffing_gap",
+             "service_level_est_pct", "asa_sec_est"],
+            dict(key_cols=["interval_start"], severity_col="service_level_est_pct")),
+    BotSpec("Adherence Sweep", "adherence", run_adherence,
+            {"adh_target": 85, "ooa_limit": 30},
+            ["adherence_pct", "out_of_adherence_minutes"],
+            dict(key_cols=["agent_id"], severity_col="adherence_pct")),
+    BotSpec("Shrinkage Watch", "shrinkage", run_shrinkage,
+            {"shrink_pp": 2},
+            ["variance_pp"],
+            dict(key_cols=["site", "date"], severity_col="variance_pp", lower_is_worse=False)),
+)}
+
+
+def detect_bots(columns):
+    """Bots whose required inputs are all in `columns` (one export can feed several bots)."""
+    columns = set(columns)
+    return [spec for spec in BOTS.values() if not spec.missing(columns)]
@@ -0,0 +1,174 @@
+# connectors.py
+# SQL data connector for the bots: pooled DB-API connections, parameterized queries and pushdown of
+# the simple bot threshold rules, so only candidate rows and the needed columns leave the database.
+# SQLite stands in locally; any DB-API driver with "?" or "%s" placeholders plugs in via `connect`.
+# batch.py reads `sqlite:///path.db?table=name` inputs through `read_source`.
+
+import os
+import queue
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from shrinkage import is_detail
+
+OPS = {"<", "<=", ">", ">=", "=", "!="}
+_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _ident(name: str):
+    """Quote a table/column name after checking it is a plain identifier (never interpolate input)."""
+    if not _IDENT.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return f'"{name}"'
+
+
+class Predicate:
+    """column <op> value, rendered with a bound parameter."""
+
+    __slots__ = ("column", "op", "value")
+
+    def __init__(self, column: str, op: str, value):
+        if op not in OPS:
+            raise ValueError(f"Unsupported operator: {op!r}")
+        self.column = column
+        self.op = op
+        self.value = value.item() if isinstance(value, np.generic) else value   # sqlite3 cannot bind numpy scalars
+
+    def sql(self, placeholder: str):
+        return f"{_ident(self.column)} {self.op} {placeholder}"
+
+    def __repr__(self):
+        return f"{self.column} {self.op} {self.value!r}"
+
+
+# Pushdown specs: bot -> (thresholds -> (predicates, "OR"/"AND")). Same rules as bots.py.
+BOT_PUSHDOWN = {
+    "Intraday Health Check": lambda t: ([
+        Predicate("staffing_gap", "<=", -t.get("gap_limit", 5)),
+        Predicate("service_level_est_pct", "<", t.get("sl_target", 80)),
+        Predicate("asa_sec_est", ">", t.get("asa_limit", 60)),
+    ], "OR"),
+    "Forecast vs Actual Variance": lambda t: ([
+        Predicate("service_level_est_pct", "<", t.get("sl_target", 80)),
+        Predicate("asa_sec_est", ">", t.get("asa_limit", 60)),
+    ], "OR"),
+    "Adherence Sweep": lambda t: ([
+        Predicate("adherence_pct", "<", t.get("adh_target", 85)),
+        Predicate("out_of_adherence_minutes", ">=", t.get("ooa_limit", 30)),
+    ], "AND"),
+    "Shrinkage Watch": lambda t: ([
+        Predicate("variance_pp", ">=", t.get("shrink_pp", 2)),
+    ], "AND"),
+}
+
+
+class SqlConnector:
+    """Fixed-size connection pool over a DB-API `connect` callable (sqlite3 by default)."""
+
+    def __init__(self, database: str, pool_size: int = 4, connect=None, placeholder: str = "?", **connect_kwargs):
+        self.placeholder = placeholder
+        self._connect = connect or (lambda: sqlite3.connect(database, check_same_thread=False, **connect_kwargs))
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._created = 0
+        self._size = pool_size
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self, timeout: float = 30.0):
+        conn = None
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._created < self._size:
+                    conn = self._connect()
+                    self._created += 1
+            if conn is None:
+                conn = self._pool.get(timeout=timeout)
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def query(self, sql: str, params=()):
+        with self.connection() as conn:
+            return pd.read_sql_query(sql, conn, params=list(params))
+
+    def fetch(self, table: str, columns=None, where=(), combine: str = "AND", limit: int = None):
+        """SELECT only `columns` from `table` where the predicates hold (joined by AND/OR)."""
+        if combine not in ("AND", "OR"):
+            raise ValueError("combine must be 'AND' or 'OR'")
+        cols = ", ".join(_ident(c) for c in columns) if columns else "*"
+        sql = f"SELECT {cols} FROM {_ident(table)}"
+        params = []
+        if where:
+            sql += " WHERE " + f" {combine} ".join(f"({p.sql(self.placeholder)})" for p in where)
+            params = [p.value for p in where]
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return self.query(sql, params)
+
+    def fetch_candidates(self, bot: str, table: str, thresholds: dict = None, columns=None):
+        """Rows that can possibly be exceptions for `bot`, with threshold rules pushed down."""
+        predicates, combine = BOT_PUSHDOWN[bot](thresholds or {})
+        if columns:
+            columns = list(dict.fromkeys(list(columns) + [p.column for p in predicates]))
+        return self.fetch(table, columns=columns, where=predicates, combine=combine)
+
+    def count(self, table: str, where=(), combine: str = "AND"):
+        sql = f"SELECT COUNT(*) AS n FROM {_ident(table)}"
+        params = []
+        if where:
+            sql += " WHERE " + f" {combine} ".join(f"({p.sql(self.placeholder)})" for p in where)
+            params = [p.value for p in where]
+        return int(self.query(sql, params)["n"].iloc[0])
+
+    def load(self, df: pd.DataFrame, table: str, index_cols=(), if_exists: str = "replace"):
+        """Write a frame (local stand-in data) and index the columns the bots filter on."""
+        with self.connection() as conn:
+            df.to_sql(table, conn, if_exists=if_exists, index=False, chunksize=10000)
+            for col in index_cols:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {_ident(f'ix_{table}_{col}')} "
+                             f"ON {_ident(table)}({_ident(col)})")
+            conn.commit()
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def is_sql_source(path: str):
+    return path.startswith("sqlite:")
+
+
+def sqlite_source(url: str):
+    """'sqlite:///relative.db?table=name' or 'sqlite:////abs/path.db?table=name' -> (database, table)."""
+    parts = urlsplit(url)
+    tables = parse_qs(parts.query).get("table")
+    if parts.scheme != "sqlite" or not parts.path.startswith("/") or not tables:
+        raise ValueError(f"Expected sqlite:///path.db?table=name, got {url!r}")
+    return parts.path[1:], tables[0]
+
+
+def read_source(url: str, bot: str = None, thresholds: dict = None, columns=None):
+    """Rows of a SQL table source. With `bot` (a BOT_PUSHDOWN name) only its candidate rows are read;
+    a shrinkage detail table is read whole, since its rule applies after the site-day roll-up."""
+    database, table = sqlite_source(url)
+    if not os.path.isfile(database):
+        raise FileNotFoundError(database)           # sqlite3.connect would create an empty one
+    conn = SqlConnector(database, pool_size=1)
+    try:
+        if bot in BOT_PUSHDOWN and not is_detail(conn.fetch(table, columns=columns, limit=0)):
+            return conn.fetch_candidates(bot, table, thresholds, columns)
+        return conn.fetch(table, columns=columns)
+    finally:
+        conn.close()
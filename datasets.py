@@ -0,0 +1,145 @@
+# datasets.py
+# Dummy WFM inputs for the bots (intraday intervals, agent adherence, daily shrinkage per center or per
+# site × day × category), seeded so the Streamlit app, the HTTP API and batch runs all see the same
+# scenario for the same seed.
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from intervals import build_intervals
+from schema import compact
+
+
+def make_intervals(start_dt: datetime, periods: int = 48, minutes: int = 30, tz: str = None):
+    days = -(-periods * minutes // (24 * 60))
+    return build_intervals(start_dt, days=days, minutes=minutes, tz=tz)[["interval_start", "interval_label"]].iloc[:periods]
+
+
+def make_dummy_intraday(periods=48, seed=42, volume_fcst=None):
+    """One day of dummy intervals; `periods` per day sets the granularity (24/48/96/288 -> 60/30/15/5 min)."""
+    np.random.seed(seed)
+    minutes = (24 * 60) // periods
+    vol_scale = minutes / 30            # dummy volumes are calibrated per 30-min interval
+    base = make_intervals(datetime.now().replace(hour=0, minute=0, second=0, microsecond=0),
+                          periods=periods, minutes=minutes)
+    hour = base["interval_start"].dt.hour + base["interval_start"].dt.minute / 60
+    curve = 0.6 * np.exp(-((hour - 12) / 4.2) ** 2) + 0.5 * np.exp(-((hour - 19) / 3.5) ** 2) + 0.25
+    noise = np.random.normal(0, 35, size=periods)
+    if volume_fcst is None:
+        volume_fcst = ((curve * 800 + noise) * vol_scale).clip(50 * vol_scale).round()
+    else:
+        volume_fcst = pd.Series(np.asarray(volume_fcst, dtype=float), index=base.index).clip(50 * vol_scale).round()
+    aht_sec = (np.random.normal(420, 35, size=periods)).clip(240, 650).round()
+    workload_sec = (volume_fcst * aht_sec).astype(int)
+    shrink = (np.random.normal(0.28, 0.04, size=periods)).clip(0.15, 0.45)
+    base_needed = (workload_sec / (minutes * 60))
+    needed_staff = (base_needed / (1 - shrink)).clip(1).round().astype(int)
+    volume_act = (volume_fcst * np.random.normal(1.0, 0.06, size=periods) + np.random.normal(0, 18, size=periods) * vol_scale).clip(20 * vol_scale).round()
+    staff_act = (needed_staff * np.random.normal(0.98, 0.07, size=periods) + np.random.normal(0, 2.0, size=periods)).clip(0).round().astype(int)
+    asa, sl = service_estimates(needed_staff, staff_act)
+    df = pd.DataFrame({
+        "interval_start": base["interval_start"],
+        "interval_label": base["interval_label"],
+        "volume_fcst": volume_fcst.astype(int),
+        "volume_act": volume_act.astype(int),
+        "aht_sec": aht_sec.astype(int),
+        "shrinkage": (shrink * 100).round(1),
+        "needed_staff": needed_staff,
+        "actual_staff": staff_act,
+        "staffing_gap": (staff_act - needed_staff).astype(int),
+        "asa_sec_est": asa,
+        "service_level_est_pct": sl,
+    })
+    return compact(df)
+
+
+def service_estimates(needed_staff: pd.Series, staff_act: pd.Series):
+    """Dummy ASA / SL estimates from the staffing gap (draws from the global numpy seed)."""
+    periods = len(needed_staff)
+    gap = staff_act - needed_staff
+    asa = (np.maximum(10, 25 + (-gap.clip(upper=0)) * 18 + np.random.normal(0, 6, size=periods))).round().astype(int)
+    sl = (np.clip(0.92 + (gap / needed_staff.replace(0, 1)) * 0.35 - (asa / 300) * 0.25 + np.random.normal(0, 0.03, size=periods), 0.05, 0.99) * 100).round(1)
+    return asa, sl
+
+
+def make_dummy_adherence(n_agents=120, seed=42):
+    np.random.seed(seed)
+    agents = [f"A{str(i).zfill(4)}" for i in range(1, n_agents + 1)]
+    tenure = np.random.choice(["New", "Mid", "Tenured"], size=n_agents, p=[0.30, 0.45, 0.25])
+    sched_min = np.random.choice([240, 300, 360, 420, 480], size=n_agents, p=[0.05, 0.10, 0.30, 0.30, 0.25])
+    base = np.where(tenure == "Tenured", 0.92, np.where(tenure == "Mid", 0.88, 0.83))
+    adher = np.clip(base + np.random.normal(0, 0.05, size=n_agents), 0.55, 0.98)
+    out = (sched_min * (1 - adher)).round().astype(int)
+    df = pd.DataFrame({
+        "agent_id": agents,
+        "tenure_band": tenure,
+        "scheduled_minutes": sched_min,
+        "adherence_pct": (adher * 100).round(1),
+        "out_of_adherence_minutes": out,
+    })
+    reasons = ["Late In", "Extended Break", "Meeting Overrun", "System Issue", "Unplanned Aux", "Training Overrun"]
+    df["top_reason"] = np.where(df["adherence_pct"] < 85, np.random.choice(reasons, size=n_agents), "OK")
+    return df.sort_values(["adherence_pct", "out_of_adherence_minutes"], ascending=[True, False])
+
+
+def make_dummy_shrinkage(days=14, seed=42):
+    np.random.seed(seed)
+    dates = [datetime.now().date() - timedelta(days=i) for i in range(days)][::-1]
+    planned = np.clip(np.random.normal(0.30, 0.02, size=days), 0.22, 0.38)
+    actual = np.clip(planned + np.random.normal(0.01, 0.02, size=days), 0.18, 0.45)
+    df = pd.DataFrame({
+        "date": dates,
+        "planned_shrinkage_pct": (planned * 100).round(1),
+        "actual_shrinkage_pct": (actual * 100).round(1),
+        "variance_pp": ((actual - planned) * 100).round(1),
+    })
+    return df
+
+
+# category -> (planned % of scheduled time, planned day-to-day sd, actual - planned bias pp, actual noise pp)
+SHRINK_CATEGORIES = {
+    "PTO": (9.0, 1.2, -0.4, 1.0),
+    "Sick": (3.5, 0.3, 0.6, 1.2),
+    "Training": (3.0, 0.8, -0.3, 0.7),
+    "Meetings": (2.5, 0.4, 0.3, 0.5),
+    "Unplanned aux": (2.0, 0.2, 0.8, 0.8),
+    "Coaching": (1.5, 0.3, 0.1, 0.4),
+    "Projects": (1.2, 0.4, -0.1, 0.4),
+    "Breaks overrun": (0.6, 0.1, 0.3, 0.3),
+    "System downtime": (0.4, 0.1, 0.2, 0.5),
+    "Other": (0.5, 0.1, 0.0, 0.3),
+}
+
+
+def make_dummy_shrinkage_detail(n_sites=6, days=14, seed=42, n_categories=5):
+    """Daily planned / actual shrinkage (% of scheduled time) per site × day × category, long format
+    with categorical site and category keys. Sick leave peaks on Mondays; each site drifts on its own
+    in unplanned aux."""
+    np.random.seed(seed)
+    cats = list(SHRINK_CATEGORIES)[:n_categories]
+    prof = np.array([SHRINK_CATEGORIES[c] for c in cats], dtype=np.float32)
+    dates = pd.date_range(end=datetime.now().date(), periods=days, freq="D")
+    shape = (n_sites, days, len(cats))
+    site_level = np.random.normal(1.0, 0.12, size=(n_sites, 1, len(cats)))
+    planned = np.clip(prof[:, 0] * site_level + np.random.normal(0, 1, size=shape) * prof[:, 1], 0, None)
+    bias = prof[:, 2] + np.random.normal(0, 0.3, size=(n_sites, 1, len(cats)))
+    actual = planned + bias + np.random.normal(0, 1, size=shape) * prof[:, 3]
+    if "Sick" in cats:
+        actual[:, dates.weekday == 0, cats.index("Sick")] += 1.2
+    if "Unplanned aux" in cats:
+        drift = np.random.normal(0, 1.0, size=(n_sites, 1)) * np.linspace(0, 1, days)
+        actual[:, :, cats.index("Unplanned aux")] += drift
+    planned = planned.round(2).astype(np.float32)
+    actual = np.clip(actual, 0, None).round(2).astype(np.float32)
+    n = n_sites * days * len(cats)
+    return pd.DataFrame({
+        "site": pd.Categorical.from_codes(np.repeat(np.arange(n_sites), days * len(cats)),
+                                          [f"Site {i:02d}" for i in range(1, n_sites + 1)]),
+        "date": np.tile(np.repeat(dates.values, len(cats)), n_sites),
+        "category": pd.Categorical.from_codes(np.tile(np.arange(len(cats)), n_sites * days), cats),
+        "planned_pct": planned.reshape(n),
+        "actual_pct": actual.reshape(n),
+        "variance_pp": (actual - planned).reshape(n).round(2),
+    })
@@ -0,0 +1,82 @@
+# export.py
+# Streaming CSV export: frames (or BotResult exceptions) are encoded in row chunks, optionally through
+# gzip, straight into a file. Peak memory is one chunk of text instead of the whole CSV string + its
+# bytes copy. Downloads (which Streamlit takes as bytes) are joined from the same encoded chunks.
+
+import gzip
+import io
+import os
+
+import numpy as np
+
+CHUNK_ROWS = 50_000
+GZIP_LEVEL = 6
+
+
+def _chunks(source, columns=None, chunk_rows: int = CHUNK_ROWS):
+    """Row-chunk frames of a DataFrame or of a BotResult's exceptions (built one chunk at a time)."""
+    if hasattr(source, "exceptions"):
+        cols = columns or source.columns
+        for i in range(0, max(len(source), 1), chunk_rows):
+            part = slice(i, i + chunk_rows)
+            extras = {k: np.asarray(v)[part] for k, v in source.extras.items()}
+            yield type(source)(source.frame, source.index[part], extras).exceptions(cols)
+        return
+    frame = source if columns is None else source[columns]
+    for i in range(0, max(len(frame), 1), chunk_rows):
+        yield frame.iloc[i:i + chunk_rows]
+
+
+def iter_csv(source, columns=None, chunk_rows: int = CHUNK_ROWS, encoding: str = "utf-8"):
+    """Encoded CSV blocks; the header comes with the first block only."""
+    for n, chunk in enumerate(_chunks(source, columns, chunk_rows)):
+        yield chunk.to_csv(index=False, header=n == 0).encode(encoding)
+
+
+def _compress(target, compress):
+    if compress is None and isinstance(target, (str, os.PathLike)):
+        compress = "gzip" if os.fspath(target).endswith(".gz") else None
+    if compress not in (None, "gzip"):
+        raise ValueError(f"Unsupported compression: {compress!r}")
+    return compress
+
+
+def write_csv(source, target, columns=None, compress=None, chunk_rows: int = CHUNK_ROWS):
+    """Stream CSV to a path (atomic: temp file + rename; '.gz' implies gzip) or a binary file object.
+    Returns {"rows", "bytes"} where bytes is the uncompressed CSV size."""
+    compress = _compress(target, compress)
+    if isinstance(target, (str, os.PathLike)):
+        path = os.fspath(target)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "wb") as fh:
+                stats = write_csv(source, fh, columns, compress, chunk_rows)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return stats
+
+    out = gzip.GzipFile(fileobj=target, mode="wb", compresslevel=GZIP_LEVEL, mtime=0) if compress else target
+    rows = size = 0
+    try:
+        for n, chunk in enumerate(_chunks(source, columns, chunk_rows)):
+            block = chunk.to_csv(index=False, header=n == 0).encode("utf-8")
+            out.write(block)
+            rows += len(chunk)
+            size += len(block)
+    finally:
+        if compress:
+            out.close()             # flushes the gzip trailer; leaves `target` open
+    return {"rows": rows, "bytes": size}
+
+
+def csv_bytes(source, columns=None, compress=None, chunk_rows: int = CHUNK_ROWS) -> bytes:
+    """The whole CSV as bytes (gzip if asked), for download buttons: st.download_button accepts
+    str/bytes/file-like-with-read only, not a spooled temp file."""
+    if _compress(None, compress) is None:
+        return b"".join(iter_csv(source, columns, chunk_rows))
+    buf = io.BytesIO()
+    write_csv(source, buf, columns, "gzip", chunk_rows)
+    return buf.getvalue()
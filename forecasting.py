@@ -0,0 +1,156 @@
+# forecasting.py
+# Multi-queue volume forecasting engine (intraday x day-of-week profiles + Holt-Winters daily level/trend).
+# Every step works on (queues, days, slots) numpy arrays, so hundreds of queues fit in one pass.
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+ALPHA = 0.30   # level smoothing
+BETA = 0.05    # trend smoothing
+GAMMA = 0.15   # day-of-week seasonal smoothing
+
+
+class ForecastModel:
+    """Fitted state for a batch of queues; arrays are indexed [queue, ...]."""
+
+    def __init__(self, queues, start_date, minutes, level, trend, dow_factor, profile):
+        self.queues = list(queues)
+        self.start_date = start_date      # first day of the next (unseen) day
+        self.minutes = minutes
+        self.level = level                # (Q,)   deseasonalized daily volume
+        self.trend = trend                # (Q,)   daily change in level
+        self.dow_factor = dow_factor      # (Q, 7) multiplicative day-of-week factors (Mon=0)
+        self.profile = profile            # (Q, 7, P) intraday share of the day per slot
+
+    @property
+    def slots_per_day(self):
+        return self.profile.shape[2]
+
+    def predict(self, days: int = 1):
+        """Interval forecast as a (Q, days * P) array, starting at `start_date` 00:00."""
+        h = np.arange(1, days + 1)
+        dows = (self.start_date.weekday() + h - 1) % 7
+        totals = (self.level[:, None] + h[None, :] * self.trend[:, None]) * self.dow_factor[:, dows]
+        totals = totals.clip(0)
+        cube = totals[:, :, None] * self.profile[:, dows, :]
+        return cube.reshape(len(self.queues), -1)
+
+
+def fit(history: np.ndarray, first_date, queues=None, minutes: int = 30,
+        alpha: float = ALPHA, beta: float = BETA, gamma: float = GAMMA):
+    """Fit every queue at once. `history` is (Q, D, P) volumes with NaN for missing intervals."""
+    hist = np.asarray(history, dtype=float)
+    n_q, n_d, n_p = hist.shape
+    if n_d < 7:
+        raise ValueError("Need at least 7 days of history to fit day-of-week profiles")
+    queues = list(queues) if queues is not None else list(range(n_q))
+    dows = (first_date.weekday() + np.arange(n_d)) % 7
+
+    daily = np.nansum(hist, axis=2)                                       # (Q, D)
+    daily[np.isnan(hist).all(axis=2)] = np.nan                            # a day with no data is missing, not zero
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = hist / daily[:, :, None]
+
+    # Intraday profile and starting day-of-week factors: one masked mean per weekday, not per queue.
+    profile = np.empty((n_q, 7, n_p))
+    dow_factor = np.ones((n_q, 7))
+    overall = _nanmean(daily, axis=1, keepdims=True)
+    overall[~(overall > 0)] = 1.0
+    flat = np.full(n_p, 1.0 / n_p)
+    for k in range(7):
+        sel = dows == k
+        if not sel.any():
+            profile[:, k, :] = flat
+            continue
+        with np.errstate(invalid="ignore"):
+            prof = _nanmean(share[:, sel, :], axis=1)
+            fac = _nanmean(daily[:, sel], axis=1) / overall[:, 0]
+        profile[:, k, :] = np.where(np.isnan(prof), flat, prof)
+        dow_factor[:, k] = np.where(np.isnan(fac), 1.0, fac)
+    profile /= profile.sum(axis=2, keepdims=True)
+    dow_factor = _normalize(dow_factor)
+
+    # Holt-Winters (multiplicative weekday season): the loop runs over days, every queue per step.
+    rows = np.arange(n_q)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        deseason = daily / dow_factor[rows[:, None], dows[None, :]]
+        deseason[~np.isfinite(deseason)] = np.nan
+        level = _nanmean(deseason[:, :7], axis=1)
+        level = np.where(np.isnan(level), _nanmean(deseason, axis=1), level)   # first week all missing
+    level = np.nan_to_num(level)                                                # no usable day at all
+    trend = np.zeros(n_q)
+    season = dow_factor.copy()
+    for d in range(n_d):
+        k = dows[d]
+        y = daily[:, d]
+        s = season[:, k]
+        seen = ~np.isnan(y) & (s > 0)     # missing days (and closed weekdays) only roll the level forward
+        prev = level
+        with np.errstate(invalid="ignore", divide="ignore"):
+            level = np.where(seen, alpha * (y / s) + (1 - alpha) * (level + trend), level + trend)
+            trend = np.where(seen, beta * (level - prev) + (1 - beta) * trend, trend)
+            ratio = np.where(level > 0, y / level, s)
+        season[:, k] = np.where(seen, gamma * ratio + (1 - gamma) * s, s)
+    season = _normalize(season)
+
+    next_day = first_date + timedelta(days=n_d)
+    return ForecastModel(queues, next_day, minutes, level, trend, season, profile)
+
+
+def _nanmean(a: np.ndarray, axis: int, keepdims: bool = False):
+    """np.nanmean without the empty-slice warning: all-NaN slices come back NaN."""
+    n = (~np.isnan(a)).sum(axis=axis, keepdims=keepdims)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 0, np.nansum(a, axis=axis, keepdims=keepdims) / n, np.nan)
+
+
+def _normalize(factors: np.ndarray):
+    """Scale each queue's weekday factors to mean 1; a queue with no volume at all gets flat 1.0."""
+    mean = factors.mean(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(mean > 0, factors / mean, 1.0)
+
+
+def history_cube(df: pd.DataFrame, minutes: int = 30, value_col: str = "volume_act"):
+    """Long (queue, interval_start, value) frame -> ((Q, D, P) array, first_date, queues)."""
+    ts = pd.to_datetime(df["interval_start"])
+    q_codes, queues = pd.factorize(df["queue"], sort=True)
+    day0 = ts.min().normalize()
+    day_idx = ((ts.dt.normalize() - day0).dt.days).to_numpy()
+    slot_idx = ((ts.dt.hour * 60 + ts.dt.minute) // minutes).to_numpy()
+    n_p = (24 * 60) // minutes
+    cube = np.full((len(queues), day_idx.max() + 1, n_p), np.nan)
+    cube[q_codes, day_idx, slot_idx] = df[value_col].to_numpy(dtype=float)
+    return cube, day0.to_pydatetime(), list(queues)
+
+
+def forecast_frame(model: ForecastModel, days: int = 1):
+    """Long forecast frame (queue, interval_start, interval_label, volume_fcst) for the next `days`."""
+    fc = model.predict(days)
+    n_q, n_i = fc.shape
+    starts = pd.date_range(model.start_date, periods=n_i, freq=f"{model.minutes}min")
+    return pd.DataFrame({
+        "queue": np.repeat(model.queues, n_i),
+        "interval_start": np.tile(starts, n_q),
+        "interval_label": np.tile(starts.strftime("%H:%M"), n_q),
+        "volume_fcst": fc.ravel().round().astype(int),
+    })
+
+
+def make_dummy_volume_history(n_queues: int = 1, days: int = 56, periods: int = 48, seed: int = 42,
+                              end_date=None):
+    """Dummy (Q, D, P) volume history ending yesterday, with weekday shape, trend and noise."""
+    rng = np.random.default_rng(seed)
+    end_date = end_date or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    first_date = end_date - timedelta(days=days)
+    hour = np.arange(periods) * (24 / periods)
+    curve = 0.6 * np.exp(-((hour - 12) / 4.2) ** 2) + 0.5 * np.exp(-((hour - 19) / 3.5) ** 2) + 0.25
+    scale = rng.uniform(0.5, 1.5, size=(n_queues, 1, 1)) * 800 * 48 / periods   # ~800 at a 30-min peak
+    dows = (first_date.weekday() + np.arange(days)) % 7
+    week = np.array([1.10, 1.05, 1.0, 1.0, 0.97, 0.80, 0.70])[dows][None, :, None]
+    growth = (1 + rng.normal(0.001, 0.002, size=(n_queues, 1, 1)) * np.arange(days)[None, :, None])
+    noise = rng.normal(1.0, 0.06, size=(n_queues, days, periods))
+    hist = (scale * curve[None, None, :] * week * growth * noise).clip(0).round()
+    return hist, first_date
@@ -0,0 +1,251 @@
+# interval_cache.py
+# On-disk columnar cache of recent interval history: one .npy file per column per day, opened with
+# mmap so bots read weeks of context without parsing CSV/SQL. String columns are dictionary-encoded.
+#
+# Layout:  <root>/<partition>/<YYYY-MM-DD>/<column>.npy   +   <root>/<partition>/schema.json
+# Writers (append / prune) hold <root>/<partition>/.lock, so several processes can share a cache.
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:           # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+import pandas as pd
+
+TIME_COL = "interval_start"
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Exclusive lock on `path` across processes (created if missing), held for the with-block."""
+    with open(path, "a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        else:
+            fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:       # LK_LOCK gives up after ~10 s; keep waiting
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class IntervalCache:
+    """Append-by-day, read-by-mmap cache for interval frames (one partition per queue/site/feed)."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.lock = threading.RLock()     # day swaps vs. readers of the same instance (app threads)
+        os.makedirs(root, exist_ok=True)
+
+    @contextmanager
+    def _writing(self, partition):
+        """This instance's lock + the partition's lock file: one load-merge-write at a time, even
+        across processes, so no writer's schema categories or day rows are lost."""
+        base = os.path.join(self.root, partition)
+        os.makedirs(base, exist_ok=True)
+        with self.lock, _file_lock(os.path.join(base, ".lock")):
+            yield
+
+    # ── schema ──
+    def _schema_path(self, partition):
+        return os.path.join(self.root, partition, "schema.json")
+
+    def schema(self, partition: str):
+        path = self._schema_path(partition)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def _save_schema(self, partition, schema):
+        path = self._schema_path(partition)
+        fd, tmp = tempfile.mkstemp(prefix=".schema-", dir=os.path.dirname(path))
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(schema, fh)
+        os.replace(tmp, path)
+
+    def _encode(self, schema, name, series: pd.Series):
+        """Column -> numpy array; object/categorical columns become int32 codes into schema categories,
+        tz-aware timestamps are stored as UTC datetime64[ns] with the zone kept in the schema.
+        A column already in the schema keeps its kind; missing values (rows from a day that lacked the
+        column) are code -1 in dict columns and widen integer/bool columns to float64 from then on."""
+        spec = schema.get(name)
+        if spec is None:
+            if isinstance(series.dtype, pd.DatetimeTZDtype):
+                spec = {"kind": "plain", "dtype": "datetime64[ns]", "tz": str(series.dt.tz)}
+            elif (isinstance(series.dtype, pd.CategoricalDtype) or series.dtype == object
+                  or pd.api.types.is_string_dtype(series)):
+                spec = {"kind": "dict", "categories": []}
+            else:
+                dtype = series.to_numpy().dtype
+                spec = {"kind": "plain", "dtype": "datetime64[ns]" if dtype.kind == "M" else str(dtype)}
+            schema[name] = spec
+        if spec.get("tz"):
+            return series.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy().astype("datetime64[ns]")
+        if spec["kind"] == "dict":
+            cats = spec["categories"]
+            lookup = {c: i for i, c in enumerate(cats)}
+            present = series.notna().to_numpy()
+            values = series[present].astype(str).to_numpy()
+            for u in pd.unique(values):
+                if u not in lookup:
+                    lookup[u] = len(cats)
+                    cats.append(u)
+            codes = np.full(len(series), -1, dtype=np.int32)
+            codes[present] = pd.Series(values).map(lookup).to_numpy(dtype=np.int32)
+            return codes
+        if np.dtype(spec["dtype"]).kind in "biu" and series.hasnans:
+            spec["dtype"] = "float64"     # each day's .npy keeps its own dtype, so older days still read
+            return series.to_numpy(dtype="float64", na_value=np.nan)
+        arr = series.to_numpy()
+        if np.issubdtype(arr.dtype, np.datetime64):
+            arr = arr.astype("datetime64[ns]")
+        return arr.astype(spec["dtype"], copy=False)
+
+    # ── write path ──
+    def days(self, partition: str):
+        base = os.path.join(self.root, partition)
+        if not os.path.isdir(base):
+            return []
+        return sorted(d for d in os.listdir(base) if not d.startswith(".") and os.path.isdir(os.path.join(base, d)))
+
+    def append(self, df: pd.DataFrame, partition: str = "default"):
+        """Append new intervals; each touched day is rewritten atomically (old rows + new rows) from a
+        private temp dir, so concurrent writers never share scratch files."""
+        if not len(df):
+            return 0
+        with self._writing(partition):
+            return self._append(df, partition)
+
+    def _append(self, df, partition):
+        schema = self.schema(partition)          # re-read under the lock: another process may have grown it
+        for col in df.columns:
+            if col not in schema:
+                self._encode(schema, col, df[col])    # new columns take their kind/dtype from the new rows
+        day_keys = pd.to_datetime(df[TIME_COL]).dt.strftime("%Y-%m-%d")
+        for day, part in df.groupby(day_keys.to_numpy(), sort=True):
+            day_dir = os.path.join(self.root, partition, day)
+            if os.path.isdir(day_dir):
+                old = self._day_frame(partition, day, schema)     # the stored day's own columns
+                part = pd.concat([old, part], ignore_index=True)  # columns only one side has are NaN on the other
+                part = part.drop_duplicates(subset=[TIME_COL], keep="last").sort_values(TIME_COL)
+            base = os.path.join(self.root, partition)
+            tmp_dir = tempfile.mkdtemp(prefix=f".{day}-", dir=base)
+            for col in part.columns:
+                np.save(os.path.join(tmp_dir, f"{col}.npy"), self._encode(schema, col, part[col]))
+            old_dir = None
+            if os.path.isdir(day_dir):
+                old_dir = tempfile.mkdtemp(prefix=f".{day}-old-", dir=base)
+                os.replace(day_dir, os.path.join(old_dir, day))   # moved aside, not deleted, until the swap
+            os.replace(tmp_dir, day_dir)
+            if old_dir:
+                shutil.rmtree(old_dir)
+        self._save_schema(partition, schema)
+        return len(df)
+
+    def prune(self, partition: str, keep_days: int = 56, today=None):
+        """Drop day folders older than the retention window."""
+        today = today or datetime.now()
+        cutoff = (today - timedelta(days=keep_days)).strftime("%Y-%m-%d")
+        if not os.path.isdir(os.path.join(self.root, partition)):
+            return []
+        with self._writing(partition):
+            dropped = [d for d in self.days(partition) if d < cutoff]
+            for d in dropped:
+                shutil.rmtree(os.path.join(self.root, partition, d))
+        return dropped
+
+    # ── read path (zero-copy) ──
+    def open_day(self, partition: str, day: str, columns=None):
+        """{column: read-only memmap} for one day; nothing is copied until you slice into memory."""
+        day_dir = os.path.join(self.root, partition, day)
+        with self.lock:
+            names = columns or [f[:-4] for f in sorted(os.listdir(day_dir)) if f.endswith(".npy")]
+            return {c: np.load(os.path.join(day_dir, f"{c}.npy"), mmap_mode="r") for c in names}
+
+    def window(self, partition: str, days: int = 56, end=None, columns=None):
+        """Memmapped columns for the trailing `days` days before `end` (exclusive), oldest first."""
+        end_key = (end or datetime.now()).strftime("%Y-%m-%d")
+        start_key = ((end or datetime.now()) - timedelta(days=days)).strftime("%Y-%m-%d")
+        picked = [d for d in self.days(partition) if start_key <= d < end_key]
+        return CachedWindow(self, partition, picked, columns)
+
+    def _day_frame(self, partition, day, schema, columns=None):
+        cols = self.open_day(partition, day, columns)
+        return pd.DataFrame({c: decode(schema.get(c), a) for c, a in cols.items()})
+
+
+class CachedWindow:
+    """Trailing history view: per-day memmaps, concatenated only when a caller asks for a frame."""
+
+    def __init__(self, cache: IntervalCache, partition: str, days, columns=None):
+        self.cache = cache
+        self.partition = partition
+        self.days = list(days)
+        self.schema = cache.schema(partition)
+        self.maps = [cache.open_day(partition, d, columns) for d in self.days]
+
+    def __len__(self):
+        return sum(len(next(iter(m.values()))) for m in self.maps if m)
+
+    def column(self, name: str):
+        """One column across the window (a single copy of just that column)."""
+        if not self.maps:
+            return np.empty(0)
+        return np.concatenate([m[name] for m in self.maps])
+
+    def to_frame(self, columns=None):
+        names = columns or (list(self.maps[0]) if self.maps else [])
+        return pd.DataFrame({c: decode(self.schema.get(c), self.column(c)) for c in names})
+
+    def slot_baseline(self, value_col: str, minutes: int = 30, by_weekday: bool = True):
+        """Mean of `value_col` per (weekday, slot) over the window -> array (7, slots) or (slots,)."""
+        n_slots = (24 * 60) // minutes
+        if not self.maps:
+            return np.full((7, n_slots) if by_weekday else n_slots, np.nan)
+        ts = self.column(TIME_COL)
+        if (self.schema.get(TIME_COL) or {}).get("tz"):
+            ts = decode(self.schema[TIME_COL], ts).tz_localize(None).to_numpy()    # slots in site-local time
+        ts = ts.astype("datetime64[m]").astype(np.int64)
+        slot = (ts % (24 * 60)) // minutes
+        vals = self.column(value_col).astype(float)
+        if by_weekday:
+            dow = ((ts // (24 * 60)) + 3) % 7    # 1970-01-01 was a Thursday (Mon=0)
+            key = dow * n_slots + slot
+            size = 7 * n_slots
+        else:
+            key, size = slot, n_slots
+        sums = np.bincount(key, weights=vals, minlength=size)
+        counts = np.bincount(key, minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = sums / counts
+        return mean.reshape(7, n_slots) if by_weekday else mean
+
+
+def decode(spec, arr):
+    """Undo dictionary encoding for one column (plain columns pass through untouched)."""
+    if spec and spec.get("kind") == "dict":
+        return pd.Categorical.from_codes(np.asarray(arr), categories=spec["categories"])
+    if spec and spec.get("tz"):
+        return pd.DatetimeIndex(np.asarray(arr)).tz_localize("UTC").tz_convert(spec["tz"])
+    return arr
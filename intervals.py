@@ -0,0 +1,74 @@
+# intervals.py
+# Vectorized interval index builder: 5/15/30/60-minute grids for one or many queues, in site-local
+# time with DST handled by the timezone database, and labels taken from a cached lookup table.
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+GRANULARITIES = (5, 15, 30, 60)
+
+
+@lru_cache(maxsize=None)
+def label_table(minutes: int = 30):
+    """'HH:MM' label for every slot of a day (built once per granularity)."""
+    if minutes not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {minutes} min (use one of {GRANULARITIES})")
+    mins = np.arange(0, 24 * 60, minutes)
+    return pd.Index([f"{m // 60:02d}:{m % 60:02d}" for m in mins])
+
+
+def slot_of(ts, minutes: int = 30):
+    """Slot number within the (local) day for a datetime Series/Index."""
+    ts = pd.DatetimeIndex(ts)
+    return (ts.hour * 60 + ts.minute) // minutes
+
+
+def labels_for(ts, minutes: int = 30):
+    """Categorical 'HH:MM' labels for timestamps: integer codes into `label_table`, no strftime."""
+    return pd.Categorical.from_codes(np.asarray(slot_of(ts, minutes)), categories=label_table(minutes))
+
+
+def build_intervals(start, days: int = 1, minutes: int = 30, tz: str = None, queues=None):
+    """Interval grid covering `days` local days from the local midnight of `start`.
+
+    With `tz`, timestamps are site-local and tz-aware: a spring-forward day has fewer intervals
+    and a fall-back day more, and `interval_start_utc` is always strictly increasing.
+    With `queues`, the grid is repeated per queue (queue column is categorical).
+    """
+    if minutes not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {minutes} min (use one of {GRANULARITIES})")
+    start = pd.Timestamp(start)
+    if start.tzinfo is not None:
+        start = start.tz_convert(tz).tz_localize(None) if tz is not None else start.tz_localize(None)
+    day0 = start.normalize()
+    end = day0 + pd.Timedelta(days=days)
+    if tz is not None:
+        # local midnights -> UTC, then a fixed-step UTC range: DST days come out 23h / 25h long
+        day0, end = (t.tz_localize(tz, ambiguous=False, nonexistent="shift_forward") for t in (day0, end))
+        utc = pd.date_range(day0.tz_convert("UTC"), end.tz_convert("UTC"), freq=f"{minutes}min", inclusive="left")
+        local = utc.tz_convert(tz)
+    else:
+        local = pd.date_range(day0, end, freq=f"{minutes}min", inclusive="left")
+        utc = None
+
+    n = len(local)
+    codes = np.asarray(slot_of(local, minutes))
+    if queues is None:
+        out = {"interval_start": local, "interval_label": labels_for(local, minutes), "slot": codes.astype(np.int16)}
+        if utc is not None:
+            out["interval_start_utc"] = utc
+        return pd.DataFrame(out)
+
+    queues = pd.Index(queues)
+    rep = np.tile(np.arange(n), len(queues))          # positions into the one-day grid, per queue
+    out = {
+        "queue": pd.Categorical.from_codes(np.repeat(np.arange(len(queues)), n), categories=queues),
+        "interval_start": local.take(rep),
+        "interval_label": pd.Categorical.from_codes(codes[rep], categories=label_table(minutes)),
+        "slot": codes.astype(np.int16)[rep],
+    }
+    if utc is not None:
+        out["interval_start_utc"] = utc.take(rep)
+    return pd.DataFrame(out)
@@ -0,0 +1,109 @@
+# paging.py
+# Server-side table paging: the full frame stays in the Python process and only the visible page is
+# materialized for the browser. Sort orders and filter masks are computed once per (column, query)
+# and cached, so flipping pages is a slice of a precomputed position array (O(page size)).
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from schema import widen
+
+_OP = re.compile(r"^\s*(>=|<=|!=|=|>|<)\s*(.*)$")
+
+
+class PagedTable:
+    """A frame (optionally a row subset in a given order, plus extra aligned columns) served by pages."""
+
+    def __init__(self, frame: pd.DataFrame, rows=None, extras=None, columns=None):
+        self.frame = frame
+        self.rows = np.arange(len(frame)) if rows is None else np.asarray(rows, dtype=np.intp)
+        self.extras = {k: np.asarray(v) for k, v in (extras or {}).items()}
+        cols = list(frame.columns) + [c for c in self.extras if c not in frame.columns]
+        self.columns = [c for c in columns if c in cols] if columns else cols
+        self._orders = {}
+        self._masks = {}
+        self._views = {}
+
+    @classmethod
+    def from_result(cls, result, columns=None):
+        """Page over a BotResult's exceptions in bot (priority) order without materializing them."""
+        return cls(result.frame, result.index, result.extras, columns)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def values(self, name: str):
+        if name in self.extras:
+            return self.extras[name]
+        return self.frame[name].array.take(self.rows)      # keeps categoricals as codes
+
+    def order(self, by: str = None, ascending: bool = True):
+        """Positions (into self.rows) sorted by one column; cached per (column, direction)."""
+        if by is None:
+            return np.arange(len(self.rows))
+        key = (by, ascending)
+        if key not in self._orders:
+            s = pd.Series(self.values(by))
+            self._orders[key] = s.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+        return self._orders[key]
+
+    def mask(self, column: str = None, query: str = ""):
+        """Boolean filter over self.rows: '>=5', '<80', '!=x', '=x', or a case-insensitive substring."""
+        query = (query or "").strip()
+        if column is None or not query:
+            return None
+        key = (column, query)
+        if key not in self._masks:
+            self._masks[key] = _match(self.values(column), query)
+        return self._masks[key]
+
+    def view(self, by=None, ascending=True, column=None, query=""):
+        """Sorted + filtered positions; the one O(n) step, cached until the sort or filter changes."""
+        key = (by, ascending, column, (query or "").strip())
+        if key not in self._views:
+            order = self.order(by, ascending)
+            mask = self.mask(column, query)
+            self._views = {key: order if mask is None else order[mask[order]]}   # keep only the latest view
+        return self._views[key]
+
+    def page(self, positions, page: int = 0, size: int = 50):
+        """Materialize one page (only these rows and the table's columns are copied)."""
+        pos = positions[page * size:(page + 1) * size]
+        rows = self.rows[pos]
+        labels = self.frame.index[rows]
+        out = {}
+        for c in self.columns:
+            if c in self.extras:
+                out[c] = pd.Series(self.extras[c][pos], index=labels, name=c)
+            else:
+                out[c] = self.frame[c].take(rows)
+        return widen(pd.DataFrame(out, index=labels))
+
+
+def _match(values, query: str):
+    m = _OP.match(query)
+    op, rhs = (m.group(1), m.group(2).strip()) if m else (None, query)
+    s = pd.Series(values)
+    if isinstance(s.dtype, pd.CategoricalDtype):         # match the categories once, then map codes
+        hit = _match(s.cat.categories, query)
+        codes = s.cat.codes.to_numpy()
+        return np.where(codes >= 0, hit[codes], False)
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        try:
+            x = float(rhs)
+        except ValueError:
+            return s.astype(str).str.contains(rhs, case=False, regex=False).to_numpy()
+        v = s.to_numpy(dtype=float)
+        return {
+            ">=": v >= x, "<=": v <= x, ">": v > x, "<": v < x, "!=": v != x, "=": v == x, None: v == x,
+        }[op]
+    text = s.astype(str)
+    if op == "=":
+        return (text.str.lower() == rhs.lower()).to_numpy()
+    if op == "!=":
+        return (text.str.lower() != rhs.lower()).to_numpy()
+    if op is not None:                                  # ordering ops on text compare lexically
+        return {">=": text >= rhs, "<=": text <= rhs, ">": text > rhs, "<": text < rhs}[op].to_numpy()
+    return text.str.contains(rhs, case=False, regex=False).to_numpy()
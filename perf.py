@@ -0,0 +1,169 @@
+# perf.py
+# Per-rerun profiling for the Streamlit app (opt-in developer panel: ?perf=1). A RerunProfile splits
+# one script run into exclusive time buckets — top-level phases (CSS injection, page body, footer) with
+# timed categories (data generation, rule evaluation, figure building, table/chart serialization,
+# exports) carved out of them, so the buckets add up to the rerun — and counts the bytes of every
+# message the run sends to the browser, by element type and by bucket. Finished reruns go into a
+# process-wide rolling history per page, so regressions show up across sessions, not just one.
+
+import functools
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+HISTORY_RUNS = 200        # finished reruns kept per page
+
+
+class RerunProfile:
+    """Timings and payload bytes of one script run."""
+
+    def __init__(self, page: str):
+        self.page = page
+        self.t0 = self._mark = time.perf_counter()
+        self.ms = {}              # bucket -> exclusive ms
+        self.bytes = {}           # bucket -> payload bytes
+        self.elements = {}        # element type -> [messages, bytes]
+        self._phase = "Setup"
+        self._stack = []          # open timed categories, innermost last
+
+    def _bucket(self):
+        return self._stack[-1] if self._stack else self._phase
+
+    def _switch(self):
+        now = time.perf_counter()
+        bucket = self._bucket()
+        self.ms[bucket] = self.ms.get(bucket, 0.0) + (now - self._mark) * 1000
+        self._mark = now
+
+    def phase(self, name: str):
+        """Start the next top-level phase; time since the last switch goes to the previous one."""
+        self._switch()
+        self._phase = name
+
+    def timed(self, category: str, fn):
+        """`fn` with its calls (minus nested timed calls) counted under `category`."""
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            self._switch()
+            self._stack.append(category)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._switch()
+                self._stack.pop()
+        return wrapper
+
+    def on_message(self, msg):
+        """Count one outgoing ForwardMsg (as sent: a cached element arrives as a small reference)."""
+        size = msg.ByteSize()
+        kind = msg.WhichOneof("type")
+        if kind == "delta":
+            kind = msg.delta.WhichOneof("type")
+            if kind == "new_element":
+                kind = msg.delta.new_element.WhichOneof("type")
+        elif kind == "ref_hash":
+            kind = "cached element (ref)"
+        rec = self.elements.setdefault(kind, [0, 0])
+        rec[0] += 1
+        rec[1] += size
+        bucket = self._bucket()
+        self.bytes[bucket] = self.bytes.get(bucket, 0) + size
+
+    def finish(self):
+        """Close the run; returns its history record."""
+        self._switch()
+        attach(None)
+        return {
+            "ts": time.time(), "page": self.page, "total_ms": (self._mark - self.t0) * 1000,
+            "payload_bytes": sum(self.bytes.values()), "ms": dict(self.ms), "bytes": dict(self.bytes),
+            "elements": {k: tuple(v) for k, v in self.elements.items()},
+        }
+
+
+class Instrumented:
+    """Stand-in for a module (st, px, go) whose listed callables are timed by a profile.
+    `categories` is {attribute: category}, or one category for every callable attribute."""
+
+    def __init__(self, target, profile: RerunProfile, categories):
+        self._target = target
+        self._profile = profile
+        self._categories = categories
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        cat = self._categories.get(name) if isinstance(self._categories, dict) else self._categories
+        return self._profile.timed(cat, attr) if cat and callable(attr) else attr
+
+
+def attach(profile):
+    """Route this session's outgoing messages through `profile` (None = stop). Safe to call again
+    after a rerun that was cut short (st.rerun) without finishing its profile."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    send = getattr(ctx._enqueue, "_perf_send", ctx._enqueue)
+    if profile is None:
+        ctx._enqueue = send
+        return
+
+    def enqueue(msg):
+        profile.on_message(msg)
+        send(msg)
+
+    enqueue._perf_send = send
+    ctx._enqueue = enqueue
+
+
+class PerfHistory:
+    """Rolling per-page history of finished reruns, shared by all sessions of the server process."""
+
+    def __init__(self, maxlen: int = HISTORY_RUNS):
+        self.maxlen = maxlen
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def add(self, record: dict):
+        with self._lock:
+            self._runs.setdefault(record["page"], deque(maxlen=self.maxlen)).append(record)
+
+    def runs(self, page: str):
+        with self._lock:
+            return list(self._runs.get(page, ()))
+
+    def summary(self):
+        """One row per page: runs kept, latency percentiles and median payload."""
+        rows = []
+        with self._lock:
+            pages = {p: list(r) for p, r in self._runs.items()}
+        for page, runs in sorted(pages.items()):
+            ms = np.array([r["total_ms"] for r in runs])
+            rows.append({
+                "page": page, "runs": len(runs), "last_ms": round(ms[-1], 1),
+                "p50_ms": round(float(np.percentile(ms, 50)), 1), "p95_ms": round(float(np.percentile(ms, 95)), 1),
+                "max_ms": round(float(ms.max()), 1),
+                "median_kb": round(float(np.median([r["payload_bytes"] for r in runs])) / 1024, 1),
+            })
+        return pd.DataFrame(rows, columns=["page", "runs", "last_ms", "p50_ms", "p95_ms", "max_ms", "median_kb"])
+
+
+def breakdown(record: dict):
+    """Buckets of one rerun: ms, share of the rerun, payload KB — slowest first."""
+    buckets = set(record["ms"]) | set(record["bytes"])
+    df = pd.DataFrame({
+        "section": sorted(buckets),
+        "ms": [round(record["ms"].get(b, 0.0), 1) for b in sorted(buckets)],
+        "payload_kb": [round(record["bytes"].get(b, 0) / 1024, 1) for b in sorted(buckets)],
+    })
+    df.insert(2, "share_pct", (100 * df["ms"] / max(record["total_ms"], 1e-9)).round(1))
+    return df.sort_values("ms", ascending=False, ignore_index=True)
+
+
+def element_bytes(record: dict):
+    """Messages and payload KB per element type, largest first."""
+    df = pd.DataFrame([(k, n, round(b / 1024, 1)) for k, (n, b) in record["elements"].items()],
+                      columns=["element", "messages", "payload_kb"])
+    return df.sort_values("payload_kb", ascending=False, ignore_index=True)
@@ -0,0 +1,92 @@
+# reforecast.py
+# Intraday re-forecast: as each interval closes, fold its actual vs forecast volume into a smoothed
+# ratio per queue and rescale the rest of the day's forecast (and needed staff) by it.
+# State is a handful of (Q,) arrays, so closing an interval for hundreds of queues is one vector op.
+
+import numpy as np
+import pandas as pd
+
+ALPHA = 0.35              # EWMA weight of the newest closed interval
+PRIOR_INTERVALS = 4       # ratio is shrunk toward 1.0 until roughly this many intervals have closed
+RATIO_BOUNDS = (0.5, 2.0)
+
+
+class IntradayReforecast:
+    """Per-queue re-forecast for one day. Arrays are (Q, P) (or (P,) for a single queue)."""
+
+    def __init__(self, volume_fcst, aht_sec=None, shrinkage=None, minutes: int = 30,
+                 alpha: float = ALPHA, prior: int = PRIOR_INTERVALS):
+        self.fcst = np.atleast_2d(np.asarray(volume_fcst, dtype=float))
+        shape = self.fcst.shape
+        self.aht = np.broadcast_to(np.atleast_2d(np.asarray(420.0 if aht_sec is None else aht_sec, dtype=float)), shape)
+        self.shrink = np.broadcast_to(np.atleast_2d(np.asarray(0.0 if shrinkage is None else shrinkage, dtype=float)), shape)
+        self.minutes = minutes
+        self.alpha = alpha
+        self.prior = prior
+        self.closed = 0
+        self.s_act = np.zeros(shape[0])
+        self.s_fcst = np.zeros(shape[0])
+
+    @property
+    def n_queues(self):
+        return self.fcst.shape[0]
+
+    def close(self, actual):
+        """Fold in the actual volume (Q,) of the next interval to close."""
+        t = self.closed
+        if t >= self.fcst.shape[1]:
+            raise ValueError("All intervals of the day are already closed")
+        act = np.asarray(actual, dtype=float).reshape(-1)
+        fc = self.fcst[:, t]
+        if t == 0:
+            self.s_act, self.s_fcst = act.copy(), fc.copy()
+        else:
+            self.s_act += self.alpha * (act - self.s_act)
+            self.s_fcst += self.alpha * (fc - self.s_fcst)
+        self.closed += 1
+        return self
+
+    def close_many(self, actuals):
+        """Close several intervals at once; `actuals` is (Q, k) in interval order."""
+        for col in np.atleast_2d(np.asarray(actuals, dtype=float)).T:
+            self.close(col)
+        return self
+
+    @property
+    def ratio(self):
+        """Smoothed actual / forecast per queue (1.0 until data arrives, bounded, shrunk early on)."""
+        if not self.closed:
+            return np.ones(self.n_queues)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            raw = np.where(self.s_fcst > 0, self.s_act / self.s_fcst, 1.0)
+        raw = np.clip(raw, *RATIO_BOUNDS)
+        w = self.closed / (self.closed + self.prior)
+        return 1.0 + w * (raw - 1.0)
+
+    def remaining_volume(self):
+        """(Q, P - closed) re-forecast volume for the intervals still to come."""
+        return self.fcst[:, self.closed:] * self.ratio[:, None]
+
+    def remaining_needed(self):
+        """(Q, P - closed) needed staff recomputed from the re-forecast volume."""
+        workload = self.remaining_volume() * self.aht[:, self.closed:] / (self.minutes * 60)
+        return np.clip(np.round(workload / (1 - self.shrink[:, self.closed:])), 1, None)
+
+
+def reforecast_frame(df: pd.DataFrame, closed: int, minutes: int = 30, alpha: float = ALPHA,
+                     prior: int = PRIOR_INTERVALS):
+    """Single-queue intraday frame -> copy with re-forecast columns for the intervals after `closed`
+    (closed intervals keep their actuals). Expects volume_fcst/volume_act/aht_sec/shrinkage(%)/actual_staff."""
+    rf = IntradayReforecast(df["volume_fcst"].to_numpy(), df["aht_sec"].to_numpy(),
+                            df["shrinkage"].to_numpy() / 100, minutes=minutes, alpha=alpha, prior=prior)
+    rf.close_many(df["volume_act"].to_numpy()[:closed][None, :])
+    out = df.copy()
+    vol = df["volume_act"].to_numpy(dtype=float).copy()
+    need = df["needed_staff"].to_numpy(dtype=float).copy()
+    vol[closed:] = rf.remaining_volume()[0].round()
+    need[closed:] = rf.remaining_needed()[0]
+    out["is_closed"] = np.arange(len(df)) < closed
+    out["volume_reforecast"] = vol.astype(int)
+    out["needed_staff_reforecast"] = need.astype(int)
+    out["staffing_gap_reforecast"] = (df["actual_staff"].to_numpy() - need).astype(int)
+    return out, float(rf.ratio[0])
@@ -0,0 +1,200 @@
+# report_pack.py
+# WFM Report Builder: one leadership workbook per site/LOB (KPI summary, narrative bullets, data +
+# exception sheets, native Excel charts), rendered in a process pool from frames computed once.
+
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import pandas as pd
+from openpyxl.chart import BarChart, LineChart, Reference
+
+from schema import expand_flags, widen
+
+# sheet name -> (bot, kind); kind "data" = bot input/base frame, "exc" = exceptions
+PACK_SHEETS = {
+    "Intraday": ("Intraday Health Check", "data"),
+    "Intraday Exceptions": ("Intraday Health Check", "exc"),
+    "Variance": ("Forecast vs Actual Variance", "data"),
+    "Variance Misses": ("Forecast vs Actual Variance", "exc"),
+    "Adherence": ("Adherence Sweep", "data"),
+    "Adherence Alerts": ("Adherence Sweep", "exc"),
+    "Shrinkage": ("Shrinkage Watch", "data"),
+    "Shrinkage Alerts": ("Shrinkage Watch", "exc"),
+}
+
+_FLAGS = {"Intraday": ["flag_staffing", "flag_sl", "flag_asa"], "Variance": ["is_miss"]}   # unpacked for readers
+
+_SHARED = {}   # per worker process: site -> {sheet: frame}, set once by the pool initializer
+
+
+def pack_frames(results: dict):
+    """{bot: BotResult} -> {sheet: frame}; the bots' computed frames are reused, not recomputed."""
+    frames = {}
+    for sheet, (bot, kind) in PACK_SHEETS.items():
+        res = results.get(bot)
+        if res is not None:
+            frames[sheet] = expand_flags(res.frame, _FLAGS.get(sheet)) if kind == "data" else res.exceptions()
+    return frames
+
+
+def split_by_site(frames: dict, site_col: str = "site"):
+    """{sheet: frame with a site column} -> {site: {sheet: frame}} with one groupby per sheet."""
+    shared = {}
+    for sheet, df in frames.items():
+        if df is None:
+            continue
+        for site, part in df.groupby(site_col, sort=True, observed=True):
+            shared.setdefault(site, {})[sheet] = part.drop(columns=[site_col])
+    for site in shared:
+        for sheet, df in frames.items():
+            if df is not None and sheet not in shared[site]:
+                shared[site][sheet] = df.head(0).drop(columns=[site_col])
+    return shared
+
+
+def site_kpis(sheets: dict):
+    """Summary rows (KPI, value) for one site's pack (plain Python floats: a float32 mean would reach
+    Excel as 79.300003)."""
+    rows = []
+    intr, intr_exc = sheets.get("Intraday"), sheets.get("Intraday Exceptions")
+    if intr is not None and len(intr):
+        rows += [
+            ("Intervals checked", len(intr)),
+            ("Risk intervals", len(intr_exc)),
+            ("Avg service level %", round(float(intr["service_level_est_pct"].mean()), 1)),
+            ("Worst service level %", round(float(intr["service_level_est_pct"].min()), 1)),
+            ("Worst staffing gap", int(intr["staffing_gap"].min())),
+        ]
+    var, var_exc = sheets.get("Variance"), sheets.get("Variance Misses")
+    if var is not None and len(var):
+        rows += [
+            ("Miss intervals", len(var_exc)),
+            ("Avg volume variance %", round(float(var["vol_var_pct"].mean()), 1)),
+        ]
+    adh, adh_exc = sheets.get("Adherence"), sheets.get("Adherence Alerts")
+    if adh is not None and len(adh):
+        rows += [
+            ("Agents checked", len(adh)),
+            ("Adherence alerts", len(adh_exc)),
+            ("Avg adherence %", round(float(adh["adherence_pct"].mean()), 1)),
+        ]
+    shr, shr_exc = sheets.get("Shrinkage"), sheets.get("Shrinkage Alerts")
+    if shr is not None and len(shr):
+        rows += [
+            ("Shrinkage alert days", len(shr_exc)),
+            ("Latest actual shrinkage %", float(widen(shr.tail(1))["actual_shrinkage_pct"].iloc[0])),
+        ]
+    return rows
+
+
+def narrative(site, sheets: dict):
+    """Plain-language bullets for leadership, built from the same frames as the KPI table."""
+    bullets = []
+    intr, intr_exc = sheets.get("Intraday"), sheets.get("Intraday Exceptions")
+    if intr is not None and len(intr):
+        if len(intr_exc):
+            worst = intr.loc[intr["service_level_est_pct"].idxmin()]
+            bullets.append(f"{site}: {len(intr_exc)} of {len(intr)} intervals flagged at risk; "
+                           f"worst SL {worst['service_level_est_pct']:.1f}% at {worst['interval_label']}.")
+        else:
+            bullets.append(f"{site}: no intraday risk intervals — staffing held to plan.")
+    var_exc = sheets.get("Variance Misses")
+    if var_exc is not None and len(var_exc) and "top_driver_hint" in var_exc:
+        bullets.append(f"Main driver of missed intervals: {var_exc['top_driver_hint'].astype(str).mode().iloc[0]}.")
+    adh_exc = sheets.get("Adherence Alerts")
+    if adh_exc is not None and len(adh_exc):
+        bullets.append(f"{len(adh_exc)} agents below adherence target; top reason "
+                       f"'{adh_exc['top_reason'].astype(str).mode().iloc[0]}'.")
+    shr = sheets.get("Shrinkage")
+    if shr is not None and len(shr):
+        latest = shr.iloc[-1]
+        bullets.append(f"Shrinkage ran {latest['variance_pp']:+.1f}pp vs plan on the latest day "
+                       f"({latest['actual_shrinkage_pct']:.1f}% actual).")
+    return bullets
+
+
+def _add_charts(book):
+    if "Intraday" in book.sheetnames:
+        ws = book["Intraday"]
+        cols = {c.value: c.column for c in ws[1]}
+        if ws.max_row > 1 and {"interval_label", "volume_fcst", "volume_act"} <= cols.keys():
+            chart = LineChart()
+            chart.title = "Volume: Forecast vs Actual"
+            chart.height, chart.width = 8, 18
+            for name in ("volume_fcst", "volume_act"):
+                chart.add_data(Reference(ws, min_col=cols[name], min_row=1, max_row=ws.max_row), titles_from_data=True)
+            chart.set_categories(Reference(ws, min_col=cols["interval_label"], min_row=2, max_row=ws.max_row))
+            book["Summary"].add_chart(chart, "E2")
+    if "Shrinkage" in book.sheetnames:
+        ws = book["Shrinkage"]
+        cols = {c.value: c.column for c in ws[1]}
+        if ws.max_row > 1 and {"date", "variance_pp"} <= cols.keys():
+            chart = BarChart()
+            chart.title = "Daily Shrinkage Variance (pp)"
+            chart.height, chart.width = 8, 18
+            chart.add_data(Reference(ws, min_col=cols["variance_pp"], min_row=1, max_row=ws.max_row), titles_from_data=True)
+            chart.set_categories(Reference(ws, min_col=cols["date"], min_row=2, max_row=ws.max_row))
+            book["Summary"].add_chart(chart, "E20")
+
+
+def write_pack(site, sheets: dict, path: str = None):
+    """Write one site's workbook to `path`, or return its bytes when no path is given."""
+    target = path or BytesIO()
+    summary = pd.DataFrame(site_kpis(sheets), columns=["KPI", "Value"])
+    bullets = pd.DataFrame({"Narrative": narrative(site, sheets)})
+    with pd.ExcelWriter(target, engine="openpyxl") as writer:
+        summary.to_excel(writer, sheet_name="Summary", index=False)
+        bullets.to_excel(writer, sheet_name="Summary", index=False, startrow=len(summary) + 2)
+        for sheet, df in sheets.items():
+            widen(df).to_excel(writer, sheet_name=sheet[:31], index=False)
+        _add_charts(writer.book)
+    return path if path else target.getvalue()
+
+
+def _init_worker(shared):
+    _SHARED.clear()
+    _SHARED.update(shared)
+
+
+def _render(site, out_dir, sheets=None):
+    """One site's pack; `sheets` defaults to the pool worker's copy shipped by the initializer."""
+    t0 = time.perf_counter()
+    path = os.path.join(out_dir, f"wfm_report_{_safe(site)}.xlsx") if out_dir else None
+    data = write_pack(site, _SHARED[site] if sheets is None else sheets, path)
+    return {"site": site, "path": path, "bytes": None if path else data,
+            "seconds": round(time.perf_counter() - t0, 3)}
+
+
+def _safe(name):
+    return "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in str(name))
+
+
+def build_packs(shared: dict, out_dir: str = None, workers: int = None):
+    """Render every site's pack. `shared` comes from split_by_site and is shipped to each worker
+    process once (pool initializer), so tasks only carry the site name.
+    workers=1 renders in-process straight from `shared` (used by the Streamlit app for small packs;
+    the module-level worker copy is never touched there, so concurrent sessions cannot mix data)."""
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    sites = list(shared)
+    if workers == 1 or len(sites) <= 1:
+        return [_render(site, out_dir, shared[site]) for site in sites]
+    workers = workers or min(len(sites), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared,)) as pool:
+        return list(pool.map(_render, sites, [out_dir] * len(sites)))
+
+
+def zip_packs(manifest):
+    """Bundle in-memory packs (out_dir=None) into one zip for a single download."""
+    bio = BytesIO()
+    with zipfile.ZipFile(bio, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for item in manifest:
+            name = f"wfm_report_{_safe(item['site'])}.xlsx"
+            if item["bytes"] is not None:
+                zf.writestr(name, item["bytes"])
+            elif item["path"]:
+                zf.write(item["path"], arcname=name)
+    return bio.getvalue()
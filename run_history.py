@@ -0,0 +1,178 @@
+# run_history.py
+# Embedded SQLite store for every bot run: parameters, KPI cards, exception rows and step timings.
+# Indexed on bot / queue / timestamp so trend dashboards read months of runs without raw data.
+
+import json
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from schema import widen
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    bot          TEXT NOT NULL,
+    queue        TEXT NOT NULL DEFAULT 'default',
+    started_at   REAL NOT NULL,
+    finished_at  REAL,
+    params       TEXT,
+    n_rows       INTEGER,
+    n_exceptions INTEGER
+);
+CREATE TABLE IF NOT EXISTS run_kpis (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    name   TEXT NOT NULL,
+    value  REAL,
+    PRIMARY KEY (run_id, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS run_steps (
+    run_id  INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    step_no INTEGER NOT NULL,
+    step    TEXT NOT NULL,
+    seconds REAL,
+    PRIMARY KEY (run_id, step_no)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS run_exceptions (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    bot    TEXT NOT NULL,
+    queue  TEXT NOT NULL,
+    ts     REAL NOT NULL,
+    row    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_runs_bot_ts ON runs(bot, started_at);
+CREATE INDEX IF NOT EXISTS ix_runs_queue_ts ON runs(queue, started_at);
+CREATE INDEX IF NOT EXISTS ix_runs_ts ON runs(started_at);
+CREATE INDEX IF NOT EXISTS ix_exc_run ON run_exceptions(run_id);
+CREATE INDEX IF NOT EXISTS ix_exc_bot_queue_ts ON run_exceptions(bot, queue, ts);
+"""
+
+INSERT_CHUNK = 5000   # rows per executemany for exception batches
+
+
+class RunHistory:
+    """Thread-safe wrapper around one SQLite file (WAL mode, shared by reruns and workers)."""
+
+    def __init__(self, path: str = "wfm_run_history.db"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            # auto_vacuum only takes on an empty file or via VACUUM, so set it before WAL and the tables;
+            # a file created without it (mode 0) is rebuilt once so compact() can give pages back.
+            self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                self.conn.execute("VACUUM")
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def record(self, bot: str, params: dict = None, kpis: dict = None, exceptions: pd.DataFrame = None,
+               steps=None, queue: str = "default", n_rows: int = None, started_at: float = None):
+        """Persist one run in a single transaction; returns the new run_id.
+
+        `steps` is a list of (step_name, seconds); `exceptions` is stored one JSON row per exception.
+        """
+        started_at = time.time() if started_at is None else started_at
+        n_exc = 0 if exceptions is None else len(exceptions)
+        exc_rows = []
+        if n_exc:
+            records = json.loads(widen(exceptions).to_json(orient="records", date_format="iso"))
+            exc_rows = [json.dumps(r, separators=(",", ":")) for r in records]
+        with self.lock:
+            cur = self.conn.cursor()
+            cur.execute("BEGIN")
+            try:
+                cur.execute(
+                    "INSERT INTO runs (bot, queue, started_at, finished_at, params, n_rows, n_exceptions) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (bot, queue, started_at, time.time(), json.dumps(params or {}, default=str), n_rows, n_exc),
+                )
+                run_id = cur.lastrowid
+                if kpis:
+                    cur.executemany("INSERT INTO run_kpis (run_id, name, value) VALUES (?, ?, ?)",
+                                    [(run_id, k, None if v is None else float(v)) for k, v in kpis.items()])
+                if steps:
+                    cur.executemany("INSERT INTO run_steps (run_id, step_no, step, seconds) VALUES (?, ?, ?, ?)",
+                                    [(run_id, i, s, float(sec)) for i, (s, sec) in enumerate(steps, start=1)])
+                for i in range(0, len(exc_rows), INSERT_CHUNK):
+                    cur.executemany("INSERT INTO run_exceptions (run_id, bot, queue, ts, row) VALUES (?, ?, ?, ?, ?)",
+                                    [(run_id, bot, queue, started_at, r) for r in exc_rows[i:i + INSERT_CHUNK]])
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+        return run_id
+
+    def _query(self, sql, args=()):
+        with self.lock:
+            return pd.read_sql_query(sql, self.conn, params=args)
+
+    def runs(self, bot: str = None, queue: str = None, since: float = None, limit: int = 100):
+        """Most recent runs (newest first) with their parameters as JSON text."""
+        where, args = self._where(bot, queue, since)
+        return self._query(
+            f"SELECT run_id, bot, queue, started_at, finished_at - started_at AS seconds, params, "
+            f"n_rows, n_exceptions FROM runs{where} ORDER BY started_at DESC LIMIT ?",
+            args + [limit],
+        )
+
+    def kpi_trend(self, bot: str, kpi: str = None, queue: str = None, since: float = None):
+        """KPI values over time for one bot (long format: started_at, queue, name, value)."""
+        where, args = self._where(bot, queue, since, alias="r.")
+        if kpi:
+            where += " AND k.name = ?"
+            args.append(kpi)
+        return self._query(
+            f"SELECT r.run_id, r.started_at, r.queue, k.name, k.value "
+            f"FROM runs r JOIN run_kpis k ON k.run_id = r.run_id{where} ORDER BY r.started_at",
+            args,
+        )
+
+    def steps(self, run_id: int):
+        return self._query("SELECT step_no, step, seconds FROM run_steps WHERE run_id = ? ORDER BY step_no", [run_id])
+
+    def exceptions(self, run_id: int):
+        rows = self._query("SELECT row FROM run_exceptions WHERE run_id = ?", [run_id])["row"]
+        return pd.DataFrame([json.loads(r) for r in rows])
+
+    @staticmethod
+    def _where(bot=None, queue=None, since=None, alias=""):
+        clauses, args = [], []
+        if bot is not None:
+            clauses.append(f"{alias}bot = ?")
+            args.append(bot)
+        if queue is not None:
+            clauses.append(f"{alias}queue = ?")
+            args.append(queue)
+        if since is not None:
+            clauses.append(f"{alias}started_at >= ?")
+            args.append(since)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else " WHERE 1 = 1", args
+
+    def compact(self, keep_days: float = 180, detail_days: float = 14, now: float = None):
+        """Retention policy: drop exception rows after `detail_days` (runs + KPIs stay for trends),
+        drop whole runs after `keep_days`, then give freed pages back to the OS."""
+        now = time.time() if now is None else now
+        with self.lock:
+            cur = self.conn.cursor()
+            cur.execute("BEGIN")
+            try:
+                cur.execute("DELETE FROM run_exceptions WHERE ts < ?", (now - detail_days * 86400,))
+                dropped_exc = cur.rowcount
+                cur.execute("DELETE FROM runs WHERE started_at < ?", (now - keep_days * 86400,))
+                dropped_runs = cur.rowcount
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+            self.conn.executescript("PRAGMA incremental_vacuum;")   # execute() would step it (one page) once
+            self.conn.execute("PRAGMA optimize")
+        return {"runs_dropped": dropped_runs, "exception_rows_dropped": dropped_exc}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,207 @@
+# scheduling.py
+# Shift schedule generator: picks shift starts, lengths and break placements from templates so the
+# scheduled heads cover a needed_staff curve (days × intervals), within headcount limits.
+# Greedy set-cover over every (day, template, start, break) candidate, then a local-search pass that
+# re-places each shift where it helps most. Coverage of all candidates is scored at once from cumsums.
+
+import numpy as np
+import pandas as pd
+
+OVER_PENALTY = 0.3     # cost of one surplus head-interval relative to one short head-interval
+
+
+class ShiftTemplate:
+    """A shift shape. Times in minutes; starts between earliest/latest start of the day, the break
+    begins between break_after[0] and break_after[1] minutes into the shift."""
+
+    def __init__(self, name: str, length: int = 480, break_len: int = 60, break_after=(180, 300),
+                 earliest_start: int = 0, latest_start: int = 24 * 60 - 1, max_shifts: int = None):
+        self.name = name
+        self.length = length
+        self.break_len = break_len
+        self.break_after = break_after
+        self.earliest_start = earliest_start
+        self.latest_start = latest_start
+        self.max_shifts = max_shifts     # per week across all agents (None = unlimited)
+
+
+DEFAULT_TEMPLATES = [
+    ShiftTemplate("8h", 480, 60, (180, 300)),
+    ShiftTemplate("6h", 360, 30, (120, 240)),
+    ShiftTemplate("4h", 240, 0, (0, 0)),
+]
+
+
+class Candidates:
+    """Every allowed (day, template, start, break) as flat interval-index arrays."""
+
+    def __init__(self, templates, n_days: int, per_day: int, minutes: int):
+        rows = []
+        for t_i, t in enumerate(templates):
+            for unit in ("length", "break_len"):
+                if getattr(t, unit) % minutes:
+                    raise ValueError(f"Template {t.name}: {unit} must be a multiple of {minutes} minutes")
+            length, brk = t.length // minutes, t.break_len // minutes
+            starts = np.arange(-(-t.earliest_start // minutes), t.latest_start // minutes + 1)
+            offsets = np.arange(t.break_after[0] // minutes, t.break_after[1] // minutes + 1) if brk else np.array([0])
+            d, s, b = np.meshgrid(np.arange(n_days), starts, offsets, indexing="ij")
+            start = (d * per_day + s).ravel()
+            rows.append(np.column_stack([
+                np.full(start.size, t_i), d.ravel(), start, start + length,
+                start + b.ravel(), start + b.ravel() + brk,
+            ]))
+        arr = np.vstack(rows)
+        horizon = n_days * per_day
+        arr = arr[arr[:, 3] <= horizon]          # shifts must end inside the horizon
+        self.template, self.day, self.start, self.end, self.brk_start, self.brk_end = arr.T
+        self.templates = templates
+
+    def __len__(self):
+        return len(self.start)
+
+    def score(self, value):
+        """Sum of `value` (T,) over each candidate's worked intervals (shift minus break)."""
+        c = np.r_[0.0, np.cumsum(value)]
+        return c[self.end] - c[self.start] - (c[self.brk_end] - c[self.brk_start])
+
+
+class Schedule:
+    """Picked shifts (one row per agent-day) plus coverage vs requirement. `unassigned` holds shifts
+    the greedy pass wanted but no agent within `max_agents` could work; they are not in `coverage`,
+    so they show up as short head-hours."""
+
+    def __init__(self, shifts: pd.DataFrame, needed, coverage, minutes: int, unassigned: pd.DataFrame = None):
+        self.shifts = shifts
+        self.needed = needed
+        self.coverage = coverage
+        self.minutes = minutes
+        self.unassigned = unassigned if unassigned is not None else shifts.iloc[:0].drop(columns="agent")
+
+    @property
+    def summary(self):
+        short = np.maximum(self.needed - self.coverage, 0)
+        over = np.maximum(self.coverage - self.needed, 0)
+        return {
+            "shifts": len(self.shifts),
+            "agents": int(self.shifts["agent"].nunique()) if len(self.shifts) else 0,
+            "unassigned_shifts": len(self.unassigned),
+            "intervals_met_pct": round(float((short == 0).mean() * 100), 1),
+            "short_head_hours": round(float(short.sum() * self.minutes / 60), 1),
+            "over_head_hours": round(float(over.sum() * self.minutes / 60), 1),
+        }
+
+
+def _gains(cands, coverage, needed, over_penalty):
+    short = (coverage < needed).astype(float)
+    return cands.score(short - over_penalty * (1 - short))
+
+
+def build_schedule(needed, minutes: int = 15, templates=None, max_agents: int = 500, days_per_agent: int = 5,
+                   over_penalty: float = OVER_PENALTY, passes: int = 2, labels=None):
+    """Cover `needed` ((D, P) heads per interval, or (P,) for one day) with shifts.
+
+    Greedy: add the candidate shift with the best (short covered - penalty × surplus) until nothing
+    helps or limits bind (max_agents per day, max_agents × days_per_agent shifts per week, template
+    caps). Local search: take each shift out and put back the best candidate for the same day.
+    """
+    needed = np.atleast_2d(np.asarray(needed, dtype=float))
+    n_days, per_day = needed.shape
+    horizon = n_days * per_day
+    need = needed.ravel()
+    templates = templates or DEFAULT_TEMPLATES
+    cands = Candidates(templates, n_days, per_day, minutes)
+    caps = np.array([t.max_shifts if t.max_shifts is not None else np.iinfo(np.int64).max for t in templates])
+    week_cap = max_agents * min(days_per_agent, n_days)
+
+    coverage = np.zeros(horizon)
+    picked = []
+    per_day_count = np.zeros(n_days, dtype=np.int64)
+    per_tmpl = np.zeros(len(templates), dtype=np.int64)
+    allowed = np.ones(len(cands), dtype=bool)
+    worked = cands.end - cands.start - (cands.brk_end - cands.brk_start)
+
+    while len(picked) < week_cap:
+        gain = np.where(allowed, _gains(cands, coverage, need, over_penalty), -np.inf)
+        best = int(np.argmax(gain / worked))             # best cover per worked interval
+        if gain[best] <= 0:
+            break
+        picked.append(best)
+        coverage[cands.start[best]:cands.end[best]] += 1
+        coverage[cands.brk_start[best]:cands.brk_end[best]] -= 1
+        per_day_count[cands.day[best]] += 1
+        per_tmpl[cands.template[best]] += 1
+        if per_day_count[cands.day[best]] >= max_agents:
+            allowed &= cands.day != cands.day[best]
+        if per_tmpl[cands.template[best]] >= caps[cands.template[best]]:
+            allowed &= cands.template != cands.template[best]
+
+    # local search: re-place each shift (same day, any template that still has room) if it scores better
+    picked = np.array(picked, dtype=np.int64)
+    for _ in range(passes):
+        moved = 0
+        for i, c in enumerate(picked):
+            coverage[cands.start[c]:cands.end[c]] -= 1
+            coverage[cands.brk_start[c]:cands.brk_end[c]] += 1
+            per_tmpl[cands.template[c]] -= 1
+            ok = (cands.day == cands.day[c]) & (per_tmpl[cands.template] < caps[cands.template])
+            gain = np.where(ok, _gains(cands, coverage, need, over_penalty), -np.inf)
+            best = int(np.argmax(gain))
+            if gain[best] > gain[c] + 1e-9:
+                picked[i] = c = best
+                moved += 1
+            coverage[cands.start[c]:cands.end[c]] += 1
+            coverage[cands.brk_start[c]:cands.brk_end[c]] -= 1
+            per_tmpl[cands.template[c]] += 1
+        if not moved:
+            break
+
+    shifts, dropped = _roster(cands, picked, per_day, minutes, max_agents, days_per_agent, labels)
+    for c in dropped:                                    # nobody left to work it: coverage shortfall
+        coverage[cands.start[c]:cands.end[c]] -= 1
+        coverage[cands.brk_start[c]:cands.brk_end[c]] += 1
+    return Schedule(shifts, need, coverage, minutes, _shift_frame(cands, dropped, per_day, minutes, labels))
+
+
+def _clock(idx, per_day, minutes):
+    m = (np.asarray(idx) % per_day) * minutes
+    return [f"{x // 60:02d}:{x % 60:02d}" for x in m]
+
+
+def _shift_frame(cands, rows, per_day, minutes, labels=None, agent=None):
+    rows = np.asarray(rows, dtype=np.int64)
+    has_break = cands.brk_end[rows] > cands.brk_start[rows]
+    out = {} if agent is None else {"agent": [f"S{a + 1:04d}" for a in agent]}
+    out.update({
+        "day": [labels[d] for d in cands.day[rows]] if labels is not None else cands.day[rows],
+        "template": [cands.templates[t].name for t in cands.template[rows]],
+        "start": _clock(cands.start[rows], per_day, minutes),
+        "end": _clock(cands.end[rows], per_day, minutes),
+        "break_start": np.where(has_break, _clock(cands.brk_start[rows], per_day, minutes), ""),
+        "break_end": np.where(has_break, _clock(cands.brk_end[rows], per_day, minutes), ""),
+    })
+    return pd.DataFrame(out, columns=list(out))
+
+
+def _roster(cands, picked, per_day, minutes, max_agents, days_per_agent, labels=None):
+    """Assign shifts to agents: each day's shifts (by start) go to the least-loaded of `max_agents`
+    agents who are still free at the shift's start — a shift that ran past midnight keeps its agent
+    busy into the next day. Returns (shifts frame, candidate indices no agent could take)."""
+    order = np.lexsort((cands.start[picked], cands.day[picked]))
+    picked = np.asarray(picked, dtype=np.int64)[order]
+    agent = np.full(len(picked), -1, dtype=np.int64)
+    load = np.zeros(max_agents, dtype=np.int64)
+    busy_until = np.zeros(max_agents, dtype=np.int64)      # end (horizon interval) of each agent's last shift
+    starts, ends, days = cands.start[picked], cands.end[picked], cands.day[picked]
+    for day in np.unique(days):
+        today = np.zeros(max_agents, dtype=bool)           # one shift per agent per day
+        for r in np.flatnonzero(days == day):
+            ok = np.flatnonzero((load < days_per_agent) & ~today & (busy_until <= starts[r]))
+            if not len(ok):
+                continue                                   # left unassigned: the pool is capped at max_agents
+            a = ok[np.argmin(load[ok])]
+            agent[r] = a
+            load[a] += 1
+            busy_until[a] = ends[r]
+            today[a] = True
+    kept = agent >= 0
+    return (_shift_frame(cands, picked[kept], per_day, minutes, labels, agent[kept]), picked[~kept])
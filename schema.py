@@ -0,0 +1,107 @@
+# schema.py
+# Compact intraday schema. Frames are converted once at ingest (dummy generators, feed alignment,
+# file / API reads): int16/int32 counts, float32 rates, categorical labels and driver hints, and the
+# Health Check / Variance flags bit-packed into one uint8 `flags` column.
+#
+# Memory per million intervals (base columns + Health Check + Variance outputs, 96 intervals/day):
+#   object label + string hint, int64/float64, 5 bool flags      230 MB
+#   categorical label, int64/float64, 5 bool flags, string hint  120 MB
+#   compact (this schema)                                          45 MB  (base inputs alone: 35 MB)
+# interval_start (datetime64, 8 B) is then the widest column. A month of 500 queues at 15 min
+# (1.44M intervals) is ~65 MB. memory_per_million() measures any frame.
+
+import numpy as np
+import pandas as pd
+
+# bit-packed flags (uint8 `flags`); Health Check sets the first three, Variance sets FLAG_MISS
+FLAG_STAFFING, FLAG_SL, FLAG_ASA, FLAG_MISS = 1, 2, 4, 8
+FLAG_BITS = {"flag_staffing": FLAG_STAFFING, "flag_sl": FLAG_SL, "flag_asa": FLAG_ASA, "is_miss": FLAG_MISS}
+RISK_FLAGS = FLAG_STAFFING | FLAG_SL | FLAG_ASA
+
+# Variance driver hint by code (bit 1 = Volume, 2 = AHT, 4 = Staffing)
+DRIVER_HINTS = ["Minor/Normal", "Volume", "AHT", "Volume, AHT", "Staffing", "Volume, Staffing",
+                "AHT, Staffing", "Volume, AHT, Staffing"]
+
+INTRADAY_DTYPES = {
+    "interval_label": "category",
+    "volume_fcst": "int32",
+    "volume_act": "int32",
+    "aht_sec": "int16",
+    "shrinkage": "float32",
+    "needed_staff": "int16",
+    "actual_staff": "int16",
+    "staffing_gap": "int16",
+    "asa_sec_est": "int16",
+    "service_level_est_pct": "float32",
+    "vol_var_pct": "float32",
+    "gap_pct": "float32",
+    "flags": "uint8",
+    "top_driver_hint": "category",
+}
+
+
+def _fit(s: pd.Series, dtype: str):
+    """Cast to `dtype`, widening integer targets that would overflow (or that hold NaN) instead of
+    corrupting values."""
+    if dtype == "category":
+        return s if isinstance(s.dtype, pd.CategoricalDtype) else s.astype("category")
+    if s.dtype == dtype:
+        return s
+    if np.dtype(dtype).kind in "iu":
+        if s.isna().any():
+            return s.astype("float32")
+        lo, hi = (s.min(), s.max()) if len(s) else (0, 0)
+        for cand in (dtype, "int32", "int64"):
+            info = np.iinfo(cand)
+            if np.dtype(cand).itemsize >= np.dtype(dtype).itemsize and info.min <= lo and hi <= info.max:
+                return s.astype(cand)
+        return s
+    return s.astype(dtype)
+
+
+def compact(df: pd.DataFrame):
+    """Convert the schema's columns present in `df` (in place) and return it."""
+    for col, dtype in INTRADAY_DTYPES.items():
+        if col in df.columns:
+            df[col] = _fit(df[col], dtype)
+    return df
+
+
+def set_flags(df: pd.DataFrame, mask: int, bits):
+    """Replace the `mask` bits of every row's flags with `bits` (a uint8 array or scalar)."""
+    flags = df["flags"].to_numpy() if "flags" in df.columns else np.zeros(len(df), dtype=np.uint8)
+    df["flags"] = ((flags & (~mask & 0xFF)) | (np.asarray(bits, dtype=np.uint8) & mask)).astype(np.uint8)
+
+
+def flag(df_or_flags, name: str):
+    """One flag as a bool array from a frame's `flags` column (or a flags array)."""
+    flags = df_or_flags["flags"] if isinstance(df_or_flags, pd.DataFrame) else df_or_flags
+    return (np.asarray(flags) & FLAG_BITS[name]) != 0
+
+
+def expand_flags(df: pd.DataFrame, names=None):
+    """Copy with readable bool columns for the packed flags (for exports / display)."""
+    if "flags" not in df.columns:
+        return df
+    out = df.drop(columns=["flags"])
+    flags = df["flags"].to_numpy()
+    for name in names or FLAG_BITS:
+        out[name] = (flags & FLAG_BITS[name]) != 0
+    return out
+
+
+def widen(df: pd.DataFrame):
+    """float32 columns as float64 with their shortest decimal (12.3, not 12.3000001907) — for JSON,
+    Excel and the browser, which would otherwise print the float32 rounding error."""
+    cols = [c for c in df.columns if df[c].dtype == np.float32]
+    if not cols:
+        return df
+    out = df.copy(deep=False)
+    for c in cols:
+        out[c] = df[c].to_numpy().astype(str).astype(np.float64)
+    return out
+
+
+def memory_per_million(df: pd.DataFrame):
+    """MB per million rows for this frame's columns (deep, so strings/categories count)."""
+    return df.memory_usage(deep=True, index=False).sum() / max(len(df), 1)
@@ -0,0 +1,316 @@
+# shrinkage.py
+# Shrinkage Watch trend engine: rolling-window + EWMA statistics per (site, category)
+# that update incrementally when a new day lands, plus a constant-time next-day risk score. States
+# persist as JSON between runs, so a run only folds in the days that landed since the last one.
+# Also the category decomposition of a site × day × category detail (PTO, sick, training, ...):
+# site-day totals with their top driver and per-category variance attribution, all grouped
+# aggregations on the categorical keys (200 sites × 2 years × 10 categories in ~0.3s).
+
+import json
+import os
+import tempfile
+from collections import deque
+from math import erf, sqrt
+
+import numpy as np
+import pandas as pd
+
+DETAIL_KEYS = ["site", "date", "category"]
+_AMOUNTS = ["planned_pct", "actual_pct", "variance_pp"]
+
+ROLL_DAYS = 7      # rolling window for the short-term variance mean/std
+EWMA_SPAN = 14     # span of the exponentially weighted level/trend
+MIN_STD_PP = 0.5   # floor so a very flat history does not give 0/100 scores
+WARN_SCORE = 50    # next-day warning when risk score reaches this
+
+
+class TrendState:
+    """Running shrinkage-variance statistics for one (site, category) series."""
+
+    __slots__ = ("window", "alpha", "values", "roll_sum", "roll_sumsq",
+                 "ewma", "ewm_var", "trend", "n", "last_date")
+
+    def __init__(self, window: int = ROLL_DAYS, span: int = EWMA_SPAN):
+        self.window = window
+        self.alpha = 2.0 / (span + 1.0)
+        self.values = deque(maxlen=window)
+        self.roll_sum = 0.0
+        self.roll_sumsq = 0.0
+        self.ewma = 0.0
+        self.ewm_var = 0.0
+        self.trend = 0.0
+        self.n = 0
+        self.last_date = None
+
+    def update(self, variance_pp: float, date=None):
+        """Fold one new day into the state in O(1)."""
+        x = float(variance_pp)
+        if len(self.values) == self.window:
+            old = self.values[0]
+            self.roll_sum -= old
+            self.roll_sumsq -= old * old
+        prev = self.values[-1] if self.values else None
+        self.values.append(x)
+        self.roll_sum += x
+        self.roll_sumsq += x * x
+
+        a = self.alpha
+        if self.n == 0:
+            self.ewma = x
+        else:
+            diff = x - self.ewma
+            incr = a * diff
+            self.ewma += incr
+            self.ewm_var = (1 - a) * (self.ewm_var + diff * incr)
+            step = x - prev
+            self.trend = step if self.n == 1 else a * step + (1 - a) * self.trend
+        self.n += 1
+        self.last_date = date
+
+    @property
+    def roll_mean(self):
+        return self.roll_sum / len(self.values) if self.values else 0.0
+
+    @property
+    def roll_std(self):
+        k = len(self.values)
+        if k < 2:
+            return 0.0
+        var = (self.roll_sumsq - self.roll_sum * self.roll_sum / k) / (k - 1)
+        return sqrt(max(var, 0.0))
+
+    def next_day(self):
+        """Forecast of tomorrow's variance (pp): EWMA level + EWMA day-over-day trend."""
+        return self.ewma + self.trend
+
+    def risk_score(self, shrink_pp: float):
+        """0–100 score: chance that tomorrow's variance reaches the alert threshold."""
+        if self.n == 0:
+            return 0.0
+        spread = max(sqrt(self.ewm_var), self.roll_std, MIN_STD_PP)
+        z = (self.next_day() - shrink_pp) / spread
+        return 100 * 0.5 * (1 + erf(z / sqrt(2)))
+
+
+class ShrinkageWatch:
+    """Trend states for every (site, category) series, keyed for O(1) lookups. With `path`, states
+    are loaded from / saved to that JSON file (ignored if it was written with another window/span)."""
+
+    def __init__(self, window: int = ROLL_DAYS, span: int = EWMA_SPAN, path: str = None):
+        self.window = window
+        self.span = span
+        self.path = path
+        self.states = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as fh:
+                saved = json.load(fh)
+            if (saved["window"], saved["span"]) == (window, span):
+                for site, category, values, ewma, ewm_var, trend, n, last_date in saved["states"]:
+                    s = self.state(site, category)
+                    s.values.extend(values)
+                    s.roll_sum = float(sum(s.values))
+                    s.roll_sumsq = float(sum(v * v for v in s.values))
+                    s.ewma, s.ewm_var, s.trend, s.n = ewma, ewm_var, trend, n
+                    s.last_date = pd.Timestamp(last_date) if last_date else None
+
+    def save(self):
+        if not self.path:
+            return
+        states = [[site, category, list(s.values), s.ewma, s.ewm_var, s.trend, s.n,
+                   str(pd.Timestamp(s.last_date)) if s.last_date is not None else None]
+                  for (site, category), s in self.states.items()]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".watch-", dir=os.path.dirname(self.path) or ".")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump({"window": self.window, "span": self.span, "states": states}, fh)
+        os.replace(tmp, self.path)
+
+    def state(self, site, category):
+        key = (site, category)
+        st_ = self.states.get(key)
+        if st_ is None:
+            st_ = self.states[key] = TrendState(self.window, self.span)
+        return st_
+
+    def update(self, site, category, variance_pp, date=None):
+        st_ = self.state(site, category)
+        st_.update(variance_pp, date)
+        return st_
+
+    def update_frame(self, df: pd.DataFrame):
+        """Append one or more new days (rows must be in date order within each series)."""
+        df = _with_keys(df)
+        dates = df["date"] if "date" in df.columns else [None] * len(df)
+        for site, category, var, date in zip(df["site"], df["category"], df["variance_pp"], dates):
+            self.update(site, category, var, date)
+
+    def catch_up(self, df: pd.DataFrame):
+        """Bring the states up to date with a dated history, folding only what is new: rows after a
+        known series' `last_date` go through update_frame; series never seen are seeded from their
+        whole history in one vectorized pass. Returns the number of rows folded in."""
+        df = _with_keys(df)
+        if not self.states:
+            self.states = ShrinkageWatch.from_history(df, self.window, self.span).states
+            return len(df)
+        dates = pd.to_datetime(df["date"])
+        known = {k: pd.Timestamp(s.last_date) for k, s in self.states.items() if s.last_date is not None}
+        series = df.groupby(["site", "category"], observed=True, sort=False).size().index
+        new = [k for k in series if k not in known]
+        n = 0
+        if new:
+            seed = pd.MultiIndex.from_frame(df[["site", "category"]]).isin(new)
+            self.states.update(ShrinkageWatch.from_history(df[seed], self.window, self.span).states)
+            n += int(seed.sum())
+            df, dates = df[~seed], dates[~seed]
+        if known:
+            newer = (dates > min(known.values())).to_numpy()
+            recent = df[newer].assign(date=dates[newer].to_numpy())
+            fresh = [d > known[(s, c)] for s, c, d in zip(recent["site"], recent["category"], recent["date"])]
+            recent = recent[np.asarray(fresh, dtype=bool)].sort_values("date", kind="stable")
+            self.update_frame(recent)
+            n += len(recent)
+        return n
+
+    def snapshot(self, shrink_pp: float):
+        """One row per series: current rolling/EWMA stats, next-day forecast and risk score."""
+        rows = []
+        for (site, category), s in self.states.items():
+            score = s.risk_score(shrink_pp)
+            rows.append({
+                "site": site,
+                "category": category,
+                "last_date": s.last_date,
+                "roll_mean_pp": round(s.roll_mean, 2),
+                "roll_std_pp": round(s.roll_std, 2),
+                "ewma_pp": round(s.ewma, 2),
+                "trend_pp": round(s.trend, 2),
+                "next_day_pp": round(s.next_day(), 2),
+                "risk_score": round(score, 1),
+                "next_day_warning": score >= WARN_SCORE,
+            })
+        out = pd.DataFrame(rows)
+        if len(out):
+            out = out.sort_values("risk_score", ascending=False, ignore_index=True)
+        return out
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame, window: int = ROLL_DAYS, span: int = EWMA_SPAN):
+        """Seed states from a full history; stats are computed vectorized, then one state per series."""
+        return cls.from_trend(trend_frame(df, window=window, span=span), window, span)
+
+    @classmethod
+    def from_trend(cls, hist: pd.DataFrame, window: int = ROLL_DAYS, span: int = EWMA_SPAN):
+        """Seed states from a frame already returned by `trend_frame` (series are located with one
+        stable sort on the group codes, so thousands of series seed without per-group frames)."""
+        watch = cls(window, span)
+        codes = hist.groupby(["site", "category"], sort=False, observed=True).ngroup().to_numpy()
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+        ends = np.flatnonzero(np.r_[codes[1:] != codes[:-1], True])       # last row of each series
+        starts = np.r_[0, ends[:-1] + 1]
+        var = hist["variance_pp"].to_numpy(dtype=float)[order]
+        last = order[ends]
+        sites, cats = hist["site"].iloc[last].to_numpy(), hist["category"].iloc[last].to_numpy()
+        ewma, ewm_var = hist["var_ewma"].to_numpy(dtype=float)[last], hist["_ewm_var"].to_numpy(dtype=float)[last]
+        trend = hist["var_trend"].to_numpy(dtype=float)[last]
+        dates = hist["date"].iloc[last].to_numpy() if "date" in hist.columns else [None] * len(last)
+        for i, (a, e) in enumerate(zip(starts.tolist(), ends.tolist())):
+            vals = var[max(a, e + 1 - window):e + 1]
+            s = watch.state(sites[i], cats[i])
+            s.values.extend(vals.tolist())
+            s.roll_sum = float(vals.sum())
+            s.roll_sumsq = float((vals * vals).sum())
+            s.ewma = float(ewma[i])
+            s.ewm_var = float(ewm_var[i])
+            s.trend = float(trend[i])
+            s.n = e - a + 1
+            s.last_date = dates[i]
+        return watch
+
+
+def _with_keys(df: pd.DataFrame):
+    """Single-series histories (no site/category columns) are tracked as All / Total."""
+    missing = {k: v for k, v in (("site", "All"), ("category", "Total")) if k not in df.columns}
+    return df.assign(**missing) if missing else df
+
+
+def trend_frame(df: pd.DataFrame, window: int = ROLL_DAYS, span: int = EWMA_SPAN):
+    """Add rolling/EWMA trend columns to a daily shrinkage history (vectorized per series)."""
+    keys = ["site", "category"]
+    out = _with_keys(df)
+    out = out.sort_values(keys + (["date"] if "date" in out.columns else []), kind="stable").reset_index(drop=True)
+    v = out["variance_pp"].astype(float)
+    g = v.groupby([out[k] for k in keys], sort=True, observed=True)
+
+    def per_series(res):
+        return res.droplevel(list(range(len(keys))))
+
+    out["var_roll_mean"] = per_series(g.rolling(window, min_periods=1).mean()).round(2)
+    out["var_roll_std"] = per_series(g.rolling(window, min_periods=2).std()).fillna(0.0).round(2)
+    out["var_ewma"] = per_series(g.ewm(span=span, adjust=False).mean())
+    out["_ewm_var"] = per_series(g.ewm(span=span, adjust=False).var(bias=True)).fillna(0.0)
+    step = g.diff()
+    out["var_trend"] = per_series(
+        step.groupby([out[k] for k in keys], sort=True, observed=True).ewm(span=span, adjust=False).mean()
+    ).fillna(0.0)
+    return out
+
+
+def is_detail(df: pd.DataFrame):
+    """True for a site × day × category detail (planned_pct / actual_pct / variance_pp per category)."""
+    return all(c in df.columns for c in DETAIL_KEYS + _AMOUNTS)
+
+
+def site_day_frame(detail: pd.DataFrame):
+    """Site × day totals of a detail: planned / actual shrinkage %, variance (pp), and the category
+    that added the most variance that day."""
+    g = detail.groupby(["site", "date"], observed=True, sort=True)
+    out = g[_AMOUNTS].sum().astype(float).round(2)
+    top = g["variance_pp"].idxmax().to_numpy()
+    out["top_category"] = detail["category"].loc[top].array
+    out["top_category_pp"] = detail["variance_pp"].loc[top].to_numpy().astype(float).round(2)
+    out = out.rename(columns={"planned_pct": "planned_shrinkage_pct", "actual_pct": "actual_shrinkage_pct"})
+    return out.reset_index()
+
+
+def daily_frame(site_day: pd.DataFrame):
+    """Center-level daily series (average over sites) in make_dummy_shrinkage's layout."""
+    cols = ["planned_shrinkage_pct", "actual_shrinkage_pct", "variance_pp"]
+    return site_day.groupby("date", sort=True)[cols].mean().round(2).reset_index()
+
+
+def next_day_frame(site_day: pd.DataFrame, detail: pd.DataFrame, shrink_pp: float, state_path: str = None):
+    """Next-day risk per site from its site-day total series (the rows the alert rule checks), with
+    the category whose own (site, category) series projects the most variance tomorrow.
+    With `state_path`, both watches persist there (<state_path>.sites.json / .categories.json) and
+    each run folds in only the days added since the previous one."""
+    site_totals = site_day[["site", "date", "variance_pp"]]
+    if state_path is None:
+        sites = ShrinkageWatch.from_history(site_totals).snapshot(shrink_pp)
+        cats = ShrinkageWatch.from_history(detail).snapshot(shrink_pp)
+    else:
+        snaps = []
+        for name, frame in (("sites", site_totals), ("categories", detail)):
+            watch = ShrinkageWatch(path=f"{state_path}.{name}.json")
+            if watch.catch_up(frame):
+                watch.save()
+            snaps.append(watch.snapshot(shrink_pp))
+        sites, cats = snaps
+    driver = (cats.sort_values("next_day_pp", ascending=False, kind="stable").drop_duplicates("site")
+              [["site", "category", "next_day_pp"]]
+              .rename(columns={"category": "driver_category", "next_day_pp": "driver_next_day_pp"}))
+    return sites.drop(columns="category").merge(driver, on="site", how="left")
+
+
+def attribute_variance(detail: pd.DataFrame, by=("site",)):
+    """Variance attribution per `by` group and category: mean planned / actual % and variance (pp)
+    over the group's rows, so a group's category variances add up to its average site-day total.
+    share_of_excess_pct is each category's part of the group's over-plan variance (categories at or
+    under plan count as 0)."""
+    by = list(by)
+    out = (detail.groupby(by + ["category"], observed=True, sort=True)[_AMOUNTS]
+           .mean().astype(float).round(2).reset_index())
+    excess = out["variance_pp"].clip(lower=0)
+    total = excess.groupby([out[k] for k in by], observed=True).transform("sum") if by else excess.sum()
+    out["share_of_excess_pct"] = (100 * excess / np.where(total > 0, total, np.nan)).fillna(0.0).round(1)
+    return out
@@ -0,0 +1,181 @@
+# simulation.py
+# Discrete-event contact-center simulator: Poisson arrivals, lognormal handle times, exponential
+# patience (abandonment) and skill-based routing over agent groups with per-interval staffing.
+# Arrivals are pre-drawn with numpy; the event loop is a single heapq of departures, abandons and
+# staffing changes. Replications run in a process pool and are pooled into per-interval SL / ASA.
+
+import heapq
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+SL_SEC = 20            # answer-time threshold for service level
+PATIENCE_SEC = 120     # mean caller patience before abandoning (None = nobody abandons)
+AHT_CV = 0.8           # coefficient of variation of handle time
+
+_STAFF, _DEPART, _ABANDON = 0, 1, 2     # event kinds; staffing changes sort first at equal times
+_STATS = ("offered", "answered", "in_sl", "wait_sum", "abandoned")
+
+
+def _draw_calls(rng, volume, aht, step, aht_cv, patience_sec):
+    """All arrivals of the day, time-ordered: (time, skill, interval, service, patience)."""
+    n_s, n_p = volume.shape
+    counts = rng.poisson(np.clip(volume, 0, None)).ravel()
+    skill = np.repeat(np.repeat(np.arange(n_s), n_p), counts)
+    interval = np.repeat(np.tile(np.arange(n_p), n_s), counts)
+    arrive = (interval + rng.random(len(skill))) * step
+    sigma = np.sqrt(np.log1p(aht_cv ** 2))
+    service = aht[skill, interval] * np.exp(rng.normal(-sigma ** 2 / 2, sigma, size=len(skill)))
+    patience = (rng.exponential(patience_sec, size=len(skill)) if patience_sec
+                else np.full(len(skill), np.inf))
+    order = np.argsort(arrive, kind="stable")
+    return arrive[order], skill[order], interval[order], service[order], patience[order]
+
+
+def run_day(volume, aht, staff, skills, minutes=30, sl_sec=SL_SEC, patience_sec=PATIENCE_SEC,
+            aht_cv=AHT_CV, seed=0):
+    """One replication. volume/aht are (S, P) per skill, staff is (G, P) per agent group and
+    skills is (G, S) bool. Returns {stat: (S, P) array} keyed by the caller's arrival interval."""
+    rng = np.random.default_rng(seed)
+    step = minutes * 60
+    n_s, n_p = volume.shape
+    n_g = staff.shape[0]
+    arrive, skill, interval, service, patience = _draw_calls(rng, volume, aht, step, aht_cv, patience_sec)
+    cell = (skill * n_p + interval).tolist()          # flat (skill, interval) stats slot per call
+    arrive, skill, service, patience = arrive.tolist(), skill.tolist(), service.tolist(), patience.tolist()
+    staff = np.asarray(staff, dtype=np.int64)
+    skills = np.asarray(skills, dtype=bool)
+    # route arrivals to specialists first, so multi-skilled agents stay free for the other queues
+    width = skills.sum(axis=1)
+    groups_for = [sorted(np.flatnonzero(skills[:, s]).tolist(), key=lambda g: width[g]) for s in range(n_s)]
+    skills_of = [np.flatnonzero(skills[g]).tolist() for g in range(n_g)]
+
+    offered, answered, in_sl, wait_sum, abandoned = ([0.0] * (n_s * n_p) for _ in _STATS)
+    idle = staff[:, 0].tolist()
+    on = staff[:, 0].tolist()          # agents that should be on shift now (idle + busy, not leaving)
+    leaving = [0] * n_g                # busy agents that log off when their call ends
+    waiting = [deque() for _ in range(n_s)]
+    state = [0] * len(arrive)          # 0 waiting/not arrived, 1 answered, 2 abandoned
+    events = [(k * step, _STAFF, k) for k in range(1, n_p)]
+    heapq.heapify(events)
+
+    def answer(c, g, now):
+        state[c] = 1
+        w = now - arrive[c]
+        k = cell[c]
+        answered[k] += 1
+        wait_sum[k] += w
+        if w <= sl_sec:
+            in_sl[k] += 1
+        heapq.heappush(events, (now + service[c], _DEPART, g))
+
+    def next_waiting(g):
+        """Longest-waiting live call among group g's skills (abandoned calls dropped lazily)."""
+        best, best_s = None, None
+        for s in skills_of[g]:
+            q = waiting[s]
+            while q and state[q[0]] == 2:
+                q.popleft()
+            if q and (best is None or arrive[q[0]] < arrive[best]):
+                best, best_s = q[0], s
+        if best is not None:
+            waiting[best_s].popleft()
+        return best
+
+    def serve_idle(g, now):
+        while idle[g]:
+            c = next_waiting(g)
+            if c is None:
+                return
+            idle[g] -= 1
+            answer(c, g, now)
+
+    i, n = 0, len(arrive)
+    while i < n or events:
+        if i < n and (not events or arrive[i] < events[0][0]):
+            now, c = arrive[i], i
+            i += 1
+            s = skill[c]
+            offered[cell[c]] += 1
+            for g in groups_for[s]:
+                if idle[g]:
+                    idle[g] -= 1
+                    answer(c, g, now)
+                    break
+            else:
+                waiting[s].append(c)
+                if patience[c] != float("inf"):
+                    heapq.heappush(events, (now + patience[c], _ABANDON, c))
+            continue
+        now, kind, x = heapq.heappop(events)
+        if kind == _DEPART:
+            if leaving[x]:
+                leaving[x] -= 1
+                continue
+            c = next_waiting(x)
+            if c is None:
+                idle[x] += 1
+            else:
+                answer(c, x, now)
+        elif kind == _ABANDON:
+            if state[x] == 0:
+                state[x] = 2
+                abandoned[cell[x]] += 1
+        else:
+            for g in range(n_g):
+                delta = int(staff[g, x]) - on[g]
+                on[g] += delta
+                if delta > 0:
+                    back = min(delta, leaving[g])     # cancel pending log-offs before adding idle agents
+                    leaving[g] -= back
+                    idle[g] += delta - back
+                    serve_idle(g, now)
+                elif delta < 0:
+                    drop = min(-delta, idle[g])
+                    idle[g] -= drop
+                    leaving[g] += -delta - drop
+    return {k: np.asarray(v).reshape(n_s, n_p) for k, v in zip(_STATS, (offered, answered, in_sl, wait_sum, abandoned))}
+
+
+def _run_star(args):
+    return run_day(*args[:-1], seed=args[-1])
+
+
+def simulate_day(volume, aht_sec, staff, skills=None, minutes=30, replications: int = 10, workers: int = None,
+                 seed: int = 42, sl_sec=SL_SEC, patience_sec=PATIENCE_SEC, aht_cv=AHT_CV):
+    """Pooled per-interval estimates over `replications` simulated days.
+
+    Single queue: volume/aht_sec/staff are (P,) arrays. Multi-skill: volume/aht_sec are (S, P),
+    staff is (G, P) and skills is (G, S). Replications are spread over `workers` processes
+    (default: one per CPU, for batch/offline runs; 1 runs in-process, as the threaded app must).
+    Returns a frame per (skill, interval): offered, sl_pct, asa_sec, abandon_pct.
+    """
+    volume = np.atleast_2d(np.asarray(volume, dtype=float))
+    aht = np.broadcast_to(np.atleast_2d(np.asarray(aht_sec, dtype=float)), volume.shape)
+    staff = np.atleast_2d(np.asarray(staff)).round().astype(np.int64).clip(0)
+    skills = np.ones((staff.shape[0], volume.shape[0]), dtype=bool) if skills is None else np.atleast_2d(skills)
+    seeds = np.random.SeedSequence(seed).generate_state(replications).tolist()
+    args = [(volume, aht, staff, skills, minutes, sl_sec, patience_sec, aht_cv, s) for s in seeds]
+    workers = workers or min(replications, os.cpu_count() or 1)
+    if workers == 1 or replications == 1:
+        runs = [_run_star(a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            runs = list(pool.map(_run_star, args))
+    total = {k: sum(r[k] for r in runs) for k in _STATS}
+    n_s, n_p = volume.shape
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sl = np.where(total["offered"] > 0, total["in_sl"] / total["offered"] * 100, 100.0)
+        asa = np.where(total["answered"] > 0, total["wait_sum"] / total["answered"], 0.0)
+        aband = np.where(total["offered"] > 0, total["abandoned"] / total["offered"] * 100, 0.0)
+    return pd.DataFrame({
+        "skill": np.repeat(np.arange(n_s), n_p),
+        "interval": np.tile(np.arange(n_p), n_s),
+        "offered": (total["offered"] / replications).ravel(),
+        "sl_pct": sl.ravel(),
+        "asa_sec": asa.ravel(),
+        "abandon_pct": aband.ravel(),
+    })
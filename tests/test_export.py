@@ -0,0 +1,37 @@
+# test_export.py
+# CSV download payloads must be something st.download_button accepts.
+# Run: python -m pytest -q
+
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from bots import BotResult
+from export import csv_bytes, write_csv
+
+
+def _frame(n=1_200):
+    return pd.DataFrame({"site": [f"S{i % 7}" for i in range(n)], "aht": np.arange(n) * 1.5})
+
+
+@pytest.mark.parametrize("compress", [None, "gzip"])
+def test_csv_bytes_passes_download_button_conversion(compress):
+    df = _frame()
+    data = csv_bytes(df, compress=compress, chunk_rows=500)
+    out, _ = convert_data_to_bytes_and_infer_mime(data, RuntimeError("unsupported type"))
+    if compress:
+        out = gzip.decompress(out)
+    back = pd.read_csv(io.BytesIO(out))
+    pd.testing.assert_frame_equal(back, df)
+
+
+def test_csv_bytes_matches_streamed_file_for_bot_results():
+    df = _frame()
+    result = BotResult(df, np.arange(0, len(df), 3), {"priority": np.full(400, "P2")})
+    buf = io.BytesIO()
+    write_csv(result, buf, chunk_rows=100)
+    assert csv_bytes(result, chunk_rows=100) == buf.getvalue()
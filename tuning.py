@@ -0,0 +1,121 @@
+# tuning.py
+# Alert-budget threshold tuning ("at most 20 adherence alerts per sweep"). Each bot's alert rule is a
+# set of threshold conditions; for the threshold being tuned, its metric is presorted once among the
+# rows the other thresholds leave undecided. The alert count for any value is then a binary search,
+# and a whole slider range of previews is one vectorized searchsorted call.
+
+import numpy as np
+
+MAX_CURVES = 64          # cached sorted metrics (one per tuned threshold × setting of the others)
+
+
+class Rule:
+    """One alert condition: sign × df[column] <op> threshold (sign=-1 turns "gap <= -limit" into
+    "-gap >= limit", so every condition compares against the positive slider value)."""
+
+    def __init__(self, param: str, column: str, op: str, sign: int = 1):
+        self.param = param
+        self.column = column
+        self.op = op
+        self.sign = sign
+
+
+# bot slug -> ("all" | "any", rules); mirrors the rule engines in bots.py
+ALERT_RULES = {
+    "adherence": ("all", [
+        Rule("adh_target", "adherence_pct", "<"),
+        Rule("ooa_limit", "out_of_adherence_minutes", ">="),
+    ]),
+    "intraday-health": ("any", [
+        Rule("gap_limit", "staffing_gap", ">=", sign=-1),
+        Rule("sl_target", "service_level_est_pct", "<"),
+        Rule("asa_limit", "asa_sec_est", ">"),
+    ]),
+}
+
+
+def _hits(values, op, t):
+    return {"<": values < t, "<=": values <= t, ">": values > t, ">=": values >= t}[op]
+
+
+def _count_sorted(sorted_vals, op, t):
+    """How many of `sorted_vals` satisfy <op> t, for scalar or array t (NaNs already removed)."""
+    n = len(sorted_vals)
+    if op == "<":
+        return np.searchsorted(sorted_vals, t, "left")
+    if op == "<=":
+        return np.searchsorted(sorted_vals, t, "right")
+    if op == ">":
+        return n - np.searchsorted(sorted_vals, t, "right")
+    return n - np.searchsorted(sorted_vals, t, "left")
+
+
+class AlertTuner:
+    """Alert counts and budget solving for one bot's input frame (metrics are copied out once)."""
+
+    def __init__(self, df, bot: str):
+        self.mode, self.rules = ALERT_RULES[bot]
+        self.rule = {r.param: r for r in self.rules}
+        self.values = {r.param: r.sign * df[r.column].to_numpy(dtype=float) for r in self.rules}
+        self.n = len(df)
+        self._curves = {}
+
+    @property
+    def params(self):
+        return list(self.rule)
+
+    def _curve(self, param: str, others: dict):
+        """(alerts fixed by the other thresholds, sorted metric of the rows still undecided)."""
+        key = (param, tuple(sorted((k, float(others[k])) for k in self.rule if k != param)))
+        if key not in self._curves:
+            masks = [_hits(self.values[r.param], r.op, others[r.param]) for r in self.rules if r.param != param]
+            if self.mode == "all":
+                base, eligible = 0, np.logical_and.reduce(masks) if masks else np.ones(self.n, dtype=bool)
+            else:
+                hit = np.logical_or.reduce(masks) if masks else np.zeros(self.n, dtype=bool)
+                base, eligible = int(hit.sum()), ~hit
+            v = self.values[param][eligible]
+            if len(self._curves) >= MAX_CURVES:
+                self._curves.pop(next(iter(self._curves)))
+            self._curves[key] = (base, np.sort(v[~np.isnan(v)]))
+        return self._curves[key]
+
+    def counts(self, param: str, values, **others):
+        """Alert count for each candidate value of `param`, the other thresholds held at `others`."""
+        base, sorted_vals = self._curve(param, others)
+        return base + _count_sorted(sorted_vals, self.rule[param].op, np.asarray(values, dtype=float))
+
+    def count(self, **thresholds):
+        """Alert count for one full threshold setting."""
+        param = self.params[0]
+        return int(self.counts(param, thresholds[param], **thresholds))
+
+    def solve(self, budget: int, param: str, grid, current=None, **others):
+        """Value of `param` on `grid` whose alert count is the largest one within `budget` (ties: the
+        value nearest `current`). Returns (value, count, within_budget); if no value fits, the one
+        with the fewest alerts."""
+        grid = np.asarray(grid, dtype=float)
+        c = self.counts(param, grid, **others)
+        ok = c <= budget
+        if not ok.any():
+            i = int(np.argmin(c))
+            return float(grid[i]), int(c[i]), False
+        best = c[ok].max()
+        cand = np.flatnonzero(ok & (c == best))
+        i = cand[np.argmin(np.abs(grid[cand] - current))] if current is not None else cand[0]
+        return float(grid[i]), int(c[i]), True
+
+    def solve_pair(self, budget: int, grids: dict, current: dict = None):
+        """Two thresholds at once: for each value of the second, solve the first; keep the pair with
+        the largest count within budget (ties: nearest `current`, scaled by each grid's span)."""
+        current = current or {}
+        (p, p_grid), (q, q_grid) = grids.items()
+        span = {k: (max(g) - min(g)) or 1.0 for k, g in grids.items()}
+        best = None
+        for qv in q_grid:
+            pv, c, ok = self.solve(budget, p, p_grid, current.get(p), **{q: qv})
+            dist = sum(abs(v - current[k]) / span[k] for k, v in ((p, pv), (q, qv)) if k in current)
+            key = (ok, c if ok else -c, -dist)
+            if best is None or key > best[0]:
+                best = (key, {p: pv, q: float(qv)}, c, ok)
+        return best[1], best[2], best[3]
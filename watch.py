@@ -0,0 +1,273 @@
+# watch.py
+# Watch-folder ingestion: new drops in a folder trigger the bots they feed, seconds after they land.
+# A file is picked up once its size/mtime have been stable for `settle` seconds (debounce for files
+# still being written), skipped if its content hash was already processed, and routed to one bot: the
+# bot named in the file name (e.g. site1.variance.csv), else the most specific bot its header feeds. Scans are cheap stat() passes; with watchdog installed, filesystem events
+# (inotify on Linux) wake the loop immediately instead of waiting for the next poll.
+# Run: python watch.py drops/ --out watch_out
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+from alerts import AlertDispatcher, FingerprintStore
+from batch import INPUT_EXTS, output_name, parse_params, read_input
+from bots import BOTS, detect_bots
+from export import write_csv
+
+SETTLE_SEC = 1.0          # unchanged size + mtime for this long = fully written
+POLL_SEC = 1.0            # scan interval without filesystem events
+STATE_FILE = ".wfm_watch_state.json"
+ALERT_FILE = ".wfm_watch_alerts.json"    # sent-alert fingerprints, so a re-dropped export is not re-alerted
+_PARTIAL = (".tmp", ".part", ".partial", ".crdownload", ".filepart")
+
+
+def is_candidate(name: str):
+    low = name.lower()
+    return not name.startswith((".", "~")) and low.endswith(INPUT_EXTS) and not low.endswith(_PARTIAL)
+
+
+def file_hash(path: str, block: int = 1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(block), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_header(path: str):
+    if path.lower().endswith(".xlsx"):
+        return list(pd.read_excel(path, nrows=0).columns)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def route(name: str, columns, allowed=None, all_bots: bool = False):
+    """Bot specs to run for one drop. A bot slug in the file name picks that bot; otherwise the match
+    with the most required inputs wins (an export that feeds Variance also feeds Intraday Health, and
+    would alert twice). `all_bots` runs every match instead."""
+    specs = [s for s in detect_bots(columns) if allowed is None or s.slug in allowed]
+    if all_bots or len(specs) <= 1:
+        return specs
+    low = name.lower()
+    named = [s for s in specs if s.slug in low]
+    return [max(named or specs, key=lambda s: len(s.inputs))]
+
+
+class WatchState:
+    """Processed files (name -> size, mtime_ns, hash) persisted as JSON next to the drops."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as fh:
+                self.files = json.load(fh)
+
+    def unchanged_stat(self, name: str, st):
+        rec = self.files.get(name)
+        return rec is not None and rec["size"] == st.st_size and rec["mtime_ns"] == st.st_mtime_ns
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.files, fh)
+        os.replace(tmp, self.path)
+
+
+class FolderWatcher:
+    """Debounced, incremental processing of one drop folder.
+
+    `bots` restricts which bots may run (default: any bot the file's columns can feed); each file goes to
+    one of them (see `route`) unless `all_bots`. `params` are threshold overrides applied to every bot
+    that has that threshold. Exceptions are written to
+    `out_dir` as <file>.<bot>.exceptions.csv; with `dispatch`, the new or escalated ones also go through
+    the (simulated) alert dispatcher, deduplicated across runs by a FingerprintStore at `alert_path`.
+    """
+
+    def __init__(self, folder: str, out_dir: str, bots=None, params: dict = None, settle: float = SETTLE_SEC,
+                 poll: float = POLL_SEC, dispatch: bool = False, state_path: str = None, alert_path: str = None,
+                 all_bots: bool = False, log=print):
+        self.folder = folder
+        self.out_dir = out_dir
+        self.bots = set(bots) if bots else None
+        self.params = params or {}
+        self.settle = settle
+        self.poll = poll
+        self.dispatch = dispatch
+        self.all_bots = all_bots
+        self.state = WatchState(state_path or os.path.join(folder, STATE_FILE))
+        self.alerts = FingerprintStore(alert_path or os.path.join(folder, ALERT_FILE)) if dispatch else None
+        self.log = log
+        self.pending = {}               # name -> (size, mtime_ns, monotonic time the stat was first seen)
+        self.wake = threading.Event()
+        os.makedirs(out_dir, exist_ok=True)
+
+    def scan(self):
+        """Stat the folder; returns names whose size/mtime held still for `settle` seconds."""
+        now = time.monotonic()
+        ready, seen = [], set()
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if not entry.is_file() or not is_candidate(entry.name):
+                    continue
+                st = entry.stat()
+                seen.add(entry.name)
+                if self.state.unchanged_stat(entry.name, st):
+                    continue
+                key = (st.st_size, st.st_mtime_ns)
+                prev = self.pending.get(entry.name)
+                if prev is None or prev[:2] != key:
+                    self.pending[entry.name] = (*key, now)
+                elif now - prev[2] >= self.settle:
+                    ready.append(entry.name)
+        for name in set(self.pending) - seen:      # deleted / renamed away before settling
+            del self.pending[name]
+        return sorted(ready)
+
+    def process(self, name: str):
+        """Run the bot(s) this file is routed to; returns one event dict per bot run (empty if skipped)."""
+        path = os.path.join(self.folder, name)
+        st = os.stat(path)
+        self.pending.pop(name, None)
+        digest = file_hash(path)
+        rec = self.state.files.get(name)
+        if rec is not None and rec["hash"] == digest:
+            rec.update(size=st.st_size, mtime_ns=st.st_mtime_ns)       # touched, same content
+            self.state.save()
+            self.log(f"skip  {name} (content unchanged)")
+            return []
+        specs = route(name, read_header(path), self.bots, self.all_bots)
+        events = []
+        if not specs:
+            self.log(f"skip  {name} (no bot takes these columns)")
+        else:
+            df = read_input(path)
+            for spec in specs:
+                events.append(self._run(spec, df.copy() if len(specs) > 1 else df, name, st))
+        self.state.files[name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest,
+                                  "bots": [s.slug for s in specs], "processed_at": time.time()}
+        self.state.save()
+        return events
+
+    def _run(self, spec, df, name, st):
+        t0 = time.perf_counter()
+        result = spec(df, **{k: v for k, v in self.params.items() if k in spec.params})
+        out = os.path.join(self.out_dir, f"{output_name(name, '')}.{spec.slug}.exceptions.csv")
+        write_csv(result, out)
+        suppressed = self._dispatch(spec, result) if self.dispatch and result.n_exceptions else 0
+        event = {"file": name, "bot": spec.slug, "rows": len(df), "exceptions": result.n_exceptions,
+                 "suppressed": suppressed, "output": out, "run_ms": round((time.perf_counter() - t0) * 1000, 2),
+                 "latency_sec": round(time.time() - st.st_mtime_ns / 1e9, 2)}     # landed -> done
+        self.log(f"run   {name} -> {spec.name}: {event['exceptions']:,}/{event['rows']:,} exceptions "
+                 f"in {event['run_ms']:.0f} ms ({event['latency_sec']:.1f}s after landing)")
+        return event
+
+    def _dispatch(self, spec, result):
+        """Send the exceptions not already alerted (or escalated since); returns the suppressed count."""
+        d = spec.dedupe
+        used = [*d.get("key_cols", ()), *d.get("flag_cols", ()), d.get("priority_col"), d.get("severity_col")]
+        missing = [c for c in used if c and c not in result.columns]
+        suppressed = 0
+        if missing:                  # cannot fingerprint this export: send everything rather than nothing
+            self.log(f"note  {spec.name}: no alert dedupe (missing {', '.join(missing)})")
+        else:
+            result, suppressed = self.alerts.filter_result(spec.name, result, **d)
+        with AlertDispatcher() as dispatcher:
+            job = dispatcher.add_result(spec.name, result).dispatch()
+            job.wait()
+        if not missing:
+            self.alerts.mark_delivered(job.delivered())
+            self.alerts.save()
+        return suppressed
+
+    def run_once(self):
+        events = []
+        for name in self.scan():
+            try:
+                events.extend(self.process(name))
+            except FileNotFoundError:        # removed between scan and processing
+                self.pending.pop(name, None)
+            except Exception as e:         # a bad drop must not stop the watcher; retried when it changes
+                self.log(f"error {name}: {type(e).__name__}: {e}")
+                try:
+                    st = os.stat(os.path.join(self.folder, name))
+                except OSError:              # gone as well: nothing to remember, a new drop starts over
+                    self.pending.pop(name, None)
+                    continue
+                self.state.files[name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": None,
+                                          "bots": [], "error": f"{type(e).__name__}: {e}"}
+                self.state.save()
+        return events
+
+    def run(self, stop: threading.Event = None):
+        """Process drops until `stop` is set (or Ctrl+C)."""
+        stop = stop or threading.Event()
+        observer = self._observer()
+        try:
+            while not stop.is_set():
+                self.run_once()
+                # re-check soon while files are settling; otherwise sleep until an event or the next poll
+                self.wake.wait(min(self.poll, self.settle / 2) if self.pending else self.poll)
+                self.wake.clear()
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+
+    def _observer(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:          # optional: polling alone still works, with up to `poll` s delay
+            return None
+        wake = self.wake
+
+        class Wake(FileSystemEventHandler):
+            def on_any_event(self, event):
+                wake.set()
+
+        observer = Observer()
+        observer.schedule(Wake(), self.folder, recursive=False)
+        observer.start()
+        return observer
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run WFM bots on new files dropped in a folder")
+    ap.add_argument("folder")
+    ap.add_argument("--out", default="watch_out", help="output directory for exception files")
+    ap.add_argument("--bot", dest="bots", action="append", choices=sorted(BOTS),
+                    help="only run these bots (repeatable; default: every bot a file can feed)")
+    ap.add_argument("--all-bots", action="store_true",
+                    help="run every bot a file can feed (default: one per file, named in the file name or most specific)")
+    ap.add_argument("--set", dest="params", action="append", metavar="NAME=VALUE",
+                    help="threshold override for every bot that has it, repeatable")
+    ap.add_argument("--settle", type=float, default=SETTLE_SEC, help="seconds a file must be unchanged")
+    ap.add_argument("--poll", type=float, default=POLL_SEC, help="scan interval in seconds")
+    ap.add_argument("--dispatch", action="store_true", help="send exceptions through the alert dispatcher")
+    ap.add_argument("--once", action="store_true", help="process what is there now and exit")
+    args = ap.parse_args(argv)
+
+    watcher = FolderWatcher(args.folder, args.out, args.bots, parse_params(args.params), args.settle,
+                            args.poll, args.dispatch, all_bots=args.all_bots)
+    if args.once:
+        watcher.scan()
+        time.sleep(args.settle)
+        watcher.run_once()
+        return 0
+    print(f"Watching {args.folder} (settle {args.settle}s, poll {args.poll}s) — Ctrl+C to stop", file=sys.stderr)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())